@@ -1,8 +1,14 @@
 """AI Git Agent - LangChain Agent with Hugging Face Model"""
-from langchain_core.messages import HumanMessage, ToolMessage
-from langchain_huggingface import HuggingFacePipeline
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
-import torch
+import asyncio
+import atexit
+import hashlib
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import ClassVar
+import orjson
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, message_to_dict
 from tools import (
     git_status,
     git_add,
@@ -12,6 +18,7 @@ from tools import (
     get_branch_info,
     diagnose_git_config,
     get_remote_url,
+    get_all_repo_info,
     git_remote_add,
     git_push,
     generate_version_documentation,
@@ -20,65 +27,231 @@ from tools import (
     validate_git_repository,
     git_reinitialize
 )
+from tools.runtime import get_llm
 
+# Read-only tools with no side effects - safe to run concurrently in one turn
+PARALLEL_SAFE_TOOLS = frozenset({
+    "git_status",
+    "get_branch_info",
+    "diagnose_git_config",
+    "get_remote_url",
+    "get_all_repo_info",
+    "validate_git_repository"
+})
 
-class AIGitAgent:
-    def __init__(self, model_id: str = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"):
+# Tools with side effects that must run at most once per command
+ONCE_PER_RUN_TOOLS = frozenset({"generate_version_documentation"})
+
+# Tools the system prompt starts nearly every Git command with
+PREFETCH_TOOLS = ("validate_git_repository", "git_status")
+
+# Trivial commands answered without the model: a direct reply or ("tool", name)
+_FASTPATH = {
+    "hi": "👋 Hello! How can I help with your repository?",
+    "hello": "👋 Hi there! What would you like to do?",
+    "hey": "👋 Hey! What would you like to do?",
+    "thanks": "😊 You're welcome!",
+    "thank you": "😊 You're welcome!",
+    "status": ("tool", "git_status"),
+    "git status": ("tool", "git_status"),
+    "diagnose": ("tool", "diagnose_git_config"),
+    "branch": ("tool", "get_branch_info"),
+    "remote": ("tool", "get_remote_url"),
+    "overview": ("tool", "get_all_repo_info"),
+    "validate": ("tool", "validate_git_repository")
+}
+
+# Tool result sent back when the model re-requests a read-only call it already has
+REPEATED_CALL_NOTICE = "Already executed; please produce final response."
+
+# Chat history limits - older turns are folded into a short summary
+MAX_HISTORY_TURNS = 6
+MAX_HISTORY_CHARS = 4000
+
+# Console output is formatted and written to stdout on a background thread
+logger = logging.getLogger("autogit.agent")
+_LOG_QUEUE = queue.Queue()
+_log_listener = None
+
+
+def _start_console_logging():
+    """Attach the queued stdout sink to the agent logger"""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    _log_listener = QueueListener(_LOG_QUEUE, console)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    logger.addHandler(QueueHandler(_LOG_QUEUE))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def _flush_console():
+    """Wait until every queued line has reached stdout"""
+    if _log_listener is not None:
+        _LOG_QUEUE.join()
+
+
+def _tool_call_key(tool_name: str, tool_args: dict) -> tuple:
+    """Build a hashable key identifying a tool call and its arguments"""
+    return (tool_name, frozenset(tool_args.items()))
+
+
+def _fastpath_route(user_command: str):
+    """Look up a command that needs no model turn, or None"""
+    return _FASTPATH.get(user_command.strip().lower().rstrip("!.?"))
+
+
+def _format_dict_result(result: dict) -> str:
+    """Display text for tools that return a result dictionary"""
+    return str(result.get('message', result.get('output', result)))
+
+
+def _format_any_result(result) -> str:
+    """Display text for tools without a declared return type"""
+    if isinstance(result, dict):
+        return _format_dict_result(result)
+    return str(result)
+
+
+def _serialize_result(result) -> str:
+    """Compact model-facing text for a tool result: status plus its message"""
+    if not isinstance(result, dict):
+        return str(result)
+    text = result.get('message', result.get('output'))
+    if text is None:
+        return orjson.dumps(result, default=str).decode()
+    return f"{result.get('status', 'success')}: {text}"
+
+
+def _serialize_git_status(result) -> str:
+    """Porcelain lines and any leading note, the emoji analysis repeats them"""
+    if not isinstance(result, dict):
+        return str(result)
+    return f"{result['status']}: {result['output'].split(chr(10) + '📊', 1)[0]}"
+
+
+# Tools whose results carry fields the model needs beyond message/output
+_TOOL_SERIALIZERS = {
+    "git_status": _serialize_git_status,
+    "get_branch_info": lambda r: (
+        f"{r['status']}: branch {r['branch']}"
+        if isinstance(r, dict) and r.get('branch') else _serialize_result(r)
+    ),
+    "get_remote_url": lambda r: f"{r['status']}: {r.get('url') or r.get('message')}" if isinstance(r, dict) else str(r),
+    "validate_git_repository": lambda r: (
+        f"{r['status']} (needs_action={r.get('needs_action', False)}): {r['message']}"
+        if isinstance(r, dict) else str(r)
+    )
+}
+
+
+def _make_formatter(tool):
+    """Pick a display formatter specialized on the tool's declared return type"""
+    func = getattr(tool, "func", None) or getattr(tool, "coroutine", None)
+    return_type = getattr(func, "__annotations__", {}).get("return")
+    if return_type is dict:
+        return _format_dict_result
+    if return_type is str:
+        return str
+    return _format_any_result
+
+
+class LLMCache:
+    """In-memory cache of LLM responses keyed by a hash of the full request"""
+    
+    def __init__(self, model_id: str, tool_names):
         self.model_id = model_id
-        self.tools = self._load_tools()
-        self.tools_dict = {tool.name: tool for tool in self.tools}
-        
-        # Load model and tokenizer locally
-        print(f"Loading model {model_id}...")
-        tokenizer = AutoTokenizer.from_pretrained(model_id)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_id,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None,
-            low_cpu_mem_usage=True
-        )
-        
-        # Create pipeline
-        pipe = pipeline(
-            "text-generation",
-            model=model,
-            tokenizer=tokenizer,
-            max_new_tokens=800,
-            temperature=0.1,
-            top_k=50,
-            do_sample=True
-        )
-        
-        # Create LangChain LLM from pipeline
-        self.llm = HuggingFacePipeline(pipeline=pipe)
-        
-        # Bind tools to the model
-        self.llm = self.llm.bind_tools(self.tools)
-        self.chat_history = []
-        
-    def _load_tools(self) -> list:
-        """Load all available LangChain tools"""
-        return [
-            git_status,
-            git_add,
-            git_commit,
-            git_init,
-            git_branch_rename,
-            get_branch_info,
-            diagnose_git_config,
-            get_remote_url,
-            git_remote_add,
-            git_push,
-            generate_version_documentation,
-            resolve_conflicts,
-            get_merge_conflicts,
-            validate_git_repository,
-            git_reinitialize
-        ]
+        self.tool_names = sorted(tool_names)
+        self._responses = {}
+    
+    def key(self, messages: list) -> str:
+        """Hash the canonical {model, messages, tools} payload"""
+        payload = {
+            "model": self.model_id,
+            "messages": [m if isinstance(m, dict) else message_to_dict(m) for m in messages],
+            "tools": self.tool_names
+        }
+        return hashlib.sha256(orjson.dumps(payload, default=str, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    def get(self, key: str):
+        """Rebuild a cached response, or return None on a miss"""
+        entry = self._responses.get(key)
+        if entry is None:
+            return None
+        return AIMessage(content=entry["content"], tool_calls=entry["tool_calls"])
     
-    def _get_system_message(self) -> str:
-        """Get system prompt"""
-        return """You are a friendly and helpful Git automation assistant.
+    def put(self, key: str, response):
+        """Store a response unless replaying it could repeat a side effect"""
+        if any(tc["name"] not in PARALLEL_SAFE_TOOLS for tc in response.tool_calls):
+            return
+        self._responses[key] = {
+            "content": response.content,
+            "tool_calls": [dict(tc) for tc in response.tool_calls]
+        }
+
+
+class SemanticLLMCache:
+    """First-turn responses reused across paraphrased commands.
+    
+    Needs the optional sentence-transformers package, without it every lookup misses.
+    """
+    
+    SIMILARITY_THRESHOLD = 0.92
+    
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        self.model_name = model_name
+        self._encoder = None
+        self._vectors = None
+        self._responses = []
+    
+    def _embed(self, command: str):
+        """Normalized embedding of a command, or None when no encoder is available"""
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.model_name)
+            except Exception:
+                self._encoder = False
+        if not self._encoder:
+            return None
+        return self._encoder.encode(command.strip().lower(), normalize_embeddings=True)
+    
+    def get(self, command: str):
+        """Replay the response of the most similar earlier command, if close enough"""
+        if self._vectors is None:
+            return None
+        vector = self._embed(command)
+        if vector is None:
+            return None
+        # Vectors are normalized, so the dot product is the cosine similarity
+        scores = self._vectors @ vector
+        best = int(scores.argmax())
+        if scores[best] < self.SIMILARITY_THRESHOLD:
+            return None
+        entry = self._responses[best]
+        return AIMessage(content=entry["content"], tool_calls=entry["tool_calls"])
+    
+    def put(self, command: str, response):
+        """Store a text-only or read-only response for later paraphrases"""
+        if any(tc["name"] not in PARALLEL_SAFE_TOOLS for tc in response.tool_calls):
+            return
+        vector = self._embed(command)
+        if vector is None:
+            return
+        import numpy as np
+        self._vectors = vector[None, :] if self._vectors is None else np.vstack([self._vectors, vector])
+        self._responses.append({
+            "content": response.content,
+            "tool_calls": [dict(tc) for tc in response.tool_calls]
+        })
+
+
+class AIGitAgent:
+    _SYSTEM_MESSAGE: ClassVar[str] = """You are a friendly and helpful Git automation assistant.
 
 IMPORTANT: Always show the ACTUAL output from tools. Never say something succeeded unless you see a success message from the tool.
 
@@ -114,6 +287,7 @@ WHEN TO USE TOOLS:
 3. Configuration:
    • "diagnose" / "check config" → use diagnose_git_config
    • "get remote" / "remote url" → use get_remote_url
+   • "overview" / "repo info" / several of the above at once → use get_all_repo_info
    
 4. Commit ONLY:
    • "commit" / "save changes" / "commit with message X" → 
@@ -160,88 +334,382 @@ WHEN NOT TO USE TOOLS:
 • Casual chat → Respond naturally without using tools
 
 CRITICAL: Base your response ONLY on actual tool outputs. If you don't call a tool, don't claim it succeeded."""
+    
+    # System prompt message, built once and shared by every run
+    _SYSTEM_PROMPT: ClassVar[dict] = {"role": "system", "content": _SYSTEM_MESSAGE}
+    
+    def __init__(self, model_id: str = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"):
+        _start_console_logging()
+        self.model_id = model_id
+        self.tools = self._load_tools()
+        self.tools_dict = {tool.name: tool for tool in self.tools}
+        # name -> (invoker, display formatter, ToolMessage serializer), resolved once per agent
+        self._dispatch = {
+            name: (tool.ainvoke, _make_formatter(tool), _TOOL_SERIALIZERS.get(name, _serialize_result))
+            for name, tool in self.tools_dict.items()
+        }
+        
+        # Load model locally, weights are shared with any tool using the same model
+        logger.info(f"Loading model {model_id}...")
+        self.llm = get_llm(model_id, max_new_tokens=800, temperature=0.1)
+        
+        # Bind tools to the model
+        self.llm = self.llm.bind_tools(self.tools)
+        self.llm_cache = LLMCache(model_id, self.tools_dict)
+        self.semantic_cache = SemanticLLMCache()
+        self.chat_history = []
+        
+    def _load_tools(self) -> list:
+        """Load all available LangChain tools"""
+        return [
+            git_status,
+            git_add,
+            git_commit,
+            git_init,
+            git_branch_rename,
+            get_branch_info,
+            diagnose_git_config,
+            get_remote_url,
+            get_all_repo_info,
+            git_remote_add,
+            git_push,
+            generate_version_documentation,
+            resolve_conflicts,
+            get_merge_conflicts,
+            validate_git_repository,
+            git_reinitialize
+        ]
+    
 
-    def run(self, user_command: str):
-        """Main method to process commands using Hugging Face model with tool calling"""
-        print(f"\n💻 User: {user_command}\n")
-        print("🤖 AI Agent: Processing your request...\n")
+    def _prefetch_tools(self) -> dict:
+        """Start likely first tools concurrently with the LLM call"""
+        return {
+            _tool_call_key(name, {}): asyncio.create_task(self._dispatch[name][0]({}))
+            for name in PREFETCH_TOOLS
+            if name in self._dispatch
+        }
+    
+    @staticmethod
+    async def _discard_memo(tool_call_memo: dict, read_only_only: bool = False):
+        """Drop memoized tool runs that are unused or no longer trustworthy.
+        
+        Runs still in progress are awaited, not cancelled: they execute in
+        worker threads that cancelling cannot stop, and a git command still
+        running there would race the next write tool for .git/index.lock.
+        """
+        tasks = []
+        for key in list(tool_call_memo):
+            if read_only_only and key[0] not in PARALLEL_SAFE_TOOLS:
+                continue
+            task = tool_call_memo.pop(key)
+            if task is not None:
+                tasks.append(task)
+        # return_exceptions also marks every error as retrieved
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _invoke_tool(self, tool_call: dict, tool_call_memo: dict):
+        """Execute a single tool call without blocking the event loop"""
+        tool_name = tool_call["name"]
+        tool_args = tool_call.get("args", {})
+        logger.info(f"🔧 Calling: {tool_name}")
+        
+        invoker, _, _ = self._dispatch.get(tool_name, (None, None, None))
+        if invoker is None:
+            return f"❌ Tool {tool_name} not found"
+        
+        if tool_name not in PARALLEL_SAFE_TOOLS:
+            return await invoker(tool_args)
+        
+        # Idempotent tools reuse an earlier (or speculative) run in this command
+        key = _tool_call_key(tool_name, tool_args)
+        task = tool_call_memo.get(key)
+        if task is None:
+            task = asyncio.ensure_future(invoker(tool_args))
+            tool_call_memo[key] = task
+        return await task
+    
+    def _start_speculative(self, tool_call: dict, tool_call_memo: dict):
+        """Begin a read-only tool call before the full LLM response is available"""
+        key = _tool_call_key(tool_call["name"], tool_call.get("args", {}))
+        if key not in tool_call_memo:
+            invoker, _, _ = self._dispatch[tool_call["name"]]
+            tool_call_memo[key] = asyncio.ensure_future(invoker(tool_call.get("args", {})))
+    
+    async def _stream_response(self, messages: list, tool_call_memo: dict):
+        """Stream the LLM response, starting read-only tool calls as soon as they are complete.
+        
+        A streamed tool call is complete once the model moves on to the next
+        one. Speculation stops at the first side-effecting call so nothing
+        reads repository state that an earlier call is about to change, and
+        every speculative run lands in tool_call_memo so the write barrier in
+        _execute_tool_calls waits for it to finish.
+        """
+        response = None
+        started = 0
+        async for chunk in self.llm.astream(messages):
+            response = chunk if response is None else response + chunk
+            tool_calls = getattr(response, "tool_calls", None) or []
+            while (started < len(tool_calls) - 1
+                   and tool_calls[started]["name"] in PARALLEL_SAFE_TOOLS):
+                self._start_speculative(tool_calls[started], tool_call_memo)
+                started += 1
+        
+        if response is None:
+            response = await self.llm.ainvoke(messages)
+        return response
+    
+    async def _execute_tool_calls(self, tool_calls: list, tool_call_memo: dict) -> list:
+        """Execute tool calls in order, running consecutive read-only calls concurrently.
+        
+        Side-effecting tools (git_add -> git_commit -> git_push) stay serialized
+        and act as barriers between parallel batches. A barrier first waits for
+        every read-only run still in flight, including speculative runs started
+        while streaming that this response no longer asks for.
+        """
+        results = []
+        batch = []
+        
+        for tool_call in tool_calls:
+            if tool_call["name"] in PARALLEL_SAFE_TOOLS:
+                batch.append(tool_call)
+                continue
+            if batch:
+                results.extend(await asyncio.gather(*[self._invoke_tool(tc, tool_call_memo) for tc in batch]))
+                batch = []
+            # Repository state is about to change, memoized read-only results are stale
+            await self._discard_memo(tool_call_memo, read_only_only=True)
+            # These tools print their own progress, keep it after ours
+            _flush_console()
+            results.append(await self._invoke_tool(tool_call, tool_call_memo))
+        
+        if batch:
+            results.extend(await asyncio.gather(*[self._invoke_tool(tc, tool_call_memo) for tc in batch]))
+        
+        return results
+    
+    @staticmethod
+    def _message_text(message) -> str:
+        """Get the text content of a LangChain message or role dict"""
+        if isinstance(message, dict):
+            return str(message.get("content", ""))
+        return str(message.content)
+    
+    async def _compact_history(self, history: list) -> list:
+        """Keep recent turns verbatim and fold older ones into a summary.
+        
+        History is only cut at user-turn boundaries so tool calls always stay
+        next to their tool results.
+        """
+        turn_starts = [i for i, m in enumerate(history) if isinstance(m, HumanMessage)]
+        history_chars = sum(len(self._message_text(m)) for m in history)
+        
+        if len(turn_starts) <= MAX_HISTORY_TURNS and history_chars <= MAX_HISTORY_CHARS:
+            return history
+        
+        if history_chars > MAX_HISTORY_CHARS:
+            keep_from = turn_starts[-1]
+        else:
+            keep_from = turn_starts[-MAX_HISTORY_TURNS]
+        if keep_from == 0:
+            return history
+        
+        old_messages = history[:keep_from]
+        transcript = "\n".join(
+            f"{m.get('role', 'system') if isinstance(m, dict) else m.type}: {self._message_text(m)}"
+            for m in old_messages
+        )
+        
+        try:
+            summary = await self.llm.ainvoke([
+                {"role": "system", "content": "Summarize the following git session in <=200 tokens"},
+                HumanMessage(content=transcript)
+            ])
+            summary_text = self._message_text(summary).strip()
+        except Exception:
+            summary_text = ""
+        
+        if not summary_text:
+            # Summarization failed, just drop the oldest turns
+            return history[keep_from:]
+        
+        return [
+            {"role": "system", "content": f"Summary of the earlier session: {summary_text}"},
+            *history[keep_from:]
+        ]
+    
+    async def run_batch(self, user_commands: list):
+        """Process several commands, sharing one batched LLM call for their first turn.
+        
+        Commands still execute in order. Only the first model turn of each is
+        generated together, against the history as it was before the batch.
+        """
+        if len(user_commands) == 1:
+            await self.run(user_commands[0])
+            return
+        
+        # Fast-path commands are answered without the model
+        llm_commands = [command for command in user_commands if _fastpath_route(command) is None]
+        first_responses = await self.llm.abatch(
+            [
+                [self._SYSTEM_PROMPT, *self.chat_history, HumanMessage(content=command)]
+                for command in llm_commands
+            ],
+            return_exceptions=True
+        ) if llm_commands else []
+        batched = dict(zip(llm_commands, first_responses))
+        
+        for command in user_commands:
+            first_response = batched.get(command)
+            if isinstance(first_response, Exception):
+                first_response = None
+            await self.run(command, first_response=first_response)
+    
+    async def _run_fastpath(self, user_command: str, route) -> None:
+        """Answer a trivial command directly and record it in chat history"""
+        history = [*self.chat_history, HumanMessage(content=user_command)]
+        
+        if isinstance(route, str):
+            logger.info(f"\n✅ {route}\n")
+            history.append(AIMessage(content=route))
+        else:
+            _, tool_name = route
+            tool_call = {"name": tool_name, "args": {}, "id": f"fastpath_{tool_name}"}
+            result = await self._invoke_tool(tool_call, {})
+            _, formatter, serializer = self._dispatch[tool_name]
+            text = formatter(result)
+            logger.info(f"{text}\n")
+            history.extend([
+                AIMessage(content="", tool_calls=[tool_call]),
+                ToolMessage(content=serializer(result), tool_call_id=tool_call["id"]),
+                AIMessage(content=text)
+            ])
+        
+        self.chat_history = await self._compact_history(history)
+    
+    async def run(self, user_command: str, first_response=None):
+        """Main method to process commands using Hugging Face model with tool calling.
+        
+        Args:
+            user_command: The natural language command to process.
+            first_response: Optional pre-generated LLM response for the first turn.
+        """
+        logger.info(f"\n💻 User: {user_command}\n")
+        logger.info("🤖 AI Agent: Processing your request...\n")
+        
+        route = _fastpath_route(user_command)
+        if route is not None:
+            try:
+                await self._run_fastpath(user_command, route)
+            except Exception as e:
+                logger.info(f"\n❌ Error: {str(e)}\n")
+            logger.info("✨ Done!\n")
+            _flush_console()
+            return
+        
+        # (tool_name, frozenset(args)) -> task, seeded with speculative runs of
+        # the tools nearly every command begins with
+        tool_call_memo = self._prefetch_tools()
         
         try:
             # Add system message and user message
             messages = [
-                {"role": "system", "content": self._get_system_message()},
+                self._SYSTEM_PROMPT,
                 *self.chat_history,
                 HumanMessage(content=user_command)
             ]
             
             max_iterations = 8
             iteration = 0
-            tool_call_tracker = {}  # Track which tools have been called
+            # Read-only calls already answered since the repository last changed
+            executed_calls = set()
+            nudged = False
             
             while iteration < max_iterations:
                 iteration += 1
                 
-                # Get response from LLM
-                response = self.llm.invoke(messages)
+                # Get response from LLM (reusing an identical earlier request)
+                cache_key = self.llm_cache.key(messages)
+                if first_response is not None:
+                    # Batched with other commands, so not generated from this exact history
+                    response, first_response = first_response, None
+                else:
+                    response = self.llm_cache.get(cache_key)
+                    if response is None and iteration == 1:
+                        response = self.semantic_cache.get(user_command)
+                if response is None:
+                    response = await self._stream_response(messages, tool_call_memo)
+                    self.llm_cache.put(cache_key, response)
+                    if iteration == 1:
+                        self.semantic_cache.put(user_command, response)
                 messages.append(response)
                 
                 # Check if there are tool calls
                 if not response.tool_calls:
                     # No more tool calls, print final response
                     if response.content:
-                        print(f"\n✅ {response.content}\n")
+                        logger.info(f"\n✅ {response.content}\n")
                     break
                 
                 # Execute all tool calls
+                results = {}
+                runnable_calls = []
+                repeated = 0
                 for tool_call in response.tool_calls:
                     tool_name = tool_call["name"]
-                    tool_args = tool_call.get("args", {})
+                    
+                    # The model is looping on a call whose result it already has
+                    if tool_name in PARALLEL_SAFE_TOOLS:
+                        call_key = _tool_call_key(tool_name, tool_call["args"])
+                        if call_key in executed_calls:
+                            results[tool_call["id"]] = REPEATED_CALL_NOTICE
+                            repeated += 1
+                            continue
+                        executed_calls.add(call_key)
+                    elif tool_name in self._dispatch:
+                        # Repository state may change, earlier reads are stale
+                        executed_calls.clear()
                     
                     # Prevent duplicate calls to generate_version_documentation
-                    if tool_name == "generate_version_documentation":
-                        if tool_name in tool_call_tracker:
+                    if tool_name in ONCE_PER_RUN_TOOLS:
+                        once_key = _tool_call_key(tool_name, {})
+                        if once_key in tool_call_memo:
                             # Silently skip duplicate - don't show message to user
-                            tool_message = ToolMessage(
-                                content="Documentation already generated.",
-                                tool_call_id=tool_call["id"]
-                            )
-                            messages.append(tool_message)
+                            results[tool_call["id"]] = "Documentation already generated."
                             continue
-                        else:
-                            tool_call_tracker[tool_name] = True
+                        tool_call_memo[once_key] = None
                     
-                    print(f"🔧 Calling: {tool_name}")
-                    
-                    if tool_name in self.tools_dict:
-                        # Execute the tool
-                        result = self.tools_dict[tool_name].invoke(tool_args)
-                        
-                        # Display result
-                        if isinstance(result, dict):
-                            msg = result.get('message', result.get('output', str(result)))
-                            print(f"{msg}\n")
-                        else:
-                            print(f"{result}\n")
-                        
-                        # Add tool response to messages
-                        tool_message = ToolMessage(
-                            content=str(result),
-                            tool_call_id=tool_call["id"]
-                        )
-                        messages.append(tool_message)
-                    else:
-                        error_msg = f"❌ Tool {tool_name} not found"
-                        print(f"{error_msg}\n")
-                        tool_message = ToolMessage(
-                            content=error_msg,
-                            tool_call_id=tool_call["id"]
-                        )
-                        messages.append(tool_message)
+                    runnable_calls.append(tool_call)
+                
+                tool_results = await self._execute_tool_calls(runnable_calls, tool_call_memo)
+                
+                for tool_call, result in zip(runnable_calls, tool_results):
+                    # Display result
+                    _, formatter, _ = self._dispatch.get(tool_call["name"], (None, str, str))
+                    logger.info(f"{formatter(result)}\n")
+                    results[tool_call["id"]] = result
+                
+                # Add compact tool responses to messages in the order they were requested
+                for tool_call in response.tool_calls:
+                    _, _, serializer = self._dispatch.get(tool_call["name"], (None, str, str))
+                    tool_message = ToolMessage(
+                        content=serializer(results[tool_call["id"]]),
+                        tool_call_id=tool_call["id"]
+                    )
+                    messages.append(tool_message)
+                
+                if repeated == len(response.tool_calls):
+                    if nudged:
+                        logger.info("\n⚠️  Stopping: the model keeps repeating the same tool calls\n")
+                        break
+                    nudged = True
             
-            # Save chat history (excluding system message)
-            self.chat_history = messages[1:]
+            # Save chat history (excluding system message), bounded in size
+            self.chat_history = await self._compact_history(messages[1:])
                 
         except Exception as e:
-            print(f"\n❌ Error: {str(e)}\n")
+            logger.info(f"\n❌ Error: {str(e)}\n")
+        finally:
+            await self._discard_memo(tool_call_memo)
         
-        print("✨ Done!\n")
+        logger.info("✨ Done!\n")
+        _flush_console()
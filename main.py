@@ -1,10 +1,52 @@
 """Main execution script for AI Git Agent"""
-import os
-from dotenv import load_dotenv
+import asyncio
+import shlex
+import threading
+from concurrent.futures import Future
+from tools.runtime import default_model_id, load_env
+
+# Load environment variables before anything reads them
+load_env()
+
 from agent import AIGitAgent
 
-# Load environment variables
-load_dotenv()
+try:
+    import uvloop
+except ImportError:  # Optional faster event loop
+    uvloop = None
+
+
+def _start_agent(model_id: str) -> Future:
+    """Build the agent in a background thread while the user types"""
+    future = Future()
+    
+    def build():
+        try:
+            future.set_result(AIGitAgent(model_id=model_id))
+        except Exception as e:
+            future.set_exception(e)
+    
+    threading.Thread(target=build, daemon=True).start()
+    return future
+
+
+def _split_commands(command: str) -> list:
+    """Commands separated by ';', leaving semicolons inside quotes alone"""
+    lexer = shlex.shlex(command, posix=False, punctuation_chars=';')
+    lexer.whitespace_split = True
+    lexer.commenters = ''
+    commands, words = [], []
+    try:
+        for token in lexer:
+            if set(token) == {';'}:
+                commands.append(' '.join(words))
+                words = []
+            else:
+                words.append(token)
+    except ValueError:  # Unbalanced quote, e.g. an apostrophe
+        return [c.strip() for c in command.split(';') if c.strip()]
+    commands.append(' '.join(words))
+    return [c for c in commands if c]
 
 
 # Main execution
@@ -15,7 +57,7 @@ if __name__ == "__main__":
     print("="*60)
     
     # Load model ID from .env or use default
-    model_id = os.getenv("HF_MODEL_ID", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
+    model_id = default_model_id()
     
     print(f"\n📦 Using offline model: {model_id}")
     print("⚠️  Note: First run will download the model if not cached")
@@ -26,8 +68,14 @@ if __name__ == "__main__":
     print("   • 'status' - Check repository status")
     print("   • 'generate docs' - Create detailed PDF documentation of changes")
     print("   • Any Git-related request in natural language!")
+    print("   • Separate several commands with ';' to run them in one go")
+    
+    # Model loading overlaps with typing the first command
+    agent_future = _start_agent(model_id)
     
-    agent = AIGitAgent(model_id=model_id)
+    # One event loop for the whole session
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
     
     while True:
         print("\n" + "-"*60)
@@ -35,10 +83,13 @@ if __name__ == "__main__":
         
         if command.lower() in ['exit', 'quit', 'bye']:
             print("\n👋 Goodbye!")
+            loop.close()
             break
         
-        if command:
+        commands = _split_commands(command)
+        if commands:
             try:
-                agent.run(command)
+                agent = agent_future.result()
+                loop.run_until_complete(agent.run_batch(commands))
             except Exception as e:
                 print(f"\n❌ Error: {str(e)}")
@@ -1,23 +1,25 @@
 """Git Tools Package"""
-from .git_command_tools import (
-    git_status,
-    git_add,
-    git_init,
-    git_branch_rename,
-    get_branch_info,
-    diagnose_git_config,
-    get_remote_url,
-    git_remote_add,
-    git_push,
-    validate_git_repository,
-    git_reinitialize
-)
-from .commit_tool import git_commit
-from .documentation_tool import generate_version_documentation
-from .merge_conflict_tool import (
-    resolve_conflicts,
-    get_merge_conflicts
-)
+import importlib
+
+# Tool name -> defining module, imported on first attribute access
+_LAZY = {
+    'git_status': '.git_command_tools',
+    'git_add': '.git_command_tools',
+    'git_init': '.git_command_tools',
+    'git_branch_rename': '.git_command_tools',
+    'get_branch_info': '.git_command_tools',
+    'diagnose_git_config': '.git_command_tools',
+    'get_remote_url': '.git_command_tools',
+    'get_all_repo_info': '.git_command_tools',
+    'git_remote_add': '.git_command_tools',
+    'git_push': '.git_command_tools',
+    'validate_git_repository': '.git_command_tools',
+    'git_reinitialize': '.git_command_tools',
+    'git_commit': '.commit_tool',
+    'generate_version_documentation': '.documentation_tool',
+    'resolve_conflicts': '.merge_conflict_tool',
+    'get_merge_conflicts': '.merge_conflict_tool'
+}
 
 __all__ = [
     'git_status',
@@ -27,6 +29,7 @@ __all__ = [
     'get_branch_info',
     'diagnose_git_config',
     'get_remote_url',
+    'get_all_repo_info',
     'git_remote_add',
     'git_push',
     'git_commit',
@@ -36,3 +39,16 @@ __all__ = [
     'validate_git_repository',
     'git_reinitialize'
 ]
+
+
+def __getattr__(name):
+    """Import a tool's module the first time the tool is requested"""
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
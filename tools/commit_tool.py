@@ -1,49 +1,110 @@
+import asyncio
+import hashlib
 import subprocess
 import os
 import re
-from dotenv import load_dotenv
+import sqlite3
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable
 from langchain_core.tools import tool
-from langchain_huggingface import HuggingFacePipeline
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
-import torch
-
-# Load environment variables
-load_dotenv()
+from .runtime import default_model_id, get_llm, llm_backend, load_env
 
 # Token limits for safety
 MAX_TOKENS_PER_CHUNK = 2000  # Characters per chunk (roughly 500 tokens)
-MAX_TOTAL_CONTEXT = 6000     # Max total context to send to LLM
+MAX_TOTAL_CONTEXT = 6000     # Hard cap in characters on the context sent to LLM
+MAX_TOTAL_TOKENS = 1500      # Estimated token budget for the diff summary
+CHARS_PER_TOKEN = 4          # Average characters per token of a long word
+
+# Runs of whitespace, digits, word characters or punctuation
+_TOKEN_SEGMENT_RE = re.compile(r'\s+|\d+|[^\W\d]\w*|[^\w\s]+')
+
+# On-disk cache of generated messages, keyed by a hash of the diff summary
+MESSAGE_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'autogit', 'commit_msgs.sqlite')
+MESSAGE_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached message is purged
+
+# Patterns used on every diff line, compiled once
+_RE_DEF = re.compile(r'def\s+(\w+)')
+_RE_CLASS = re.compile(r'class\s+(\w+)')
+_RE_JS_FN = re.compile(r'function\s+(\w+)')
+_RE_CONST = re.compile(r'const\s+(\w+)')
+_RE_BFILE = re.compile(rb'b/(.+)$')
+_RE_IMPORT = re.compile(r'import\s+(\w+)|from\s+([\w.]+)')
+# Snippets kept per file, extraction stops once a budget is full
+MAX_ADDED_SNIPPETS = 6
+MAX_REMOVED_SNIPPETS = 3
+
+# Past this many changed lines the rest of the diff is only counted, no snippets
+MAX_DETAILED_LINES = 10000
+
+# Diff line kind by first byte: one table lookup instead of a startswith chain
+_KIND_OTHER, _KIND_HEADER, _KIND_ADD, _KIND_DEL, _KIND_BINARY = range(5)
+_LINE_KIND = bytearray(256)
+_LINE_KIND[ord('d')] = _KIND_HEADER
+_LINE_KIND[ord('+')] = _KIND_ADD
+_LINE_KIND[ord('-')] = _KIND_DEL
+_LINE_KIND[ord('B')] = _KIND_BINARY
+_LINE_KIND[ord('G')] = _KIND_BINARY
+
+# Cheap pre-checks on the raw bytes after the +/- marker: at least 6 characters
+# once leading whitespace is skipped, and a keyword the snippet extraction looks for.
+# Lines they reject could never produce a snippet, so they are never decoded.
+_INTERESTING_ADD = re.compile(
+    rb'\s*(?!#)(?=\S.{5})(?=.*?(?:def |class |function |import |from |require|=|return |if |else|raise |throw ))'
+)
+_INTERESTING_DEL = re.compile(rb'\s*(?=\S.{5})(?=.*?(?:def |class |function |const ))')
+
+# File headers of a newline-prefixed raw diff, for counting huge diffs in bulk
+_RE_SECTION = re.compile(rb'\ndiff --git[^\n]*')
+
+# Keyword groups checked on added lines, built once instead of per line
+_IMPORT_KEYWORDS = ('import ', 'from ', 'require')
+_LOGIC_KEYWORDS = ('=', 'return ', 'if ', 'else', 'raise ', 'throw ')
+# Intent keywords found in one pass; the lookahead reports overlapping hits too
+_INTENT_RE = re.compile(r'(?=(def |function |class |import|require|return|if |fix|bug|error|issue))')
+
+
+# Generated/vendored paths left out of commit message generation
+_IGNORE_PATTERNS = [
+    'pycache', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class', '.o',
+    'node_modules', '.git/', 'package-lock.json', 'yarn.lock', '.DS_Store',
+    '.lock', 'dist/', 'build/', '_pycache_', '.egg-info'
+]
+_IGNORE_RE = re.compile('|'.join(re.escape(p) for p in _IGNORE_PATTERNS))
+# Binary formats, their content says nothing useful for a commit message
+_IGNORE_EXTENSIONS = (
+    '.png', '.jpg', '.jpeg', '.gif', '.ico', '.pdf', '.zip', '.gz',
+    '.pkl', '.parquet', '.wasm', '.bin'
+)
 
 
 def _should_ignore_file(filepath: str) -> bool:
     """Check if file should be ignored for commit message generation."""
-    ignore_patterns = [
-        'pycache', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class', '.o',
-        'node_modules', '.git/', 'package-lock.json', 'yarn.lock', '.DS_Store',
-        '.lock', 'dist/', 'build/', '_pycache_', '.egg-info'
-    ]
-    return any(pattern in filepath for pattern in ignore_patterns)
+    return filepath.lower().endswith(_IGNORE_EXTENSIONS) or _IGNORE_RE.search(filepath) is not None
 
 
+@lru_cache(maxsize=4096)
 def _extract_function_class_names(code_line: str) -> str:
     """Extract function or class names from code for better context."""
     # Python function/class
     if 'def ' in code_line:
-        match = re.search(r'def\s+(\w+)', code_line)
+        match = _RE_DEF.search(code_line)
         if match:
             return f"function '{match.group(1)}'"
     if 'class ' in code_line:
-        match = re.search(r'class\s+(\w+)', code_line)
+        match = _RE_CLASS.search(code_line)
         if match:
             return f"class '{match.group(1)}'"
     
     # JavaScript/TypeScript function
     if 'function ' in code_line:
-        match = re.search(r'function\s+(\w+)', code_line)
+        match = _RE_JS_FN.search(code_line)
         if match:
             return f"function '{match.group(1)}'"
     if 'const ' in code_line and ('=>' in code_line or '= function' in code_line):
-        match = re.search(r'const\s+(\w+)', code_line)
+        match = _RE_CONST.search(code_line)
         if match:
             return f"function '{match.group(1)}'"
     
@@ -52,9 +113,6 @@ def _extract_function_class_names(code_line: str) -> str:
 
 def _analyze_change_intent(snippets: list, adds: int, dels: int, filepath: str) -> str:
     """Analyze what kind of change this represents based on code patterns."""
-    snippet_text = ' '.join(snippets).lower()
-    filename = os.path.basename(filepath).lower()
-    
     # Check for specific patterns
     if adds > 0 and dels == 0:
         if adds > 20:
@@ -64,11 +122,19 @@ def _analyze_change_intent(snippets: list, adds: int, dels: int, filepath: str)
     if dels > 0 and adds == 0:
         return "deletions"
     
+    # Scan snippets one by one, a dependency keyword already decides the intent
+    hits = set()
+    for snippet in snippets:
+        hits.update(m.group(1) for m in _INTENT_RE.finditer(snippet.lower()))
+        if 'import' in hits or 'require' in hits:
+            break
+    filename = os.path.basename(filepath).lower()
+    
     # Analyze content
-    if 'import' in snippet_text or 'require' in snippet_text:
+    if 'import' in hits or 'require' in hits:
         return "dependency changes"
     
-    if 'def ' in snippet_text or 'function ' in snippet_text or 'class ' in snippet_text:
+    if 'def ' in hits or 'function ' in hits or 'class ' in hits:
         if adds > dels * 2:
             return "added functions/classes"
         elif dels > adds * 2:
@@ -82,10 +148,10 @@ def _analyze_change_intent(snippets: list, adds: int, dels: int, filepath: str)
     if 'readme' in filename or '.md' in filename:
         return "documentation"
     
-    if any(word in snippet_text for word in ['fix', 'bug', 'error', 'issue']):
+    if not hits.isdisjoint(('fix', 'bug', 'error', 'issue')):
         return "bug fix"
     
-    if 'return' in snippet_text or 'if ' in snippet_text:
+    if 'return' in hits or 'if ' in hits:
         return "logic changes"
     
     # Default based on ratio
@@ -97,108 +163,213 @@ def _analyze_change_intent(snippets: list, adds: int, dels: int, filepath: str)
         return "modifications"
 
 
-def _parse_git_diff_summary(diff_output: str) -> dict:
-    """Parse git diff with intelligent extraction."""
+@dataclass(slots=True)
+class FileChange:
+    """Summary record for one file of the diff."""
+    file: str
+    basename: str
+    additions: int
+    deletions: int
+    total_changes: int
+    added_snippets: list
+    removed_snippets: list
+    change_intent: str
+    file_type: str
+
+
+def _file_entry(filepath: str, additions: int, deletions: int,
+                added_snippets: deque, removed_snippets: deque) -> FileChange:
+    """Build the summary record for one file of the diff."""
+    added_snippets = list(added_snippets)
+    removed_snippets = list(removed_snippets)
+    return FileChange(
+        file=filepath,
+        basename=os.path.basename(filepath),
+        additions=additions,
+        deletions=deletions,
+        total_changes=additions + deletions,
+        added_snippets=added_snippets,
+        removed_snippets=removed_snippets,
+        change_intent=_analyze_change_intent(
+            added_snippets + removed_snippets,
+            additions,
+            deletions,
+            filepath
+        ),
+        file_type=_get_file_type(filepath)
+    )
+
+
+def _count_diff_sections(diff_bytes: bytes) -> tuple:
+    """Count changed lines per file of a raw diff, without extracting snippets.
+    
+    Returns the file records and the number of file headers seen.
+    """
+    diff_bytes = b'\n' + diff_bytes
+    headers = list(_RE_SECTION.finditer(diff_bytes))
+    files_changed = []
+    
+    for index, header in enumerate(headers):
+        match = _RE_BFILE.search(header.group())
+        if not match:
+            continue
+        filepath = match.group(1).decode('utf-8', 'ignore')
+        if _should_ignore_file(filepath):
+            continue
+        
+        start = header.end()
+        end = headers[index + 1].start() if index + 1 < len(headers) else len(diff_bytes)
+        if (diff_bytes.find(b'\nBinary files ', start, end) != -1
+                or diff_bytes.find(b'\nGIT binary patch', start, end) != -1):
+            continue
+        
+        # Line-start markers, minus the ---/+++ file header lines
+        count = diff_bytes.count
+        files_changed.append(_file_entry(
+            filepath,
+            count(b'\n+', start, end) - count(b'\n+++', start, end),
+            count(b'\n-', start, end) - count(b'\n---', start, end),
+            (),
+            ()
+        ))
+    
+    return files_changed, len(headers)
+
+
+def _parse_git_diff_summary(lines: Iterable[bytes]) -> dict:
+    """Parse raw git diff lines with intelligent extraction, streaming them one at a time.
+    
+    Lines stay bytes, only snippet candidates are decoded.
+    """
     files_changed = []
     current_file = None
     additions = 0
     deletions = 0
-    added_snippets = []
-    removed_snippets = []
-    
-    lines = diff_output.split('\n')
+    added_snippets = deque(maxlen=MAX_ADDED_SNIPPETS)
+    removed_snippets = deque(maxlen=MAX_REMOVED_SNIPPETS)
+    # Ignore check runs once per file header, not once per line
+    current_ignored = True
+    # Every file in the diff, ignored ones included
+    headers_seen = 0
+    # Changed lines of the files parsed in detail so far
+    detailed_lines = 0
+    # Hot-loop lookups bound to locals
+    extract_names = _extract_function_class_names
+    search_import = _RE_IMPORT.search
+    interesting_add = _INTERESTING_ADD.match
+    interesting_del = _INTERESTING_DEL.match
+    line_kind = _LINE_KIND
     
     for line in lines:
-        if line.startswith('diff --git'):
+        # The first byte decides the line kind
+        kind = line_kind[line[0]] if line else _KIND_OTHER
+        if kind == _KIND_OTHER:
+            continue
+        
+        if kind == _KIND_HEADER:
+            if not line.startswith(b'diff --git'):
+                continue
             # Save previous file
-            if current_file and not _should_ignore_file(current_file):
-                change_intent = _analyze_change_intent(
-                    added_snippets + removed_snippets, 
-                    additions, 
-                    deletions,
-                    current_file
-                )
-                
-                files_changed.append({
-                    'file': current_file,
-                    'basename': os.path.basename(current_file),
-                    'additions': additions,
-                    'deletions': deletions,
-                    'total_changes': additions + deletions,
-                    'added_snippets': added_snippets[:6],
-                    'removed_snippets': removed_snippets[:3],
-                    'change_intent': change_intent,
-                    'file_type': _get_file_type(current_file)
-                })
+            if current_file and not current_ignored:
+                files_changed.append(_file_entry(
+                    current_file, additions, deletions, added_snippets, removed_snippets
+                ))
+                detailed_lines += additions + deletions
+            
+            # Huge diff: the remaining files are only counted, in the regex engine
+            if detailed_lines > MAX_DETAILED_LINES and hasattr(lines, 'read'):
+                counted, headers = _count_diff_sections(line + lines.read())
+                files_changed.extend(counted)
+                headers_seen += headers
+                current_file = None
+                break
             
+            headers_seen += 1
             # New file
-            match = re.search(r'b/(.+)$', line)
+            match = _RE_BFILE.search(line)
             if match:
-                current_file = match.group(1)
+                current_file = match.group(1).decode('utf-8', 'ignore')
+                current_ignored = _should_ignore_file(current_file)
                 additions = 0
                 deletions = 0
-                added_snippets = []
-                removed_snippets = []
+                added_snippets = deque(maxlen=MAX_ADDED_SNIPPETS)
+                removed_snippets = deque(maxlen=MAX_REMOVED_SNIPPETS)
+            continue
         
-        elif current_file and not _should_ignore_file(current_file):
-            # Added lines
-            if line.startswith('+') and not line.startswith('+++'):
-                additions += 1
-                stripped = line[1:].strip()
-                
-                if stripped and len(stripped) > 5 and not stripped.startswith('#'):
-                    # Extract function/class names
-                    func_class_name = _extract_function_class_names(stripped)
-                    if func_class_name:
-                        added_snippets.append(f"➕ {func_class_name}")
-                    elif any(kw in stripped for kw in ['import ', 'from ', 'require']):
-                        # Track imports briefly
-                        match = re.search(r'import\s+(\w+)|from\s+([\w.]+)', stripped)
-                        if match:
-                            module = match.group(1) or match.group(2)
-                            added_snippets.append(f"Import {module}")
-                    elif len(stripped) < 80 and any(kw in stripped for kw in ['=', 'return ', 'if ', 'else', 'raise ', 'throw ']):
-                        added_snippets.append(stripped[:70])
+        if current_ignored or not current_file:
+            continue
+        
+        # Binary section: treat the file as ignored until the next header
+        if kind == _KIND_BINARY:
+            if line.startswith((b'Binary files ', b'GIT binary patch')):
+                current_ignored = True
+            continue
+        
+        # Added lines
+        if kind == _KIND_ADD:
+            if line[:3] == b'+++':
+                continue
+            additions += 1
+            # Snippet budget spent, or nothing worth a snippet on this line
+            if len(added_snippets) == MAX_ADDED_SNIPPETS or not interesting_add(line, 1):
+                continue
+            stripped = line[1:].decode('utf-8', 'ignore').strip()
             
-            # Removed lines
-            elif line.startswith('-') and not line.startswith('---'):
-                deletions += 1
-                stripped = line[1:].strip()
-                
-                if stripped and len(stripped) > 5:
-                    func_class_name = _extract_function_class_names(stripped)
-                    if func_class_name:
-                        removed_snippets.append(f"➖ {func_class_name}")
+            if len(stripped) > 5 and not stripped.startswith('#'):
+                # Extract function/class names
+                func_class_name = extract_names(stripped)
+                if func_class_name:
+                    added_snippets.append(f"➕ {func_class_name}")
+                elif any(kw in stripped for kw in _IMPORT_KEYWORDS):
+                    # Track imports briefly
+                    match = search_import(stripped)
+                    if match:
+                        module = match.group(1) or match.group(2)
+                        added_snippets.append(f"Import {module}")
+                elif len(stripped) < 80 and any(kw in stripped for kw in _LOGIC_KEYWORDS):
+                    added_snippets.append(stripped[:70])
+        
+        # Removed lines
+        elif kind == _KIND_DEL:
+            if line[:3] == b'---':
+                continue
+            deletions += 1
+            if len(removed_snippets) == MAX_REMOVED_SNIPPETS or not interesting_del(line, 1):
+                continue
+            stripped = line[1:].decode('utf-8', 'ignore').strip()
+            
+            if len(stripped) > 5:
+                func_class_name = extract_names(stripped)
+                if func_class_name:
+                    removed_snippets.append(f"➖ {func_class_name}")
     
     # Save last file
-    if current_file and not _should_ignore_file(current_file):
-        change_intent = _analyze_change_intent(
-            added_snippets + removed_snippets, 
-            additions, 
-            deletions,
-            current_file
-        )
-        
-        files_changed.append({
-            'file': current_file,
-            'basename': os.path.basename(current_file),
-            'additions': additions,
-            'deletions': deletions,
-            'total_changes': additions + deletions,
-            'added_snippets': added_snippets[:6],
-            'removed_snippets': removed_snippets[:3],
-            'change_intent': change_intent,
-            'file_type': _get_file_type(current_file)
-        })
+    if current_file and not current_ignored:
+        files_changed.append(_file_entry(
+            current_file, additions, deletions, added_snippets, removed_snippets
+        ))
     
     return {
         'total_files': len(files_changed),
+        'diffed_files': headers_seen,
         'files': files_changed,
-        'total_additions': sum(f['additions'] for f in files_changed),
-        'total_deletions': sum(f['deletions'] for f in files_changed)
+        'total_additions': sum(f.additions for f in files_changed),
+        'total_deletions': sum(f.deletions for f in files_changed)
     }
 
 
+def _stream_diff_summary(cached: bool) -> dict:
+    """Run git diff once and parse its raw output while git is still writing it."""
+    # --no-optional-locks: a read-only diff should not refresh and lock the index
+    diff_cmd = ['git', '--no-optional-locks', 'diff'] + (['--cached'] if cached else [])
+    proc = subprocess.Popen(diff_cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    with proc.stdout:
+        diff_summary = _parse_git_diff_summary(proc.stdout)
+    proc.wait()
+    return diff_summary
+
+
+@lru_cache(maxsize=4096)
 def _get_file_type(filepath: str) -> str:
     """Determine file type/category."""
     filepath_lower = filepath.lower()
@@ -221,38 +392,49 @@ def _get_file_type(filepath: str) -> str:
         return 'other'
 
 
-def _prioritize_files(files: list) -> dict:
-    """Categorize files by importance for intelligent processing."""
-    critical = []    # >100 changes
-    important = []   # 20-100 changes
-    moderate = []    # 5-20 changes
-    minor = []       # <5 changes
-    
-    for file_info in files:
-        total = file_info['total_changes']
-        if total > 100:
-            critical.append(file_info)
-        elif total >= 20:
-            important.append(file_info)
-        elif total >= 5:
-            moderate.append(file_info)
+def _estimate_tokens(text: str) -> int:
+    """Estimate LLM tokens in one pass over character-class runs."""
+    tokens = 0
+    for match in _TOKEN_SEGMENT_RE.finditer(text):
+        segment = match.group()
+        first = segment[0]
+        if first.isspace():
+            continue
+        length = len(segment)
+        if first.isdigit() or length <= 3:
+            tokens += 1
+        elif first.isalnum() or first == '_':
+            tokens += -(-length // CHARS_PER_TOKEN)
         else:
-            minor.append(file_info)
-    
-    return {
-        'critical': critical,
-        'important': important,
-        'moderate': moderate,
-        'minor': minor
-    }
+            tokens += -(-length // 2)
+    return tokens
+
+
+# Section heading for each priority tier, highest first
+_TIER_HEADINGS = {
+    'critical': "\n🔥 CRITICAL CHANGES (>100 lines):",
+    'important': "\n📌 IMPORTANT CHANGES (20-100 lines):",
+    'moderate': "\n📝 MODERATE CHANGES (5-20 lines):"
+}
+
+
+def _priority_tier(total_changes: int) -> str:
+    """Importance tier of a file by its number of changed lines."""
+    if total_changes > 100:
+        return 'critical'
+    if total_changes >= 20:
+        return 'important'
+    if total_changes >= 5:
+        return 'moderate'
+    return 'minor'
 
 
-def _create_file_summary(file_info: dict, detail_level: str = 'full') -> str:
+def _create_file_summary(file_info: FileChange, detail_level: str = 'full') -> str:
     """Create summary for a single file with variable detail level."""
-    basename = file_info['basename']
-    intent = file_info['change_intent']
-    adds = file_info['additions']
-    dels = file_info['deletions']
+    basename = file_info.basename
+    intent = file_info.change_intent
+    adds = file_info.additions
+    dels = file_info.deletions
     
     if detail_level == 'minimal':
         # Just filename and stats
@@ -262,8 +444,8 @@ def _create_file_summary(file_info: dict, detail_level: str = 'full') -> str:
     
     if detail_level == 'full':
         # Include snippets
-        added = file_info.get('added_snippets', [])
-        removed = file_info.get('removed_snippets', [])
+        added = file_info.added_snippets
+        removed = file_info.removed_snippets
         
         if added:
             parts.append("  Changes:")
@@ -278,57 +460,46 @@ def _create_file_summary(file_info: dict, detail_level: str = 'full') -> str:
 
 
 def _create_chunked_summary(diff_summary: dict) -> str:
-    """Create intelligent summary that respects token limits."""
-    prioritized = _prioritize_files(diff_summary['files'])
+    """Create intelligent summary that respects token limits.
+    
+    Files are walked once, largest first, until the context budget runs out.
+    """
+    files_sorted = sorted(diff_summary['files'], key=lambda f: f.total_changes, reverse=True)
     
     summary_parts = []
-    current_size = 0
+    current_tokens = 0
     
     # Header (always include)
     header = f"📊 CHANGES: {diff_summary['total_files']} files | +{diff_summary['total_additions']} -{diff_summary['total_deletions']} lines\n"
     summary_parts.append(header)
-    current_size += len(header)
-    
-    # Process critical files first (full detail)
-    if prioritized['critical']:
-        summary_parts.append("\n🔥 CRITICAL CHANGES (>30 lines):")
-        for file_info in prioritized['critical']:
-            file_summary = _create_file_summary(file_info, 'full')
-            if current_size + len(file_summary) < MAX_TOTAL_CONTEXT:
-                summary_parts.append(file_summary)
-                current_size += len(file_summary)
-            else:
-                # Token limit reached, use minimal
-                file_summary = _create_file_summary(file_info, 'minimal')
-                summary_parts.append(file_summary)
-                current_size += len(file_summary)
-    
-    # Important files (medium detail)
-    if prioritized['important']:
-        summary_parts.append("\n📌 IMPORTANT CHANGES (20-100 lines):")
-        for file_info in prioritized['important'][:10]:  # Max 10 important files
-            detail = 'full' if current_size < MAX_TOTAL_CONTEXT * 0.6 else 'minimal'
-            file_summary = _create_file_summary(file_info, detail)
-            if current_size + len(file_summary) < MAX_TOTAL_CONTEXT:
-                summary_parts.append(file_summary)
-                current_size += len(file_summary)
-    
-    # Moderate files (minimal detail)
-    if prioritized['moderate']:
-        summary_parts.append(f"\n📝 MODERATE CHANGES: {len(prioritized['moderate'])} files (5-20 lines each)")
-        for file_info in prioritized['moderate'][:5]:  # Show first 5
-            if current_size < MAX_TOTAL_CONTEXT * 0.8:
-                file_summary = _create_file_summary(file_info, 'minimal')
-                summary_parts.append(file_summary)
-                current_size += len(file_summary)
-    
-    # Minor files (just count)
-    if prioritized['minor']:
-        summary_parts.append(f"\n✨ MINOR CHANGES: {len(prioritized['minor'])} files (<5 lines each)")
-        # List just the names
-        if current_size < MAX_TOTAL_CONTEXT * 0.9:
-            names = [f['basename'] for f in prioritized['minor'][:10]]
-            summary_parts.append(f"  Files: {', '.join(names)}")
+    current_tokens += _estimate_tokens(header)
+    
+    shown = 0
+    current_tier = None
+    for file_info in files_sorted:
+        tier = _priority_tier(file_info.total_changes)
+        if tier == 'minor':
+            break
+        
+        # Full detail for big files while the budget is fresh, stats only after that
+        detail = 'full' if tier != 'moderate' and current_tokens < MAX_TOTAL_TOKENS * 0.5 else 'minimal'
+        file_summary = _create_file_summary(file_info, detail)
+        if tier != current_tier:
+            file_summary = f"{_TIER_HEADINGS[tier]}\n{file_summary}"
+        summary_tokens = _estimate_tokens(file_summary)
+        if current_tokens + summary_tokens > MAX_TOTAL_TOKENS * 0.9:
+            break
+        
+        summary_parts.append(file_summary)
+        current_tokens += summary_tokens
+        current_tier = tier
+        shown += 1
+    
+    # Whatever did not fit, or changed only a few lines: just names
+    rest = files_sorted[shown:]
+    if rest:
+        names = ', '.join(f.basename for f in rest[:10])
+        summary_parts.append(f"\n✨ OTHER CHANGES: {len(rest)} files\n  Files: {names}")
     
     result = '\n'.join(summary_parts)
     
@@ -339,29 +510,86 @@ def _create_chunked_summary(diff_summary: dict) -> str:
     return result
 
 
-def _generate_commit_with_llm(structured_context: str, total_files: int) -> str:
-    """Generate commit message using LLM with the structured context."""
+async def _stream_first_line(llm, prompt: str) -> str:
+    """Stream the completion until its first non-empty line is complete, a shortcut where stop strings are not honored."""
+    text = ""
+    async for chunk in llm.astream(prompt):
+        # Pipeline LLMs stream text, chat models stream message chunks
+        text += getattr(chunk, 'content', chunk)
+        if '\n' in text.lstrip():
+            break
+    return text
+
+
+@lru_cache(maxsize=64)
+def _complete(prompt: str) -> str:
+    """Run the shared commit-message LLM, identical prompts are answered from memory.
+    
+    Decoding is sampled, so the first draw for a prompt is kept for the rest of the
+    process. Only the first line is used: the newline stop ends generation there
+    instead of at max_new_tokens, and the stream is left early on backends that
+    ignore it.
+    """
+    # .env is only needed once a model is actually used
+    load_env()
+    llm = get_llm(default_model_id(), max_new_tokens=100, temperature=0.2, stop=("\n",))
+    return asyncio.run(_stream_first_line(llm, prompt))
+
+
+@lru_cache(maxsize=None)
+def _message_cache():
+    """Open the on-disk message cache once per process and purge expired entries.
+    
+    Returns None when the cache cannot be used, generation then just goes uncached.
+    """
     try:
-        model_id = os.getenv("HF_MODEL_ID", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
-        tokenizer = AutoTokenizer.from_pretrained(model_id)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_id,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None,
-            low_cpu_mem_usage=True
-        )
-        pipe = pipeline(
-            "text-generation",
-            model=model,
-            tokenizer=tokenizer,
-            max_new_tokens=100,
-            temperature=0.2,
-            top_k=50,
-            do_sample=True
+        os.makedirs(os.path.dirname(MESSAGE_CACHE_PATH), exist_ok=True)
+        # Tools may run on worker threads; calls are never concurrent
+        conn = sqlite3.connect(MESSAGE_CACHE_PATH, check_same_thread=False)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS messages '
+            '(key TEXT PRIMARY KEY, message TEXT NOT NULL, created_at REAL NOT NULL)'
         )
-        llm = HuggingFacePipeline(pipeline=pipe)
-        
-        prompt = f"""You are a Git commit expert. Analyze ALL changes below and create commit message.
+        conn.execute('DELETE FROM messages WHERE created_at < ?', (time.time() - MESSAGE_CACHE_TTL,))
+        conn.commit()
+        return conn
+    except sqlite3.Error:
+        return None
+
+
+@lru_cache(maxsize=64)
+def _cached_message(key: str):
+    """Message stored for a diff fingerprint, with an in-memory front for repeats"""
+    conn = _message_cache()
+    if conn is None:
+        return None
+    try:
+        row = conn.execute('SELECT message FROM messages WHERE key = ?', (key,)).fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def _store_message(key: str, message: str):
+    """Remember the message generated for a diff fingerprint"""
+    conn = _message_cache()
+    if conn is None:
+        return
+    try:
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO messages (key, message, created_at) VALUES (?, ?, ?)',
+                (key, message, time.time())
+            )
+    except sqlite3.Error:
+        return
+    # A miss may already be remembered in memory
+    _cached_message.cache_clear()
+
+
+def _generate_commit_with_llm(structured_context: str, total_files: int) -> str:
+    """Generate commit message using LLM with the structured context."""
+    prompt = f"""You are a Git commit expert. Analyze ALL changes below and create commit message.
 
 {structured_context}
 
@@ -386,12 +614,24 @@ Examples:
 - feat: improve code
 - refactor: enhance functionality
 
-Your commit message (one line):"""
-        
-        response = llm.invoke(prompt)
+Your commit message (one line):
+"""
+    
+    # Same prompt to the same model, same message: skip the model entirely.
+    # The model and backend come from .env, so it is loaded before the key is built
+    load_env()
+    fingerprint = '\0'.join((llm_backend(), default_model_id(), prompt))
+    key = hashlib.blake2b(fingerprint.encode(), digest_size=16).hexdigest()
+    cached = _cached_message(key)
+    if cached:
+        print("🎯 cache hit")
+        return cached
+    
+    try:
+        content = _complete(prompt)
         
-        if response.content:
-            message = response.content.strip()
+        if content:
+            message = content.strip()
             # Clean up
             message = message.split('\n')[0].strip('"').strip("'").strip()
             
@@ -404,6 +644,7 @@ Your commit message (one line):"""
                 # Return None to trigger fallback
                 return None
             
+            _store_message(key, message)
             return message
         
         return None
@@ -420,17 +661,18 @@ def _create_fallback_message(diff_summary: dict) -> str:
     
     if total_files == 1:
         file_info = files[0]
-        intent = file_info['change_intent']
-        basename = file_info['basename'].replace('.py', '').replace('.js', '')
+        intent = file_info.change_intent
+        basename = file_info.basename.replace('.py', '').replace('.js', '')
         return f"refactor({basename}): {intent}"
     
-    # Find most common file type
-    file_types = [f['file_type'] for f in files]
-    most_common_type = max(set(file_types), key=file_types.count)
-    
-    # Find most common intent
-    intents = [f['change_intent'] for f in files]
-    most_common_intent = max(set(intents), key=intents.count)
+    # Find most common file type and intent in one pass
+    file_types = Counter()
+    intents = Counter()
+    for f in files:
+        file_types[f.file_type] += 1
+        intents[f.change_intent] += 1
+    most_common_type = file_types.most_common(1)[0][0]
+    most_common_intent = intents.most_common(1)[0][0]
     
     if most_common_type == 'docs':
         return f"docs: Update documentation across {total_files} files"
@@ -454,54 +696,36 @@ def git_commit(message: str = "auto") -> dict:
     """
     if message.lower() == "auto":
         try:
+            print("🔍 Analyzing git diff...\n")
+            
             # Get staged changes first
-            diff_result = subprocess.run(
-                ['git', 'diff', '--cached'], 
-                capture_output=True, 
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
+            diff_summary = _stream_diff_summary(cached=True)
             
             # If no staged changes, check unstaged
-            if not diff_result.stdout.strip():
+            if not diff_summary['diffed_files']:
                 print("🔍 No staged changes, checking unstaged...")
-                diff_result = subprocess.run(
-                    ['git', 'diff'], 
-                    capture_output=True, 
-                    text=True,
-                    encoding='utf-8',
-                    errors='ignore'
-                )
-            
-            git_diff_output = diff_result.stdout.strip()
-            
-            if not git_diff_output:
-                return {
-                    "status": "error", 
-                    "message": "❌ No changes detected\n💡 Make changes or run 'git add <files>' first"
-                }
-            
-            print(f"🔍 Analyzing {len(git_diff_output):,} characters of git diff...\n")
-            
-            # Parse diff with intelligent extraction
-            diff_summary = _parse_git_diff_summary(git_diff_output)
+                diff_summary = _stream_diff_summary(cached=False)
+                if not diff_summary['diffed_files']:
+                    return {
+                        "status": "error", 
+                        "message": "❌ No changes detected\n💡 Make changes or run 'git add <files>' first"
+                    }
             
             print(f"📊 Detected changes in {diff_summary['total_files']} file(s):")
             print(f"   Total: +{diff_summary['total_additions']} -{diff_summary['total_deletions']} lines\n")
             
-            # Prioritize files
-            prioritized = _prioritize_files(diff_summary['files'])
+            # Priority breakdown in one pass
+            tiers = Counter(_priority_tier(f.total_changes) for f in diff_summary['files'])
             print(f"🎯 Priority breakdown:")
-            print(f"   🔥 Critical (>100 lines): {len(prioritized['critical'])} files")
-            print(f"   📌 Important (20-100): {len(prioritized['important'])} files")
-            print(f"   📝 Moderate (5-20): {len(prioritized['moderate'])} files")
-            print(f"   ✨ Minor (<5): {len(prioritized['minor'])} files\n")
+            print(f"   🔥 Critical (>100 lines): {tiers['critical']} files")
+            print(f"   📌 Important (20-100): {tiers['important']} files")
+            print(f"   📝 Moderate (5-20): {tiers['moderate']} files")
+            print(f"   ✨ Minor (<5): {tiers['minor']} files\n")
             
             # Create intelligent summary with token management
             structured_context = _create_chunked_summary(diff_summary)
             
-            print(f"📦 Context size: {len(structured_context):,} chars (limit: {MAX_TOTAL_CONTEXT:,})")
+            print(f"📦 Context size: ~{_estimate_tokens(structured_context):,} tokens (limit: {MAX_TOTAL_TOKENS:,})")
             print(f"✅ Context fits within token limits!\n")
             
             # Show what LLM will see (first 400 chars)
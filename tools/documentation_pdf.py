@@ -0,0 +1,234 @@
+"""Documentation PDF - reportlab Rendering of the Generated Analysis"""
+import os
+import re
+from datetime import datetime
+from io import BytesIO
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_LEFT, TA_CENTER
+
+# Paragraph markup escaping, done by str.translate in one pass
+_HTML_TBL = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+# Blank-line paragraph breaks of the section bodies
+_PARA_SPLIT = re.compile(r'\n{2,}')
+
+# Styles, built once when the module is first imported
+_styles = getSampleStyleSheet()
+
+# Custom styles
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_styles['Heading1'],
+    fontSize=28,
+    textColor=colors.HexColor('#1a237e'),
+    spaceAfter=12,
+    alignment=TA_CENTER,
+    fontName='Helvetica-Bold'
+)
+
+_HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_styles['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#0d47a1'),
+    spaceAfter=10,
+    spaceBefore=16,
+    fontName='Helvetica-Bold',
+    borderWidth=0,
+    borderColor=colors.HexColor('#0d47a1'),
+    borderPadding=5,
+    backColor=colors.HexColor('#e3f2fd')
+)
+
+_BODY_STYLE = ParagraphStyle(
+    'CustomBody',
+    parent=_styles['BodyText'],
+    fontSize=11,
+    leading=16,
+    spaceAfter=10,
+    alignment=TA_LEFT,
+    fontName='Helvetica',
+    textColor=colors.HexColor('#212121')
+)
+
+# Table layouts are shared by every report: the same widths and TableStyle instances
+_INFO_TABLE_WIDTHS = (2*inch, 4*inch)
+_INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e3f2fd')),
+    ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#0d47a1')),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 11),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#90caf9')),
+    ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+
+_FILES_TABLE_WIDTHS = (0.4*inch, 1.1*inch, 3.3*inch, 1.2*inch)
+_FILES_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d47a1')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
+    ('TOPPADDING', (0, 0), (-1, -1), 6),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+
+def _write_file(path: str, data: memoryview):
+    """Write a rendered file with raw os.write calls, no Python file object in between."""
+    # O_BINARY keeps Windows from translating newlines inside the PDF
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+def _section_flowables(text: str):
+    """Yield each paragraph of a section body, escaped, with its spacer."""
+    for para in _PARA_SPLIT.split(text):
+        para = para.strip()
+        if para:
+            yield Paragraph(para.translate(_HTML_TBL), _BODY_STYLE)
+            yield Spacer(1, 0.12*inch)
+
+
+def _iter_story(analysis_data: dict, diff_summary: dict, prioritized: dict,
+                repo_name: str, current_branch: str, diff_type: str):
+    """Yield the PDF flowables in page order."""
+    # Title Page
+    yield Spacer(1, 1.5*inch)
+    yield Paragraph("📚 Version Control", _TITLE_STYLE)
+    yield Paragraph("Documentation Report", _TITLE_STYLE)
+    yield Spacer(1, 0.5*inch)
+    
+    # Info table
+    info_data = [
+        ['Repository:', repo_name],
+        ['Branch:', current_branch],
+        ['Analysis Type:', diff_type.title()],
+        ['Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
+        ['Files Changed:', str(diff_summary['total_files'])],
+        ['Lines Added:', f"+{diff_summary['total_additions']}"],
+        ['Lines Deleted:', f"-{diff_summary['total_deletions']}"]
+    ]
+    
+    info_table = Table(info_data, colWidths=_INFO_TABLE_WIDTHS, style=_INFO_TABLE_STYLE)
+    
+    yield info_table
+    yield PageBreak()
+    
+    # Table of Contents
+    yield Paragraph("📋 Table of Contents", _HEADING_STYLE)
+    yield Spacer(1, 0.2*inch)
+    toc_items = [
+        "1. Executive Summary",
+        "2. Files Changed",
+        "3. Detailed Changes Analysis",
+        "4. Technical Implementation",
+        "5. Business Impact",
+        "6. Future Recommendations"
+    ]
+    for item in toc_items:
+        yield Paragraph(f"   {item}", _BODY_STYLE)
+    yield PageBreak()
+    
+    # 1. Executive Summary
+    yield Paragraph("1. 📊 Executive Summary", _HEADING_STYLE)
+    yield Spacer(1, 0.15*inch)
+    if analysis_data.get("summary"):
+        yield from _section_flowables(analysis_data["summary"])
+    else:
+        yield Paragraph("This document provides a comprehensive overview of the recent changes made to the codebase.", _BODY_STYLE)
+    yield Spacer(1, 0.4*inch)
+    
+    # 2. Changed Files Summary
+    yield Paragraph("2. 📁 Files Changed", _HEADING_STYLE)
+    yield Spacer(1, 0.15*inch)
+    
+    # Prepare files for table (using diff_summary structure)
+    if diff_summary['files']:
+        # Critical and important files in full, then the first moderate ones
+        tiers = (
+            ('🔥 Critical', prioritized['critical']),
+            ('📌 Important', prioritized['important']),
+            ('📝 Moderate', prioritized['moderate'][:10])
+        )
+        files_data = [['#', 'Priority', 'File Path', 'Changes']]
+        files_data.extend(
+            [str(idx), label, file_info.file, f"+{file_info.additions}/-{file_info.deletions}"]
+            for idx, (label, file_info) in enumerate(
+                ((label, file_info) for label, tier in tiers for file_info in tier), 1
+            )
+        )
+        
+        files_table = Table(files_data, colWidths=_FILES_TABLE_WIDTHS, style=_FILES_TABLE_STYLE)
+        yield files_table
+        
+        # Add summary of remaining files
+        total_shown = len(files_data) - 1
+        remaining = diff_summary['total_files'] - total_shown
+        
+        if remaining > 0:
+            yield Spacer(1, 0.1*inch)
+            yield Paragraph(f"<i>... and {remaining} more files (minor changes)</i>", _BODY_STYLE)
+    
+    yield Spacer(1, 0.4*inch)
+    
+    # 3. Detailed Changes
+    yield Paragraph("3. 🔍 Detailed Changes Analysis", _HEADING_STYLE)
+    yield Spacer(1, 0.15*inch)
+    if analysis_data.get("changes"):
+        yield from _section_flowables(analysis_data["changes"])
+    yield Spacer(1, 0.4*inch)
+    
+    # 4. Technical Implementation
+    yield Paragraph("4. ⚙️ Technical Implementation", _HEADING_STYLE)
+    yield Spacer(1, 0.15*inch)
+    if analysis_data.get("technical"):
+        yield from _section_flowables(analysis_data["technical"])
+    yield Spacer(1, 0.4*inch)
+    
+    # 5. Business Impact
+    yield Paragraph("5. 💼 Business Impact", _HEADING_STYLE)
+    yield Spacer(1, 0.15*inch)
+    if analysis_data.get("impact"):
+        yield from _section_flowables(analysis_data["impact"])
+    else:
+        yield Paragraph("The changes contribute to improving the overall system functionality and maintainability.", _BODY_STYLE)
+    yield Spacer(1, 0.4*inch)
+    
+    # 6. Recommendations
+    yield Paragraph("6. 💡 Future Recommendations", _HEADING_STYLE)
+    yield Spacer(1, 0.15*inch)
+    if analysis_data.get("recommendations"):
+        yield from _section_flowables(analysis_data["recommendations"])
+    else:
+        yield Paragraph("Continue monitoring the changes and ensure proper testing before deployment.", _BODY_STYLE)
+
+
+def write_documentation_pdf(pdf_path: str, analysis_data: dict, diff_summary: dict, prioritized: dict,
+                            repo_name: str, current_branch: str, diff_type: str):
+    """Render the documentation report and write it to pdf_path."""
+    # Rendered in memory, then written to disk in one go
+    pdf_buffer = BytesIO()
+    doc = SimpleDocTemplate(pdf_buffer, pagesize=letter,
+                           topMargin=0.75*inch, bottomMargin=0.75*inch,
+                           leftMargin=0.75*inch, rightMargin=0.75*inch)
+    
+    # Build PDF
+    doc.build(list(_iter_story(analysis_data, diff_summary, prioritized, repo_name, current_branch, diff_type)))
+    _write_file(pdf_path, pdf_buffer.getbuffer())
@@ -1,57 +1,149 @@
 """Advanced Documentation Tool - AI-Powered PDF Documentation Generation"""
 import subprocess
+import hashlib
+import importlib.util
+import json
 import os
 import re
-from dotenv import load_dotenv
+import sqlite3
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable
 from langchain_core.tools import tool
-from langchain_huggingface import HuggingFacePipeline
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
-import torch
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-from datetime import datetime
+from .runtime import default_model_id, get_llm, load_env
+
+try:
+    import pygit2
+except ImportError:  # Optional in-process repository access
+    pygit2 = None
+
+# reportlab is only imported once a PDF is written; finding the package is enough up front
+_REPORTLAB_AVAILABLE = importlib.util.find_spec('reportlab') is not None
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 # Token limits for documentation generation
 MAX_TOKENS_PER_FILE = 3000  # Characters per file chunk
 MAX_TOTAL_CONTEXT = 12000   # Max total context to send to LLM per pass
+ANALYSIS_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'autogit', 'doc_analyses.sqlite')
+ANALYSIS_CACHE_ENTRIES = 64  # Most recently used analyses kept on disk
+
+# Patterns used on every diff line, compiled once
+_RE_DEF = re.compile(r'def\s+(\w+)')
+_RE_CLASS = re.compile(r'class\s+(\w+)')
+_RE_JS_FN = re.compile(r'function\s+(\w+)')
+_RE_CONST = re.compile(r'const\s+(\w+)')
+_RE_BFILE = re.compile(rb'b/(.+)$')
+_RE_IMPORT = re.compile(r'import\s+(\w+)|from\s+([\w.]+)')
+# Snippets kept per file (more than for commits), extraction stops once a budget is full
+MAX_ADDED_SNIPPETS = 10
+MAX_REMOVED_SNIPPETS = 5
+# Priority tier thresholds, in changed lines
+CRITICAL_CHANGES = 100   # more than this: critical
+IMPORTANT_CHANGES = 20   # at least this: important
+MODERATE_CHANGES = 5     # at least this: moderate, anything below is minor
+# Files below the moderate tier are summarized from counts alone
+MIN_DETAILED_CHANGES = MODERATE_CHANGES
+# Change sets smaller than this, in total lines, skip the LLM
+FAST_PATH_CHANGES = 5
+PATHS_PER_DIFF = 200  # Paths per git diff call, keeps the command line short
+_IMPORT_KEYWORDS = ('import ', 'from ', 'require')
+# ASCII snippet tags: an emoji would widen every snippet string to 4 bytes per character,
+# and the PDF's Helvetica cannot draw it either
+_ADDED_TAG = '[+]'
+_REMOVED_TAG = '[-]'
+# Intent keywords of the joined snippet text, each sets its category bit
+_FLAG_DEPENDENCY = 1
+_FLAG_FUNCTION = 2
+_FLAG_FIX = 4
+_FLAG_LOGIC = 8
+_INTENT_FLAGS = (
+    ('import', _FLAG_DEPENDENCY), ('require', _FLAG_DEPENDENCY),
+    ('def ', _FLAG_FUNCTION), ('function ', _FLAG_FUNCTION), ('class ', _FLAG_FUNCTION),
+    ('fix', _FLAG_FIX), ('bug', _FLAG_FIX), ('error', _FLAG_FIX), ('issue', _FLAG_FIX),
+    ('return', _FLAG_LOGIC), ('if ', _FLAG_LOGIC)
+)
+
+# File type by extension, one dict lookup per file
+_FILE_TYPES = {
+    '.py': 'python',
+    '.js': 'javascript', '.jsx': 'javascript', '.ts': 'javascript', '.tsx': 'javascript',
+    '.java': 'java',
+    '.md': 'docs', '.txt': 'docs', '.rst': 'docs',
+    '.json': 'config', '.yaml': 'config', '.yml': 'config', '.toml': 'config', '.ini': 'config',
+    '.html': 'frontend', '.css': 'frontend', '.scss': 'frontend', '.sass': 'frontend'
+}
+
+# Plain git output whatever the user's config: no colour codes, no external diff drivers
+_PLAIN_DIFF = ['--no-color', '--no-ext-diff']
+
+# Change type of a diff status letter
+_STATUS_MAP = {
+    'M': 'Modified',
+    'A': 'Added',
+    'D': 'Deleted',
+    'R': 'Renamed',
+    'C': 'Copied'
+}
+
+# Generated/vendored paths left out of the documentation, matched in one search
+_IGNORE_PATTERNS = [
+    'pycache', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class', '.o',
+    'node_modules', '.git/', 'package-lock.json', 'yarn.lock', '.DS_Store',
+    '.lock', 'dist/', 'build/', '_pycache_', '.egg-info'
+]
+_IGNORE_RE = re.compile('|'.join(re.escape(p) for p in _IGNORE_PATTERNS))
+
+# Section header keywords of the LLM response, in priority order
+_SECTION_KEYWORDS = (
+    ("summary", ("EXECUTIVE SUMMARY", "SUMMARY", "OVERVIEW")),
+    ("changes", ("DETAILED CHANGES", "CHANGES MADE", "WHAT CHANGED")),
+    ("technical", ("TECHNICAL IMPLEMENTATION", "IMPLEMENTATION", "TECHNICAL DETAILS")),
+    ("impact", ("BUSINESS IMPACT", "IMPACT", "VALUE")),
+    ("recommendations", ("RECOMMENDATIONS", "FUTURE", "NEXT STEPS", "SUGGESTIONS"))
+)
+_SECTION_OF_KEYWORD = {kw: section for section, keywords in _SECTION_KEYWORDS for kw in keywords}
+# A whole line naming a section, optionally styled as a markdown, bold or numbered heading
+_SECTION_HEADER_RE = re.compile(
+    r'^[^\S\n]*(?:#+|\d+\.|\*\*)?[^\S\n]*('
+    + '|'.join(map(re.escape, _SECTION_OF_KEYWORD))
+    + r')[^\S\n]*(?:\*\*)?:?[^\S\n]*$',
+    re.MULTILINE | re.IGNORECASE
+)
+# Divider and numbered lines left out of section content, and whitespace-only lines
+_MARKER_LINE_RE = re.compile(r'^[^\S\n]*(?:[1-5]\.|---|===|###).*(?:\n|$)', re.MULTILINE)
+_BLANK_LINE_RE = re.compile(r'^[^\S\n]+$', re.MULTILINE)
 
 
 def _should_ignore_file(filepath: str) -> bool:
     """Check if file should be ignored for documentation generation."""
-    ignore_patterns = [
-        'pycache', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class', '.o',
-        'node_modules', '.git/', 'package-lock.json', 'yarn.lock', '.DS_Store',
-        '.lock', 'dist/', 'build/', '_pycache_', '.egg-info'
-    ]
-    return any(pattern in filepath for pattern in ignore_patterns)
+    return _IGNORE_RE.search(filepath) is not None
 
 
 def _extract_function_class_names(code_line: str) -> str:
     """Extract function or class names from code for better context."""
     # Python function/class
     if 'def ' in code_line:
-        match = re.search(r'def\s+(\w+)', code_line)
+        match = _RE_DEF.search(code_line)
         if match:
             return f"function '{match.group(1)}'"
     if 'class ' in code_line:
-        match = re.search(r'class\s+(\w+)', code_line)
+        match = _RE_CLASS.search(code_line)
         if match:
             return f"class '{match.group(1)}'"
     
     # JavaScript/TypeScript function
     if 'function ' in code_line:
-        match = re.search(r'function\s+(\w+)', code_line)
+        match = _RE_JS_FN.search(code_line)
         if match:
             return f"function '{match.group(1)}'"
     if 'const ' in code_line and ('=>' in code_line or '= function' in code_line):
-        match = re.search(r'const\s+(\w+)', code_line)
+        match = _RE_CONST.search(code_line)
         if match:
             return f"function '{match.group(1)}'"
     
@@ -60,9 +152,6 @@ def _extract_function_class_names(code_line: str) -> str:
 
 def _analyze_change_intent(snippets: list, adds: int, dels: int, filepath: str) -> str:
     """Analyze what kind of change this represents based on code patterns."""
-    snippet_text = ' '.join(snippets).lower()
-    filename = os.path.basename(filepath).lower()
-    
     # Check for specific patterns
     if adds > 0 and dels == 0:
         if adds > 20:
@@ -72,11 +161,19 @@ def _analyze_change_intent(snippets: list, adds: int, dels: int, filepath: str)
     if dels > 0 and adds == 0:
         return "deletions"
     
+    # One mask of keyword categories; a category's remaining keywords are skipped once it is set
+    snippet_text = ' '.join(snippets).lower()
+    mask = 0
+    for keyword, flag in _INTENT_FLAGS:
+        if not mask & flag and keyword in snippet_text:
+            mask |= flag
+    filename = os.path.basename(filepath).lower()
+    
     # Analyze content
-    if 'import' in snippet_text or 'require' in snippet_text:
+    if mask & _FLAG_DEPENDENCY:
         return "dependency changes"
     
-    if 'def ' in snippet_text or 'function ' in snippet_text or 'class ' in snippet_text:
+    if mask & _FLAG_FUNCTION:
         if adds > dels * 2:
             return "added functions/classes"
         elif dels > adds * 2:
@@ -90,10 +187,10 @@ def _analyze_change_intent(snippets: list, adds: int, dels: int, filepath: str)
     if 'readme' in filename or '.md' in filename:
         return "documentation"
     
-    if any(word in snippet_text for word in ['fix', 'bug', 'error', 'issue']):
+    if mask & _FLAG_FIX:
         return "bug fix"
     
-    if 'return' in snippet_text or 'if ' in snippet_text:
+    if mask & _FLAG_LOGIC:
         return "logic changes"
     
     # Default based on ratio
@@ -107,127 +204,286 @@ def _analyze_change_intent(snippets: list, adds: int, dels: int, filepath: str)
 
 def _get_file_type(filepath: str) -> str:
     """Determine file type/category."""
-    filepath_lower = filepath.lower()
+    file_type = _FILE_TYPES.get(os.path.splitext(filepath)[1].lower())
+    if file_type:
+        return file_type
     
-    if '.py' in filepath_lower:
-        return 'python'
-    elif any(ext in filepath_lower for ext in ['.js', '.jsx', '.ts', '.tsx']):
-        return 'javascript'
-    elif '.java' in filepath_lower:
-        return 'java'
-    elif any(ext in filepath_lower for ext in ['.md', '.txt', '.rst']):
-        return 'docs'
-    elif any(ext in filepath_lower for ext in ['.json', '.yaml', '.yml', '.toml', '.ini']):
-        return 'config'
-    elif any(ext in filepath_lower for ext in ['.html', '.css', '.scss', '.sass']):
-        return 'frontend'
-    elif 'test' in filepath_lower or 'spec' in filepath_lower:
+    filepath_lower = filepath.lower()
+    if 'test' in filepath_lower or 'spec' in filepath_lower:
         return 'test'
-    else:
-        return 'other'
+    return 'other'
+
 
+@dataclass(slots=True)
+class FileChange:
+    """Summary record for one file of the diff."""
+    file: str
+    basename: str
+    additions: int
+    deletions: int
+    total_changes: int
+    added_snippets: list
+    removed_snippets: list
+    change_intent: str
+    file_type: str
+    status: str = 'Modified'
+
+
+def _file_entry(filepath: str, additions: int, deletions: int,
+                added_snippets: list, removed_snippets: list) -> FileChange:
+    """Build the summary record for one file of the diff."""
+    return FileChange(
+        file=filepath,
+        basename=os.path.basename(filepath),
+        additions=additions,
+        deletions=deletions,
+        total_changes=additions + deletions,
+        added_snippets=added_snippets,
+        removed_snippets=removed_snippets,
+        change_intent=_analyze_change_intent(
+            added_snippets + removed_snippets,
+            additions,
+            deletions,
+            filepath
+        ),
+        file_type=_get_file_type(filepath)
+    )
 
-def _parse_git_diff_for_documentation(diff_output: str) -> dict:
-    """Parse git diff with intelligent extraction for documentation."""
+
+def _parse_git_diff_for_documentation(lines: Iterable[bytes]) -> dict:
+    """Parse raw git diff lines with intelligent extraction for documentation.
+    
+    Lines stay bytes, only snippet candidates are decoded.
+    """
     files_changed = []
     current_file = None
     additions = 0
     deletions = 0
     added_snippets = []
     removed_snippets = []
+    # Every file in the diff, ignored ones included
+    headers_seen = 0
+    # Ignore decision for the current file, made once at its header
+    current_ignored = True
     
-    lines = diff_output.split('\n')
+    # Hot helpers bound to locals, looked up once instead of per line
+    extract_names = _extract_function_class_names
+    import_search = _RE_IMPORT.search
     
     for line in lines:
-        if line.startswith('diff --git'):
+        # One first-character compare routes every line; content lines fall through
+        kind = line[:1]
+        if kind == b'+':
+            # Added lines
+            if current_ignored or line.startswith(b'+++'):
+                continue
+            additions += 1
+            # Snippet budget full, or too short to yield one even before stripping
+            if len(added_snippets) >= MAX_ADDED_SNIPPETS or len(line) < 7:
+                continue
+            stripped = line[1:].decode('utf-8', 'ignore').strip()
+            
+            if len(stripped) > 5 and not stripped.startswith('#'):
+                # Extract function/class names
+                func_class_name = extract_names(stripped)
+                if func_class_name:
+                    added_snippets.append(f"{_ADDED_TAG} {func_class_name}")
+                elif any(kw in stripped for kw in _IMPORT_KEYWORDS):
+                    match = import_search(stripped)
+                    if match:
+                        module = match.group(1) or match.group(2)
+                        added_snippets.append(f"Import {module}")
+                elif len(stripped) < 100:
+                    added_snippets.append(stripped[:90])
+        
+        elif kind == b'-':
+            # Removed lines
+            if current_ignored or line.startswith(b'---'):
+                continue
+            deletions += 1
+            if len(removed_snippets) >= MAX_REMOVED_SNIPPETS or len(line) < 7:
+                continue
+            stripped = line[1:].decode('utf-8', 'ignore').strip()
+            
+            if len(stripped) > 5:
+                func_class_name = extract_names(stripped)
+                if func_class_name:
+                    removed_snippets.append(f"{_REMOVED_TAG} {func_class_name}")
+        
+        elif kind == b'd' and line.startswith(b'diff --git'):
+            headers_seen += 1
             # Save previous file
-            if current_file and not _should_ignore_file(current_file):
-                change_intent = _analyze_change_intent(
-                    added_snippets + removed_snippets, 
-                    additions, 
-                    deletions,
-                    current_file
-                )
-                
-                files_changed.append({
-                    'file': current_file,
-                    'basename': os.path.basename(current_file),
-                    'additions': additions,
-                    'deletions': deletions,
-                    'total_changes': additions + deletions,
-                    'added_snippets': added_snippets[:10],  # More snippets for documentation
-                    'removed_snippets': removed_snippets[:5],
-                    'change_intent': change_intent,
-                    'file_type': _get_file_type(current_file)
-                })
+            if current_file and not current_ignored:
+                files_changed.append(_file_entry(
+                    current_file, additions, deletions, added_snippets, removed_snippets
+                ))
             
             # New file
-            match = re.search(r'b/(.+)$', line)
+            match = _RE_BFILE.search(line)
             if match:
-                current_file = match.group(1)
+                current_file = match.group(1).decode('utf-8', 'ignore')
+                current_ignored = _should_ignore_file(current_file)
                 additions = 0
                 deletions = 0
                 added_snippets = []
                 removed_snippets = []
         
-        elif current_file and not _should_ignore_file(current_file):
-            # Added lines
-            if line.startswith('+') and not line.startswith('+++'):
-                additions += 1
-                stripped = line[1:].strip()
-                
-                if stripped and len(stripped) > 5 and not stripped.startswith('#'):
-                    # Extract function/class names
-                    func_class_name = _extract_function_class_names(stripped)
-                    if func_class_name:
-                        added_snippets.append(f"➕ {func_class_name}")
-                    elif any(kw in stripped for kw in ['import ', 'from ', 'require']):
-                        match = re.search(r'import\s+(\w+)|from\s+([\w.]+)', stripped)
-                        if match:
-                            module = match.group(1) or match.group(2)
-                            added_snippets.append(f"Import {module}")
-                    elif len(stripped) < 100:
-                        added_snippets.append(stripped[:90])
-            
-            # Removed lines
-            elif line.startswith('-') and not line.startswith('---'):
-                deletions += 1
-                stripped = line[1:].strip()
-                
-                if stripped and len(stripped) > 5:
-                    func_class_name = _extract_function_class_names(stripped)
-                    if func_class_name:
-                        removed_snippets.append(f"➖ {func_class_name}")
-    
     # Save last file
-    if current_file and not _should_ignore_file(current_file):
-        change_intent = _analyze_change_intent(
-            added_snippets + removed_snippets, 
-            additions, 
-            deletions,
-            current_file
-        )
-        
-        files_changed.append({
-            'file': current_file,
-            'basename': os.path.basename(current_file),
-            'additions': additions,
-            'deletions': deletions,
-            'total_changes': additions + deletions,
-            'added_snippets': added_snippets[:10],
-            'removed_snippets': removed_snippets[:5],
-            'change_intent': change_intent,
-            'file_type': _get_file_type(current_file)
-        })
+    if current_file and not current_ignored:
+        files_changed.append(_file_entry(
+            current_file, additions, deletions, added_snippets, removed_snippets
+        ))
     
     return {
         'total_files': len(files_changed),
+        'diffed_files': headers_seen,
         'files': files_changed,
-        'total_additions': sum(f['additions'] for f in files_changed),
-        'total_deletions': sum(f['deletions'] for f in files_changed)
+        'total_additions': sum(f.additions for f in files_changed),
+        'total_deletions': sum(f.deletions for f in files_changed)
     }
 
 
+def _stream_diff_for_documentation(cached: bool, paths: list) -> dict:
+    """Run git diff once for the given paths and parse it while git is still writing."""
+    # -U0: context lines never yield snippets, so git does not send them
+    diff_cmd = ['git', 'diff', '-U0'] + _PLAIN_DIFF + (['--cached'] if cached else []) + ['--'] + paths
+    # Raw bytes: only the few lines kept as snippets are ever decoded
+    proc = subprocess.Popen(
+        diff_cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        bufsize=1 << 20
+    )
+    with proc.stdout:
+        diff_summary = _parse_git_diff_for_documentation(proc.stdout)
+    proc.wait()
+    return diff_summary
+
+
+def _get_numstat(cached: bool) -> list:
+    """Per-file (additions, deletions, path, status, old path) as git computes them.
+    
+    The old path is only set for renames and copies, None otherwise.
+    """
+    # --raw rides along for the A/M/D status, so no separate name-status query is needed
+    numstat_cmd = ['git', 'diff', '--raw', '--numstat', '-z'] + _PLAIN_DIFF + (['--cached'] if cached else [])
+    result = subprocess.run(numstat_cmd, capture_output=True)
+    fields = result.stdout.split(b'\0')
+    
+    # Raw records come first, in the same file order as the numstat records after them
+    statuses = []
+    numstat = []
+    index = 0
+    while index < len(fields):
+        record = fields[index]
+        index += 1
+        if not record:
+            continue
+        if record[:1] == b':':
+            # The status letter ends the record, followed by a similarity score for R/C
+            status = record[record.rfind(b' ') + 1:][:1].decode()
+            statuses.append(_STATUS_MAP.get(status, 'Modified'))
+            # Renames and copies list both paths
+            index += 2 if status in ('R', 'C') else 1
+            continue
+        adds, dels, path = record.split(b'\t', 2)
+        old_path = None
+        if not path:
+            # Rename or copy: the old and new paths follow as their own fields
+            old_path = fields[index].decode('utf-8', 'ignore')
+            path = fields[index + 1]
+            index += 2
+        # Binary files are reported as -/-
+        numstat.append((
+            int(adds) if adds.isdigit() else 0,
+            int(dels) if dels.isdigit() else 0,
+            path.decode('utf-8', 'ignore'),
+            statuses[len(numstat)],
+            old_path
+        ))
+    return numstat
+
+
+def _summarize_changes(cached: bool) -> dict:
+    """Count changes with git's numstat, reading hunks only for files worth detailing."""
+    numstat = _get_numstat(cached)
+    counted = [entry for entry in numstat if not _should_ignore_file(entry[2])]
+    
+    # Minor files only ever show their counts, so their hunks are never parsed
+    detailed = {}
+    # Both sides of a rename go in the same call, or git diffs the new path as an added file
+    detail_paths = [(old_path, path) if old_path else (path,)
+                    for adds, dels, path, status, old_path in counted if adds + dels >= MIN_DETAILED_CHANGES]
+    for start in range(0, len(detail_paths), PATHS_PER_DIFF):
+        paths = [p for group in detail_paths[start:start + PATHS_PER_DIFF] for p in group]
+        batch = _stream_diff_for_documentation(cached, paths)
+        detailed.update((f.file, f) for f in batch['files'])
+    
+    files_changed = []
+    # Totals summed while the list is built, not in extra passes over it
+    total_additions = 0
+    total_deletions = 0
+    for adds, dels, path, status, old_path in counted:
+        # Counts always come from numstat, the detail pass only adds snippets
+        detail = detailed.get(path)
+        if detail is None:
+            file_info = _file_entry(path, adds, dels, [], [])
+        else:
+            file_info = _file_entry(path, adds, dels, detail.added_snippets, detail.removed_snippets)
+        file_info.status = status
+        files_changed.append(file_info)
+        total_additions += adds
+        total_deletions += dels
+    
+    return {
+        'total_files': len(files_changed),
+        'diffed_files': len(numstat),
+        'files': files_changed,
+        'total_additions': total_additions,
+        'total_deletions': total_deletions,
+        '_prioritized': _prioritize_files_for_documentation(files_changed)
+    }
+
+
+def _git_query(args: list) -> subprocess.CompletedProcess:
+    """Run a short git query, output left as bytes for the caller to decode if needed."""
+    return subprocess.run(['git'] + args, capture_output=True)
+
+
+def _repo_metadata_pygit2() -> tuple:
+    """Top level and current branch read in-process with libgit2."""
+    git_dir = pygit2.discover_repository(os.getcwd())
+    if git_dir is None:
+        return None, ''
+    repo = pygit2.Repository(git_dir)
+    if repo.workdir is None:
+        return None, ''
+    # HEAD names a branch even before the first commit; detached HEAD has none
+    target = repo.lookup_reference('HEAD').target
+    branch = target[len('refs/heads/'):] if isinstance(target, str) and target.startswith('refs/heads/') else ''
+    return os.path.normpath(repo.workdir), branch
+
+
+def _repo_metadata() -> tuple:
+    """Top level (None outside a work tree) and current branch of the repository."""
+    if pygit2 is not None:
+        try:
+            return _repo_metadata_pygit2()
+        except pygit2.GitError:
+            pass
+    
+    # Two argv queries on a thread pool rather than one shell script: no sh on Windows
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        toplevel, branch = executor.map(_git_query, (
+            ['rev-parse', '--show-toplevel'],
+            ['branch', '--show-current']
+        ))
+    return (
+        os.fsdecode(toplevel.stdout.strip()) if toplevel.returncode == 0 else None,
+        branch.stdout.strip().decode('utf-8', 'ignore')
+    )
+
+
 def _prioritize_files_for_documentation(files: list) -> dict:
     """Categorize files by importance for intelligent processing."""
     critical = []    # >100 changes - highest detail
@@ -236,12 +492,12 @@ def _prioritize_files_for_documentation(files: list) -> dict:
     minor = []       # <5 changes - minimal detail
     
     for file_info in files:
-        total = file_info['total_changes']
-        if total > 100:
+        total = file_info.total_changes
+        if total > CRITICAL_CHANGES:
             critical.append(file_info)
-        elif total >= 20:
+        elif total >= IMPORTANT_CHANGES:
             important.append(file_info)
-        elif total >= 5:
+        elif total >= MODERATE_CHANGES:
             moderate.append(file_info)
         else:
             minor.append(file_info)
@@ -254,12 +510,26 @@ def _prioritize_files_for_documentation(files: list) -> dict:
     }
 
 
-def _create_file_detail(file_info: dict, detail_level: str = 'full') -> str:
+def _get_prioritized(diff_summary: dict) -> dict:
+    """Priority tiers of a diff summary, computed once and kept on the summary."""
+    if '_prioritized' not in diff_summary:
+        diff_summary['_prioritized'] = _prioritize_files_for_documentation(diff_summary['files'])
+    return diff_summary['_prioritized']
+
+
+def _get_file_type_counts(diff_summary: dict) -> Counter:
+    """Files per type of a diff summary, counted once and kept on the summary."""
+    if '_file_types' not in diff_summary:
+        diff_summary['_file_types'] = Counter(f.file_type for f in diff_summary['files'])
+    return diff_summary['_file_types']
+
+
+def _create_file_detail(file_info: FileChange, detail_level: str = 'full') -> str:
     """Create detailed description for a single file."""
-    basename = file_info['basename']
-    intent = file_info['change_intent']
-    adds = file_info['additions']
-    dels = file_info['deletions']
+    basename = file_info.basename
+    intent = file_info.change_intent
+    adds = file_info.additions
+    dels = file_info.deletions
     
     if detail_level == 'minimal':
         return f"• {basename}: {intent} (+{adds}/-{dels})"
@@ -269,8 +539,8 @@ def _create_file_detail(file_info: dict, detail_level: str = 'full') -> str:
     parts.append(f"   Stats: +{adds}/-{dels} lines")
     
     if detail_level in ['full', 'medium']:
-        added = file_info.get('added_snippets', [])
-        removed = file_info.get('removed_snippets', [])
+        added = file_info.added_snippets
+        removed = file_info.removed_snippets
         
         if added:
             parts.append("   Changes:")
@@ -285,65 +555,92 @@ def _create_file_detail(file_info: dict, detail_level: str = 'full') -> str:
     return '\n'.join(parts)
 
 
+def _append_to_chunk(parts: list, text: str, budget: list) -> bool:
+    """Append a line to a chunk while its character budget lasts.
+    
+    The line crossing the budget is cut at the limit and marked as truncated;
+    returns False once the budget is spent.
+    """
+    if budget[0] < 0:
+        return False
+    piece = '\n' + text if parts else text
+    if len(piece) > budget[0]:
+        parts.append(piece[:budget[0]] + "\n[Truncated]")
+        budget[0] = -1
+        return False
+    parts.append(piece)
+    budget[0] -= len(piece)
+    return True
+
+
 def _create_chunked_context_for_documentation(diff_summary: dict) -> list:
-    """Create multiple chunks of context for multi-pass documentation generation."""
-    prioritized = _prioritize_files_for_documentation(diff_summary['files'])
+    """Create multiple chunks of context for multi-pass documentation generation.
+    
+    Each chunk stops growing at MAX_TOTAL_CONTEXT characters; the additional
+    files only get a chunk of their own when they do not fit in the first one.
+    """
+    prioritized = _get_prioritized(diff_summary)
     chunks = []
     
     # Chunk 1: Overview + Critical Files (detailed)
     chunk1_parts = []
-    chunk1_parts.append(f"📊 DOCUMENTATION OVERVIEW")
-    chunk1_parts.append(f"Total Files: {diff_summary['total_files']}")
-    chunk1_parts.append(f"Changes: +{diff_summary['total_additions']} -{diff_summary['total_deletions']} lines\n")
+    budget = [MAX_TOTAL_CONTEXT]
+    _append_to_chunk(chunk1_parts, f"📊 DOCUMENTATION OVERVIEW", budget)
+    _append_to_chunk(chunk1_parts, f"Total Files: {diff_summary['total_files']}", budget)
+    _append_to_chunk(chunk1_parts, f"Changes: +{diff_summary['total_additions']} -{diff_summary['total_deletions']} lines\n", budget)
     
     if prioritized['critical']:
-        chunk1_parts.append(f"🔥 CRITICAL FILES ({len(prioritized['critical'])} files with >100 lines changed):")
+        _append_to_chunk(chunk1_parts, f"🔥 CRITICAL FILES ({len(prioritized['critical'])} files with >100 lines changed):", budget)
         for file_info in prioritized['critical']:
-            chunk1_parts.append(_create_file_detail(file_info, 'full'))
+            if not _append_to_chunk(chunk1_parts, _create_file_detail(file_info, 'full'), budget):
+                break
     
     if prioritized['important']:
-        chunk1_parts.append(f"\n📌 IMPORTANT FILES ({len(prioritized['important'])} files with 20-100 lines):")
+        _append_to_chunk(chunk1_parts, f"\n📌 IMPORTANT FILES ({len(prioritized['important'])} files with 20-100 lines):", budget)
         for file_info in prioritized['important'][:8]:
-            chunk1_parts.append(_create_file_detail(file_info, 'medium'))
+            if not _append_to_chunk(chunk1_parts, _create_file_detail(file_info, 'medium'), budget):
+                break
     
-    chunk1 = '\n'.join(chunk1_parts)
-    if len(chunk1) > MAX_TOTAL_CONTEXT:
-        chunk1 = chunk1[:MAX_TOTAL_CONTEXT] + "\n[Truncated]"
-    chunks.append(chunk1)
+    chunks.append(''.join(chunk1_parts))
     
     # Chunk 2: Moderate + Minor Files (if needed)
     if prioritized['moderate'] or prioritized['minor']:
         chunk2_parts = []
-        chunk2_parts.append(f"📊 ADDITIONAL FILES")
+        budget = [MAX_TOTAL_CONTEXT]
+        _append_to_chunk(chunk2_parts, f"📊 ADDITIONAL FILES", budget)
         
         if prioritized['moderate']:
-            chunk2_parts.append(f"\n📝 MODERATE FILES ({len(prioritized['moderate'])} files with 5-20 lines):")
+            _append_to_chunk(chunk2_parts, f"\n📝 MODERATE FILES ({len(prioritized['moderate'])} files with 5-20 lines):", budget)
             for file_info in prioritized['moderate'][:15]:
-                chunk2_parts.append(_create_file_detail(file_info, 'minimal'))
+                if not _append_to_chunk(chunk2_parts, _create_file_detail(file_info, 'minimal'), budget):
+                    break
         
         if prioritized['minor']:
-            chunk2_parts.append(f"\n✨ MINOR FILES ({len(prioritized['minor'])} files with <5 lines):")
-            minor_names = [f['basename'] for f in prioritized['minor'][:20]]
-            chunk2_parts.append(f"Files: {', '.join(minor_names)}")
-        
-        chunk2 = '\n'.join(chunk2_parts)
-        if len(chunk2) > MAX_TOTAL_CONTEXT:
-            chunk2 = chunk2[:MAX_TOTAL_CONTEXT] + "\n[Truncated]"
-        chunks.append(chunk2)
+            _append_to_chunk(chunk2_parts, f"\n✨ MINOR FILES ({len(prioritized['minor'])} files with <5 lines):", budget)
+            minor_names = [f.basename for f in prioritized['minor'][:20]]
+            _append_to_chunk(chunk2_parts, f"Files: {', '.join(minor_names)}", budget)
+        
+        chunk2 = ''.join(chunk2_parts)
+        # When both fit in one context, one LLM pass covers everything instead of two
+        if len(chunks[0]) + len(chunk2) + 2 <= MAX_TOTAL_CONTEXT:
+            chunks[0] = chunks[0] + '\n\n' + chunk2
+        else:
+            chunks.append(chunk2)
     
     return chunks
 
 
 def _validate_and_fill_sections(sections: dict, diff_summary: dict) -> dict:
     """Validate sections and fill in missing ones with intelligent fallback."""
-    prioritized = _prioritize_files_for_documentation(diff_summary['files'])
+    prioritized = _get_prioritized(diff_summary)
     
     # Check and fill SUMMARY
     if not sections.get('summary') or len(sections['summary']) < 50:
-        sections['summary'] = f"This update encompasses {diff_summary['total_files']} files with significant changes totaling {diff_summary['total_additions']} additions and {diff_summary['total_deletions']} deletions. The changes primarily focus on "
+        summary_parts = [f"This update encompasses {diff_summary['total_files']} files with significant changes totaling {diff_summary['total_additions']} additions and {diff_summary['total_deletions']} deletions. The changes primarily focus on "]
         if prioritized['critical']:
-            sections['summary'] += f"critical modifications to {len(prioritized['critical'])} major files, "
-        sections['summary'] += "enhancing system functionality, improving code structure, and implementing new features that advance the overall project capabilities."
+            summary_parts.append(f"critical modifications to {len(prioritized['critical'])} major files, ")
+        summary_parts.append("enhancing system functionality, improving code structure, and implementing new features that advance the overall project capabilities.")
+        sections['summary'] = ''.join(summary_parts)
     
     # Check and fill CHANGES - Include ALL priority levels
     if not sections.get('changes') or len(sections['changes']) < 100:
@@ -351,28 +648,31 @@ def _validate_and_fill_sections(sections: dict, diff_summary: dict) -> dict:
         
         # Critical files - detailed explanation
         if prioritized['critical']:
-            changes_parts.append(f"Critical files with major modifications include {', '.join([f['basename'] for f in prioritized['critical'][:3]])}. ")
+            critical_names = ', '.join(f.basename for f in prioritized['critical'][:3])
+            changes_parts.append(f"Critical files with major modifications include {critical_names}. ")
             for file_info in prioritized['critical'][:3]:
-                changes_parts.append(f"The {file_info['basename']} file underwent {file_info['change_intent']} with {file_info['additions']} lines added and {file_info['deletions']} lines removed. ")
+                changes_parts.append(f"The {file_info.basename} file underwent {file_info.change_intent} with {file_info.additions} lines added and {file_info.deletions} lines removed. ")
         
         # Important files - medium detail
         if prioritized['important']:
             changes_parts.append(f"Important modifications were made to {len(prioritized['important'])} files. ")
             for file_info in prioritized['important'][:3]:
-                changes_parts.append(f"The {file_info['basename']} experienced {file_info['change_intent']} affecting {file_info['total_changes']} lines. ")
+                changes_parts.append(f"The {file_info.basename} experienced {file_info.change_intent} affecting {file_info.total_changes} lines. ")
         
         # Moderate files - brief explanation
         if prioritized['moderate']:
-            changes_parts.append(f"Moderate changes affected {len(prioritized['moderate'])} files including {', '.join([f['basename'] for f in prioritized['moderate'][:4]])}. ")
-            changes_parts.append(f"These files received targeted updates with an average of {sum(f['total_changes'] for f in prioritized['moderate']) // len(prioritized['moderate'])} lines changed per file, focusing on refinements and adjustments. ")
+            moderate_names = ', '.join(f.basename for f in prioritized['moderate'][:4])
+            changes_parts.append(f"Moderate changes affected {len(prioritized['moderate'])} files including {moderate_names}. ")
+            changes_parts.append(f"These files received targeted updates with an average of {sum(f.total_changes for f in prioritized['moderate']) // len(prioritized['moderate'])} lines changed per file, focusing on refinements and adjustments. ")
         
         # Minor files - summary
         if prioritized['minor']:
             changes_parts.append(f"Additionally, {len(prioritized['minor'])} files received minor updates with small-scale adjustments. ")
+            minor_names = ', '.join(f.basename for f in prioritized['minor'][:5])
             if len(prioritized['minor']) <= 5:
-                changes_parts.append(f"These include {', '.join([f['basename'] for f in prioritized['minor']])} with minimal but necessary changes. ")
+                changes_parts.append(f"These include {minor_names} with minimal but necessary changes. ")
             else:
-                changes_parts.append(f"Key files include {', '.join([f['basename'] for f in prioritized['minor'][:5]])} among others, each with focused modifications. ")
+                changes_parts.append(f"Key files include {minor_names} among others, each with focused modifications. ")
         
         sections['changes'] = ' '.join(changes_parts) if changes_parts else "Multiple files were updated with enhancements to system functionality and code improvements."
     
@@ -383,13 +683,14 @@ def _validate_and_fill_sections(sections: dict, diff_summary: dict) -> dict:
         # Extract function/class names from ALL priority levels
         functions_found = []
         imports_found = []
-        all_files = prioritized['critical'] + prioritized['important'] + prioritized['moderate']
+        all_files = chain(prioritized['critical'], prioritized['important'], prioritized['moderate'])
         
         for file_info in all_files:
-            for snippet in file_info.get('added_snippets', [])[:3]:
-                if 'function' in snippet.lower() or 'class' in snippet.lower():
+            for snippet in file_info.added_snippets[:3]:
+                lowered = snippet.lower()
+                if 'function' in lowered or 'class' in lowered:
                     functions_found.append(snippet)
-                elif 'import' in snippet.lower():
+                elif 'import' in lowered:
                     imports_found.append(snippet)
         
         # Technical implementation details
@@ -400,11 +701,7 @@ def _validate_and_fill_sections(sections: dict, diff_summary: dict) -> dict:
             tech_parts.append(f"New dependencies were integrated including {', '.join(imports_found[:3])}. ")
         
         # General technical description based on file types
-        file_types = {}
-        for f in diff_summary['files']:
-            ftype = f['file_type']
-            file_types[ftype] = file_types.get(ftype, 0) + 1
-        
+        file_types = _get_file_type_counts(diff_summary)
         if file_types:
             tech_parts.append(f"The technical scope spans {', '.join([f'{count} {ftype}' for ftype, count in file_types.items()])} files. ")
         
@@ -424,33 +721,16 @@ def _validate_and_fill_sections(sections: dict, diff_summary: dict) -> dict:
     return sections
 
 
-def _generate_documentation_with_llm(context_chunks: list, chunk_index: int, total_chunks: int, diff_summary: dict) -> dict:
-    """Generate documentation section using LLM with chunked context."""
-    try:
-        model_id = os.getenv("HF_MODEL_ID", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
-        tokenizer = AutoTokenizer.from_pretrained(model_id)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_id,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None,
-            low_cpu_mem_usage=True
-        )
-        pipe = pipeline(
-            "text-generation",
-            model=model,
-            tokenizer=tokenizer,
-            max_new_tokens=4000,
-            temperature=0.4,
-            top_k=50,
-            do_sample=True
-        )
-        llm = HuggingFacePipeline(pipeline=pipe)
-        
-        context = context_chunks[chunk_index]
-        
-        if chunk_index == 0:
-            # First chunk: Executive Summary, Detailed Changes, Technical Implementation
-            prompt = f"""You are a technical documentation expert. Analyze these git changes and write comprehensive documentation.
+def _load_documentation_llm():
+    """Documentation LLM from the shared runtime, built once per process."""
+    return get_llm(default_model_id(), max_new_tokens=4000, temperature=0.4)
+
+
+def _documentation_prompt(context: str, chunk_index: int, total_chunks: int) -> str:
+    """Prompt for one chunk: the main sections first, additional changes after."""
+    if chunk_index == 0:
+        # First chunk: Executive Summary, Detailed Changes, Technical Implementation
+        prompt = f"""You are a technical documentation expert. Analyze these git changes and write comprehensive documentation.
 
 {context}
 
@@ -497,9 +777,9 @@ CRITICAL REQUIREMENTS - FOLLOW EXACTLY:
 6. NO numbering (1., 2., 3.)
 7. Be specific - use actual names from the context above
 8. Each section must be substantial (at least 200 characters)"""
-        else:
-            # Subsequent chunks: Additional details
-            prompt = f"""Continue analyzing these additional git changes for comprehensive documentation.
+    else:
+        # Subsequent chunks: Additional details
+        prompt = f"""Continue analyzing these additional git changes for comprehensive documentation.
 
 {context}
 
@@ -523,20 +803,115 @@ CRITICAL REQUIREMENTS:
 3. NO markdown symbols (#, *, -, ##, [])
 4. Be concise but informative
 5. Group similar changes together"""
+    
+    return prompt
+
+
+def _parse_documentation_response(response, chunk_index: int) -> dict:
+    """Sections of one chunk's LLM response, None when it failed or is too short."""
+    if isinstance(response, Exception):
+        print(f"⚠ LLM error for chunk {chunk_index + 1}: {str(response)}")
+        return None
+    
+    try:
+        # Pipeline LLMs return plain text, chat models a message
+        content = getattr(response, 'content', response)
         
-        response = llm.invoke(prompt)
-        
-        if not response.content or len(response.content.strip()) < 100:
+        if not content or len(content.strip()) < 100:
             return None
         
-        return parse_ai_analysis(response.content.strip())
+        return parse_ai_analysis(content.strip())
         
     except Exception as e:
         print(f"⚠ LLM error for chunk {chunk_index + 1}: {str(e)}")
         return None
 
 
+@lru_cache(maxsize=None)
+def _analysis_cache():
+    """Open the on-disk analysis cache once per process.
+    
+    Returns None when the cache cannot be used, generation then just goes uncached.
+    """
+    try:
+        os.makedirs(os.path.dirname(ANALYSIS_CACHE_PATH), exist_ok=True)
+        # Tools may run on worker threads; calls are never concurrent
+        conn = sqlite3.connect(ANALYSIS_CACHE_PATH, check_same_thread=False)
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS analyses '
+            '(key TEXT PRIMARY KEY, analysis TEXT NOT NULL, used_at REAL NOT NULL)'
+        )
+        return conn
+    except sqlite3.Error:
+        return None
+
+
+def _analysis_key(context_chunks: list) -> str:
+    """Fingerprint of everything the LLM is shown: the model and the chunk contexts."""
+    digest = hashlib.blake2b(default_model_id().encode(), digest_size=16)
+    for chunk in context_chunks:
+        digest.update(b'\0')
+        digest.update(chunk.encode())
+    return digest.hexdigest()
+
+
+def _cached_analysis(key: str):
+    """Merged LLM sections stored for a fingerprint, marked as just used."""
+    conn = _analysis_cache()
+    if conn is None:
+        return None
+    try:
+        with conn:
+            row = conn.execute('SELECT analysis FROM analyses WHERE key = ?', (key,)).fetchone()
+            if row:
+                conn.execute('UPDATE analyses SET used_at = ? WHERE key = ?', (time.time(), key))
+    except sqlite3.Error:
+        return None
+    return json.loads(row[0]) if row else None
+
+
+def _store_analysis(key: str, analysis: dict):
+    """Remember the merged LLM sections, evicting the least recently used beyond the limit."""
+    conn = _analysis_cache()
+    if conn is None:
+        return
+    try:
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO analyses (key, analysis, used_at) VALUES (?, ?, ?)',
+                (key, json.dumps(analysis), time.time())
+            )
+            conn.execute(
+                'DELETE FROM analyses WHERE key NOT IN '
+                '(SELECT key FROM analyses ORDER BY used_at DESC LIMIT ?)',
+                (ANALYSIS_CACHE_ENTRIES,)
+            )
+    except sqlite3.Error:
+        return
+
+
+def _generate_documentation_chunks(context_chunks: list, diff_summary: dict) -> list:
+    """Generate all chunks in one batched LLM call, results in chunk order."""
+    try:
+        llm = _load_documentation_llm()
+    except Exception as e:
+        print(f"⚠ LLM error: {str(e)}")
+        return [None] * len(context_chunks)
+    
+    total_chunks = len(context_chunks)
+    prompts = [_documentation_prompt(context, idx, total_chunks) for idx, context in enumerate(context_chunks)]
+    # The pipeline generates the prompts together instead of threads contending for one model
+    responses = llm.batch(prompts, return_exceptions=True)
+    return [_parse_documentation_response(response, idx) for idx, response in enumerate(responses)]
+
+
 # Helper functions for documentation generation
+def _section_content(chunk: str) -> str:
+    """Section text without divider or numbered lines, blank lines kept as paragraph breaks."""
+    chunk = _MARKER_LINE_RE.sub('', chunk)
+    return _BLANK_LINE_RE.sub('', chunk).strip()
+
+
 def parse_ai_analysis(text: str) -> dict:
     """Parse AI-generated analysis text into structured sections."""
     sections = {
@@ -552,60 +927,20 @@ def parse_ai_analysis(text: str) -> dict:
         sections["summary"] = "Analysis could not be generated. Please review the changes manually."
         return sections
     
-    # Split text into lines for processing
-    lines = text.split('\n')
+    # Headers are found in one pass over the whole text, each section is the slice up to the next
     current_section = "summary"
-    current_content = []
-    
-    for line in lines:
-        line_stripped = line.strip()
-        line_upper = line_stripped.upper()
-        
-        # Skip empty lines at section boundaries
-        if not line_stripped:
-            if current_content:
-                current_content.append("")  # Preserve paragraph breaks
-            continue
-        
-        # Detect section headers (more flexible matching)
-        if any(keyword in line_upper for keyword in ["EXECUTIVE SUMMARY", "SUMMARY", "OVERVIEW"]):
-            if current_content:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "summary"
-            current_content = []
-            continue
-        elif any(keyword in line_upper for keyword in ["DETAILED CHANGES", "CHANGES MADE", "WHAT CHANGED"]):
-            if current_content:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "changes"
-            current_content = []
-            continue
-        elif any(keyword in line_upper for keyword in ["TECHNICAL IMPLEMENTATION", "IMPLEMENTATION", "TECHNICAL DETAILS"]):
-            if current_content:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "technical"
-            current_content = []
-            continue
-        elif any(keyword in line_upper for keyword in ["BUSINESS IMPACT", "IMPACT", "VALUE"]):
-            if current_content:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "impact"
-            current_content = []
-            continue
-        elif any(keyword in line_upper for keyword in ["RECOMMENDATIONS", "FUTURE", "NEXT STEPS", "SUGGESTIONS"]):
-            if current_content:
-                sections[current_section] = '\n'.join(current_content).strip()
-            current_section = "recommendations"
-            current_content = []
-            continue
-        
-        # Add content line (skip obvious section markers like "1.", "2.", etc.)
-        if not line_stripped.startswith(('1.', '2.', '3.', '4.', '5.', '---', '===', '###')):
-            current_content.append(line)
+    position = 0
+    for match in _SECTION_HEADER_RE.finditer(text):
+        content = _section_content(text[position:match.start()])
+        if content:
+            sections[current_section] = content
+        current_section = _SECTION_OF_KEYWORD[match.group(1).upper()]
+        position = match.end()
     
     # Add last section
-    if current_content:
-        sections[current_section] = '\n'.join(current_content).strip()
+    content = _section_content(text[position:])
+    if content:
+        sections[current_section] = content
     
     # If all sections are empty, put everything in summary
     if all(not v for v in sections.values()):
@@ -618,35 +953,33 @@ def parse_ai_analysis(text: str) -> dict:
 
 def create_fallback_documentation(diff_summary: dict) -> dict:
     """Create basic documentation when LLM fails."""
-    files = diff_summary['files']
     total_files = diff_summary['total_files']
     
-    summary = f"This update includes changes to {total_files} file(s) with {diff_summary['total_additions']} additions and {diff_summary['total_deletions']} deletions. "
+    summary_parts = [f"This update includes changes to {total_files} file(s) with {diff_summary['total_additions']} additions and {diff_summary['total_deletions']} deletions. "]
     
     # Analyze file types
-    file_types = {}
-    for f in files:
-        ftype = f['file_type']
-        file_types[ftype] = file_types.get(ftype, 0) + 1
-    
+    file_types = _get_file_type_counts(diff_summary)
     if file_types:
-        summary += "Affected areas: " + ", ".join([f"{count} {ftype} file(s)" for ftype, count in file_types.items()]) + ". "
+        summary_parts.append("Affected areas: ")
+        summary_parts.append(", ".join(f"{count} {ftype} file(s)" for ftype, count in file_types.items()))
+        summary_parts.append(". ")
     
-    summary += "These changes improve the codebase functionality and structure."
+    summary_parts.append("These changes improve the codebase functionality and structure.")
+    summary = ''.join(summary_parts)
     
     # Build changes description with prioritization
-    prioritized = _prioritize_files_for_documentation(files)
+    prioritized = _get_prioritized(diff_summary)
     changes_parts = []
     
     if prioritized['critical']:
         changes_parts.append(f"Critical Changes ({len(prioritized['critical'])} files):")
         for file_info in prioritized['critical']:
-            changes_parts.append(f"\n{file_info['file']}: {file_info['change_intent']} with {file_info['total_changes']} lines modified.")
+            changes_parts.append(f"\n{file_info.file}: {file_info.change_intent} with {file_info.total_changes} lines modified.")
     
     if prioritized['important']:
         changes_parts.append(f"\n\nImportant Changes ({len(prioritized['important'])} files):")
         for file_info in prioritized['important'][:5]:
-            changes_parts.append(f"\n{file_info['file']}: {file_info['change_intent']}.")
+            changes_parts.append(f"\n{file_info.file}: {file_info.change_intent}.")
     
     if prioritized['moderate'] or prioritized['minor']:
         total_other = len(prioritized['moderate']) + len(prioritized['minor'])
@@ -672,56 +1005,42 @@ def generate_version_documentation() -> dict:
     """
     output_file = "version_control_doc.pdf"
     
+    # Without reportlab no PDF can be written, so skip the diff and LLM work
+    if not _REPORTLAB_AVAILABLE:
+        return {
+            "status": "error",
+            "message": "❌ reportlab library not installed\n💡 Solution: Install it with: pip install reportlab"
+        }
+    
     try:
-        # First check if it's a git repository
-        check_repo = subprocess.run(
-            ['git', 'rev-parse', '--git-dir'],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        if check_repo.returncode != 0:
-            return {
-                "status": "error",
-                "message": "❌ Not a git repository\n💡 Solution: Run 'git init' first"
-            }
-        
-        # Get git diff output for CURRENT changes (staged + unstaged)
-        # First try staged changes
-        diff_result = subprocess.run(
-            ['git', 'diff', '--cached'], 
-            capture_output=True, 
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        git_diff_output = diff_result.stdout.strip()
-        diff_type = "staged changes"
+        # The staged diff is summarized on a worker while the metadata queries run here
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            staged_summary = executor.submit(_summarize_changes, True)
+            
+            # Repository check, name and branch come from one round of metadata queries
+            toplevel, current_branch = _repo_metadata()
+            
+            if toplevel is None:
+                return {
+                    "status": "error",
+                    "message": "❌ Not a git repository\n💡 Solution: Run 'git init' first"
+                }
+            
+            # Summarize CURRENT changes (staged + unstaged) from git's own counts
+            print("🔍 Parsing git diff with intelligent extraction...")
+            # First try staged changes
+            diff_summary = staged_summary.result()
+            diff_type = "staged changes"
         
         # If no staged changes, check unstaged changes
-        if not git_diff_output:
-            diff_result = subprocess.run(
-                ['git', 'diff'], 
-                capture_output=True, 
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            git_diff_output = diff_result.stdout.strip()
+        if not diff_summary['diffed_files']:
+            diff_summary = _summarize_changes(cached=False)
             diff_type = "unstaged changes"
         
         # If still no changes, check if there are untracked files
-        if not git_diff_output:
-            status_result = subprocess.run(
-                ['git', 'status', '--short'],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
+        if not diff_summary['diffed_files']:
+            # Only whether git lists anything matters, so the output is never decoded
+            status_result = _git_query(['status', '--short'])
             
             if status_result.stdout.strip():
                 return {
@@ -734,327 +1053,98 @@ def generate_version_documentation() -> dict:
                     "message": "❌ No changes detected\n💡 Solution: Make changes to files first, then generate documentation"
                 }
         
-        # Get list of changed files
-        files_result = subprocess.run(
-            ['git', 'diff', '--name-status', '--cached'] if diff_type == "staged changes" else ['git', 'diff', '--name-status'],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        changed_files = []
-        if files_result.stdout.strip():
-            for line in files_result.stdout.strip().split('\n'):
-                parts = line.split('\t')
-                if len(parts) >= 2:
-                    status = parts[0]
-                    filename = parts[1]
-                    change_type = {
-                        'M': 'Modified',
-                        'A': 'Added',
-                        'D': 'Deleted',
-                        'R': 'Renamed',
-                        'C': 'Copied'
-                    }.get(status[0], 'Modified')
-                    changed_files.append({
-                        'file': filename,
-                        'type': change_type
-                    })
-        
-        # Get repository name
-        repo_result = subprocess.run(
-            ['git', 'rev-parse', '--show-toplevel'],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        repo_name = os.path.basename(repo_result.stdout.strip()) if repo_result.returncode == 0 else "Repository"
-        
-        # Get current branch
-        branch_result = subprocess.run(
-            ['git', 'branch', '--show-current'],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        current_branch = branch_result.stdout.strip() or "main"
-        
-        # Parse diff with intelligent extraction (like commit tool)
-        print("🔍 Parsing git diff with intelligent extraction...")
-        diff_summary = _parse_git_diff_for_documentation(git_diff_output)
-        
-        print(f"📊 Detected changes in {diff_summary['total_files']} file(s):")
-        print(f"   Total: +{diff_summary['total_additions']} -{diff_summary['total_deletions']} lines\n")
+        repo_name = os.path.basename(toplevel) or "Repository"
+        current_branch = current_branch or "main"
         
         # Prioritize files
-        prioritized = _prioritize_files_for_documentation(diff_summary['files'])
-        print(f"🎯 Priority breakdown:")
-        print(f"   🔥 Critical (>100 lines): {len(prioritized['critical'])} files")
-        print(f"   📌 Important (20-100): {len(prioritized['important'])} files")
-        print(f"   📝 Moderate (5-20): {len(prioritized['moderate'])} files")
-        print(f"   ✨ Minor (<5): {len(prioritized['minor'])} files\n")
-        
-        # Create chunked context for multi-pass generation
-        print("📦 Creating intelligent chunks for LLM...")
-        context_chunks = _create_chunked_context_for_documentation(diff_summary)
-        print(f"✅ Created {len(context_chunks)} chunk(s) for processing\n")
-        
-        # Use LLM to analyze changes (multi-pass if needed)
-        print("🤖 Generating documentation with AI...")
-        analysis_data = {"summary": "", "changes": "", "technical": "", "impact": "", "recommendations": ""}
+        prioritized = _get_prioritized(diff_summary)
+        
+        # Progress is written a phase at a time, one write instead of one per line
+        print('\n'.join([
+            f"📊 Detected changes in {diff_summary['total_files']} file(s):",
+            f"   Total: +{diff_summary['total_additions']} -{diff_summary['total_deletions']} lines\n",
+            f"🎯 Priority breakdown:",
+            f"   🔥 Critical (>100 lines): {len(prioritized['critical'])} files",
+            f"   📌 Important (20-100): {len(prioritized['important'])} files",
+            f"   📝 Moderate (5-20): {len(prioritized['moderate'])} files",
+            f"   ✨ Minor (<5): {len(prioritized['minor'])} files\n"
+        ]))
         
-        try:
-            for idx, chunk in enumerate(context_chunks):
-                print(f"   Processing chunk {idx + 1}/{len(context_chunks)} ({len(chunk):,} chars)...")
+        # A handful of changed lines is documented from the counts alone, without the LLM
+        if diff_summary['total_additions'] + diff_summary['total_deletions'] < FAST_PATH_CHANGES:
+            print("⚡ Small change set, documenting it without the LLM\n")
+            analysis_data = create_fallback_documentation(diff_summary)
+        else:
+            # Create chunked context for multi-pass generation
+            print("📦 Creating intelligent chunks for LLM...")
+            context_chunks = _create_chunked_context_for_documentation(diff_summary)
+            print(f"✅ Created {len(context_chunks)} chunk(s) for processing\n")
+            
+            # Use LLM to analyze changes (multi-pass if needed)
+            print("🤖 Generating documentation with AI...")
+            try:
+                # The same chunks on the same model were documented before: reuse that analysis
+                cache_key = _analysis_key(context_chunks)
+                analysis_data = _cached_analysis(cache_key)
+                if analysis_data is not None:
+                    print("🎯 cache hit")
+                else:
+                    analysis_data = {"summary": "", "changes": "", "technical": "", "impact": "", "recommendations": ""}
+                    print('\n'.join(
+                        f"   Processing chunk {idx + 1}/{len(context_chunks)} ({len(chunk):,} chars)..."
+                        for idx, chunk in enumerate(context_chunks)
+                    ))
+                    
+                    # The chunks are independent, so they are generated in one batch
+                    chunk_results = _generate_documentation_chunks(context_chunks, diff_summary)
+                    
+                    # Later chunks only add to changes, joined once after the loop
+                    changes_parts = []
+                    for idx, chunk_result in enumerate(chunk_results):
+                        if chunk_result:
+                            # Merge results
+                            if idx == 0:
+                                # First chunk has main sections
+                                analysis_data["summary"] = chunk_result.get("summary", "")
+                                analysis_data["changes"] = chunk_result.get("changes", "")
+                                analysis_data["technical"] = chunk_result.get("technical", "")
+                                analysis_data["impact"] = chunk_result.get("impact", "")
+                                analysis_data["recommendations"] = chunk_result.get("recommendations", "")
+                            else:
+                                # Subsequent chunks append to changes
+                                additional = chunk_result.get("changes", "") or chunk_result.get("summary", "")
+                                if additional:
+                                    changes_parts.append(additional)
+                    if changes_parts:
+                        analysis_data["changes"] = "\n\n".join([analysis_data["changes"]] + changes_parts)
+                    
+                    # Only real LLM output is cached, never a run where every chunk failed
+                    if any(chunk_results):
+                        _store_analysis(cache_key, analysis_data)
                 
-                chunk_result = _generate_documentation_with_llm(context_chunks, idx, len(context_chunks), diff_summary)
+                # Validate and fill missing sections
+                progress = ["🔍 Validating documentation sections..."]
+                analysis_data = _validate_and_fill_sections(analysis_data, diff_summary)
                 
-                if chunk_result:
-                    # Merge results
-                    if idx == 0:
-                        # First chunk has main sections
-                        analysis_data["summary"] = chunk_result.get("summary", "")
-                        analysis_data["changes"] = chunk_result.get("changes", "")
-                        analysis_data["technical"] = chunk_result.get("technical", "")
-                        analysis_data["impact"] = chunk_result.get("impact", "")
-                        analysis_data["recommendations"] = chunk_result.get("recommendations", "")
-                    else:
-                        # Subsequent chunks append to changes
-                        additional = chunk_result.get("changes", "") or chunk_result.get("summary", "")
-                        if additional:
-                            analysis_data["changes"] += "\n\n" + additional
-            
-            # Validate and fill missing sections
-            print("🔍 Validating documentation sections...")
-            analysis_data = _validate_and_fill_sections(analysis_data, diff_summary)
-            
-            # Final check
-            missing_sections = [k for k, v in analysis_data.items() if not v or len(v) < 30]
-            if missing_sections:
-                print(f"⚠ Filled missing sections: {', '.join(missing_sections)}")
-            
-            print("✅ Documentation generated and validated successfully\n")
-            
-        except Exception as e:
-            print(f"⚠️  LLM Error: {str(e)}")
-            analysis_data = create_fallback_documentation(diff_summary)
+                # Final check
+                missing_sections = [k for k, v in analysis_data.items() if not v or len(v) < 30]
+                if missing_sections:
+                    progress.append(f"⚠ Filled missing sections: {', '.join(missing_sections)}")
+                
+                progress.append("✅ Documentation generated and validated successfully\n")
+                print('\n'.join(progress))
+                
+            except Exception as e:
+                print(f"⚠️  LLM Error: {str(e)}")
+                analysis_data = create_fallback_documentation(diff_summary)
         
         # Generate PDF
         print("📄 Generating PDF documentation...")
-        pdf_path = os.path.abspath(output_file)
-        doc = SimpleDocTemplate(pdf_path, pagesize=letter,
-                               topMargin=0.75*inch, bottomMargin=0.75*inch,
-                               leftMargin=0.75*inch, rightMargin=0.75*inch)
-        
-        # Container for PDF elements
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=28,
-            textColor=colors.HexColor('#1a237e'),
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            fontName='Helvetica-Bold'
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#0d47a1'),
-            spaceAfter=10,
-            spaceBefore=16,
-            fontName='Helvetica-Bold',
-            borderWidth=0,
-            borderColor=colors.HexColor('#0d47a1'),
-            borderPadding=5,
-            backColor=colors.HexColor('#e3f2fd')
-        )
-        
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['BodyText'],
-            fontSize=11,
-            leading=16,
-            spaceAfter=10,
-            alignment=TA_LEFT,
-            fontName='Helvetica',
-            textColor=colors.HexColor('#212121')
-        )
-        
-        # Title Page
-        story.append(Spacer(1, 1.5*inch))
-        story.append(Paragraph("📚 Version Control", title_style))
-        story.append(Paragraph("Documentation Report", title_style))
-        story.append(Spacer(1, 0.5*inch))
-        
-        # Info table
-        info_data = [
-            ['Repository:', repo_name],
-            ['Branch:', current_branch],
-            ['Analysis Type:', diff_type.title()],
-            ['Generated:', datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-            ['Files Changed:', str(diff_summary['total_files'])],
-            ['Lines Added:', f"+{diff_summary['total_additions']}"],
-            ['Lines Deleted:', f"-{diff_summary['total_deletions']}"]
-        ]
-        
-        info_table = Table(info_data, colWidths=[2*inch, 4*inch])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e3f2fd')),
-            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#0d47a1')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 11),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#90caf9')),
-            ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ]))
-        
-        story.append(info_table)
-        story.append(PageBreak())
-        
-        # Table of Contents
-        story.append(Paragraph("📋 Table of Contents", heading_style))
-        story.append(Spacer(1, 0.2*inch))
-        toc_items = [
-            "1. Executive Summary",
-            "2. Files Changed",
-            "3. Detailed Changes Analysis",
-            "4. Technical Implementation",
-            "5. Business Impact",
-            "6. Future Recommendations"
-        ]
-        for item in toc_items:
-            story.append(Paragraph(f"   {item}", body_style))
-        story.append(PageBreak())
-        
-        # 1. Executive Summary
-        story.append(Paragraph("1. 📊 Executive Summary", heading_style))
-        story.append(Spacer(1, 0.15*inch))
-        if analysis_data.get("summary"):
-            for para in analysis_data["summary"].split('\n\n'):
-                if para.strip():
-                    safe_para = para.strip().replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    story.append(Paragraph(safe_para, body_style))
-                    story.append(Spacer(1, 0.12*inch))
-        else:
-            story.append(Paragraph("This document provides a comprehensive overview of the recent changes made to the codebase.", body_style))
-        story.append(Spacer(1, 0.4*inch))
-        
-        # 2. Changed Files Summary
-        story.append(Paragraph("2. 📁 Files Changed", heading_style))
-        story.append(Spacer(1, 0.15*inch))
-        
-        # Prepare files for table (using diff_summary structure)
-        if diff_summary['files']:
-            files_data = [['#', 'Priority', 'File Path', 'Changes']]
-            
-            # Add critical files
-            for idx, file_info in enumerate(prioritized['critical'], 1):
-                priority_icon = '🔥'
-                changes = f"+{file_info['additions']}/-{file_info['deletions']}"
-                files_data.append([str(idx), f"{priority_icon} Critical", file_info['file'], changes])
-            
-            # Add important files
-            offset = len(prioritized['critical'])
-            for idx, file_info in enumerate(prioritized['important'], offset + 1):
-                priority_icon = '📌'
-                changes = f"+{file_info['additions']}/-{file_info['deletions']}"
-                files_data.append([str(idx), f"{priority_icon} Important", file_info['file'], changes])
-            
-            # Add some moderate files
-            offset = len(prioritized['critical']) + len(prioritized['important'])
-            for idx, file_info in enumerate(prioritized['moderate'][:10], offset + 1):
-                priority_icon = '📝'
-                changes = f"+{file_info['additions']}/-{file_info['deletions']}"
-                files_data.append([str(idx), f"{priority_icon} Moderate", file_info['file'], changes])
-            
-            files_table = Table(files_data, colWidths=[0.4*inch, 1.1*inch, 3.3*inch, 1.2*inch])
-            files_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0d47a1')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f5f5f5')]),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ]))
-            story.append(files_table)
-            
-            # Add summary of remaining files
-            total_shown = len(prioritized['critical']) + len(prioritized['important']) + min(10, len(prioritized['moderate']))
-            remaining = diff_summary['total_files'] - total_shown
-            
-            if remaining > 0:
-                story.append(Spacer(1, 0.1*inch))
-                story.append(Paragraph(f"<i>... and {remaining} more files (minor changes)</i>", body_style))
-        
-        story.append(Spacer(1, 0.4*inch))
-        
-        # 3. Detailed Changes
-        story.append(Paragraph("3. 🔍 Detailed Changes Analysis", heading_style))
-        story.append(Spacer(1, 0.15*inch))
-        if analysis_data.get("changes"):
-            for para in analysis_data["changes"].split('\n\n'):
-                if para.strip():
-                    safe_para = para.strip().replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    story.append(Paragraph(safe_para, body_style))
-                    story.append(Spacer(1, 0.12*inch))
-        story.append(Spacer(1, 0.4*inch))
-        
-        # 4. Technical Implementation
-        story.append(Paragraph("4. ⚙️ Technical Implementation", heading_style))
-        story.append(Spacer(1, 0.15*inch))
-        if analysis_data.get("technical"):
-            for para in analysis_data["technical"].split('\n\n'):
-                if para.strip():
-                    safe_para = para.strip().replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    story.append(Paragraph(safe_para, body_style))
-                    story.append(Spacer(1, 0.12*inch))
-        story.append(Spacer(1, 0.4*inch))
-        
-        # 5. Business Impact
-        story.append(Paragraph("5. 💼 Business Impact", heading_style))
-        story.append(Spacer(1, 0.15*inch))
-        if analysis_data.get("impact"):
-            for para in analysis_data["impact"].split('\n\n'):
-                if para.strip():
-                    safe_para = para.strip().replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    story.append(Paragraph(safe_para, body_style))
-                    story.append(Spacer(1, 0.12*inch))
-        else:
-            story.append(Paragraph("The changes contribute to improving the overall system functionality and maintainability.", body_style))
-        story.append(Spacer(1, 0.4*inch))
-        
-        # 6. Recommendations
-        story.append(Paragraph("6. 💡 Future Recommendations", heading_style))
-        story.append(Spacer(1, 0.15*inch))
-        if analysis_data.get("recommendations"):
-            for para in analysis_data["recommendations"].split('\n\n'):
-                if para.strip():
-                    safe_para = para.strip().replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    story.append(Paragraph(safe_para, body_style))
-                    story.append(Spacer(1, 0.12*inch))
-        else:
-            story.append(Paragraph("Continue monitoring the changes and ensure proper testing before deployment.", body_style))
-        
-        # Build PDF
-        doc.build(story)
+        # Resolved against the working directory only when not already absolute
+        pdf_path = output_file if os.path.isabs(output_file) else os.path.abspath(output_file)
+        # reportlab and the styles are loaded here, so early exits never pay for them
+        from .documentation_pdf import write_documentation_pdf
+        write_documentation_pdf(pdf_path, analysis_data, diff_summary, prioritized, repo_name, current_branch, diff_type)
         
         return {
             "status": "success",
@@ -1062,11 +1152,6 @@ def generate_version_documentation() -> dict:
             "pdf_path": pdf_path
         }
         
-    except ImportError:
-        return {
-            "status": "error",
-            "message": "❌ reportlab library not installed\n💡 Solution: Install it with: pip install reportlab"
-        }
     except Exception as e:
         return {
             "status": "error",
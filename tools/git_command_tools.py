@@ -1,7 +1,382 @@
 """Basic Git Tools - Simple Git Operations"""
+import os
+import re
+import shutil
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Optional
 from langchain_core.tools import tool
 
+try:
+    import pygit2
+except ImportError:  # Optional in-process repository access
+    pygit2 = None
+
+# git executable, looked up on PATH once; None when git is not installed
+_GIT = shutil.which('git')
+
+# Keyword arguments every git call shares: text output and, on Windows, no console window
+_RUN_KWARGS = {'text': True}
+if os.name == 'nt':
+    _RUN_KWARGS['creationflags'] = subprocess.CREATE_NO_WINDOW
+
+# git call whose output is read, and one where only errors are
+_run = partial(subprocess.run, capture_output=True, **_RUN_KWARGS)
+_run_quiet = partial(subprocess.run, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **_RUN_KWARGS)
+
+# Config files outside any repository that git config and git remote read
+_GLOBAL_CONFIGS = (
+    '/etc/gitconfig',
+    os.path.join(os.path.expanduser('~'), '.gitconfig'),
+    os.path.join(os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config'), 'git', 'config')
+)
+
+
+def _open_repo():
+    """Repository of the working directory through libgit2, None to fall back to git."""
+    if pygit2 is None:
+        return None
+    try:
+        git_dir = pygit2.discover_repository(os.getcwd())
+        return pygit2.Repository(git_dir) if git_dir is not None else None
+    except pygit2.GitError:
+        return None
+
+
+def _current_branch():
+    """Current branch name, '' on a detached HEAD, None outside a repository."""
+    repo = _open_repo()
+    if repo is not None:
+        # HEAD names a branch even before the first commit; detached HEAD has none
+        target = repo.lookup_reference('HEAD').target
+        return target[len('refs/heads/'):] if isinstance(target, str) and target.startswith('refs/heads/') else ''
+    
+    result = _run([_GIT, 'branch', '--show-current'])
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def _read_git_config() -> list:
+    """Every (key, value) git config sees here, read in-process or with one git call."""
+    repo = _open_repo()
+    if repo is not None:
+        # Same levels, order and include handling as git config --list
+        return [(entry.name, entry.value or '') for entry in repo.config]
+    
+    result = _run([_GIT, 'config', '--list', '-z'])
+    entries = []
+    # -z: each entry is "key\nvalue" ended by NUL, a bare boolean key has no value
+    for record in result.stdout.split('\0'):
+        if record:
+            key, _, value = record.partition('\n')
+            entries.append((key, value))
+    return entries
+
+
+def _origin_url(entries: list):
+    """Fetch URL of origin with url.*.insteadOf applied, as git remote get-url reports it."""
+    url = None
+    rewrites = []
+    for key, value in entries:
+        if key == 'remote.origin.url':
+            url = value
+        elif key.startswith('url.') and key.endswith('.insteadof'):
+            rewrites.append((value, key[len('url.'):-len('.insteadof')]))
+    if url is None:
+        return None
+    # The longest matching prefix wins
+    matches = [rewrite for rewrite in rewrites if url.startswith(rewrite[0])]
+    if matches:
+        prefix, base = max(matches, key=lambda rewrite: len(rewrite[0]))
+        url = base + url[len(prefix):]
+    return url
+
+
+def _find_git_root(path: str):
+    """Nearest directory from path upwards holding a .git entry; None outside a repository."""
+    while not os.path.exists(os.path.join(path, '.git')):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+    return path
+
+
+def _find_git_dir(path: str):
+    """Git directory governing path, from the nearest .git upwards; None outside a repository."""
+    root = _find_git_root(path)
+    if root is None:
+        return None
+    dot_git = os.path.join(root, '.git')
+    if os.path.isfile(dot_git):
+        # Worktrees and submodules: .git is a file naming the real git directory
+        with open(dot_git, encoding='utf-8', errors='ignore') as f:
+            content = f.read().strip()
+        if content.startswith('gitdir:'):
+            return os.path.normpath(os.path.join(root, content[len('gitdir:'):].strip()))
+    return dot_git
+
+
+def _mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _repo_state() -> tuple:
+    """Cache key that changes whenever HEAD or a config file git reads here is rewritten."""
+    cwd = os.getcwd()
+    git_dir = _find_git_dir(cwd)
+    watched = list(_GLOBAL_CONFIGS)
+    if git_dir is not None:
+        watched.append(os.path.join(git_dir, 'HEAD'))
+        common_dir = git_dir
+        try:
+            # Linked worktrees keep their config in the main repository's git directory
+            with open(os.path.join(git_dir, 'commondir'), encoding='utf-8') as f:
+                common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+        except OSError:
+            pass
+        watched.append(os.path.join(common_dir, 'config'))
+    return (cwd, git_dir) + tuple(_mtime(path) for path in watched)
+
+
+@lru_cache(maxsize=32)
+def _cached_branch(state: tuple):
+    """_current_branch, reused until HEAD or the config changes."""
+    return _current_branch()
+
+
+@lru_cache(maxsize=32)
+def _cached_config(state: tuple) -> tuple:
+    """_read_git_config, reused until HEAD or the config changes."""
+    return tuple(_read_git_config())
+
+
+# git_status result reused while the index, HEAD and config are untouched; edits to
+# worktree files change none of them, so a result is only trusted this many seconds
+STATUS_CACHE_SECONDS = 2.0
+_status_cache = {}
+
+
+def _invalidate_repo_cache():
+    """Forget cached branch, config and status answers after a tool changed them."""
+    _cached_branch.cache_clear()
+    _cached_config.cache_clear()
+    _status_cache.clear()
+
+
+# Push error classes, tried in one case-insensitive pass over git push's stderr
+_PUSH_ERROR_RE = re.compile(
+    r"(?P<permission>permission denied|\b403\b)"
+    r"|(?P<not_found>repository not found|\b404\b)"
+    r"|(?P<rejected>failed to push.*rejected|rejected.*failed to push)"
+    r"|(?P<no_remote>no remote|does not appear)",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Advice appended to a push failure message, one per error class
+_PUSH_SOLUTION_PERMISSION = """\n
+💡 SOLUTION - Permission Denied:
+   Problem: You don't have access to push to this repository
+   
+   Possible Causes:
+   1. Wrong GitHub account credentials
+   2. Not the repository owner
+   3. Need to authenticate
+   
+   Fix:
+   • Check whose account is configured:
+     git config user.name
+     git config user.email
+   
+   • Update to your GitHub username:
+     git config user.name "YourGitHubUsername"
+     git config user.email "your@email.com"
+   
+   • Clear cached credentials (Windows):
+     In Control Panel > Credential Manager > Windows Credentials
+     Remove any GitHub credentials and try again
+   
+   • Or use Personal Access Token:
+     git remote set-url origin https://YOUR_TOKEN@github.com/username/repo.git"""
+
+_PUSH_SOLUTION_NOT_FOUND = """\n
+💡 SOLUTION - Repository Not Found:
+   • Repository doesn't exist on GitHub
+   • Create it first: https://github.com/new
+   • Then add remote: git remote set-url origin YOUR_REPO_URL"""
+
+_PUSH_SOLUTION_REJECTED = """\n
+💡 SOLUTION - Push Rejected:
+   • Remote has changes you don't have locally
+   • Pull first: git pull origin main
+   • Then push: git push origin main"""
+
+_PUSH_SOLUTION_NO_REMOTE = """\n
+💡 SOLUTION - No Remote Repository:
+   • Add remote URL: git remote add origin YOUR_GITHUB_URL
+   • Get URL from your GitHub repository"""
+
+_PUSH_SOLUTIONS = {
+    'permission': _PUSH_SOLUTION_PERMISSION,
+    'not_found': _PUSH_SOLUTION_NOT_FOUND,
+    'rejected': _PUSH_SOLUTION_REJECTED,
+    'no_remote': _PUSH_SOLUTION_NO_REMOTE
+}
+
+
+# Index size in bytes above which git_status leaves out untracked files by default
+HUGE_REPO_INDEX_BYTES = 10_000_000
+
+# Leads git_status output when the untracked scan was skipped automatically, ahead of
+# the analysis so the compact form the model reads keeps it too
+_UNTRACKED_SKIPPED_NOTE = "ℹ️  Large repo: untracked skipped; call git_status(include_untracked=True) to force"
+
+
+def _huge_repo_threshold() -> int:
+    """AUTOGIT_HUGE_REPO_THRESHOLD overrides HUGE_REPO_INDEX_BYTES"""
+    return int(os.getenv("AUTOGIT_HUGE_REPO_THRESHOLD") or HUGE_REPO_INDEX_BYTES)
+
+
+# libgit2 status walks every file itself, without git's untracked cache and fsmonitor
+# support, so it only replaces git status for indexes up to this many entries
+PYGIT2_STATUS_MAX_ENTRIES = 2000
+
+# libgit2 status flags -> short-format index (X) and worktree (Y) letters
+_INDEX_FLAGS = (
+    ('GIT_STATUS_INDEX_NEW', 'A'),
+    ('GIT_STATUS_INDEX_MODIFIED', 'M'),
+    ('GIT_STATUS_INDEX_DELETED', 'D'),
+    ('GIT_STATUS_INDEX_RENAMED', 'R'),
+    ('GIT_STATUS_INDEX_TYPECHANGE', 'T')
+)
+_WORKTREE_FLAGS = (
+    ('GIT_STATUS_WT_MODIFIED', 'M'),
+    ('GIT_STATUS_WT_DELETED', 'D'),
+    ('GIT_STATUS_WT_RENAMED', 'R'),
+    ('GIT_STATUS_WT_TYPECHANGE', 'T')
+)
+
+
+def _status_codes(flags: int) -> list:
+    """Short-format XY codes git status lists for one file's libgit2 status flags."""
+    if flags & pygit2.GIT_STATUS_CONFLICTED:
+        return ['UU']
+    codes = []
+    x = next((letter for name, letter in _INDEX_FLAGS if flags & getattr(pygit2, name)), ' ')
+    y = next((letter for name, letter in _WORKTREE_FLAGS if flags & getattr(pygit2, name)), ' ')
+    if x + y != '  ':
+        codes.append(x + y)
+    # A path deleted from the index but still on disk is listed twice, as D and ??
+    if flags & pygit2.GIT_STATUS_WT_NEW:
+        codes.append('??')
+    return codes
+
+
+def _status_entries_pygit2(repo, untracked: bool = True) -> list:
+    """(XY, path) per changed file as git status lists them, read through libgit2."""
+    try:
+        status = repo.status(untracked_files='normal' if untracked else 'no')
+    except TypeError:  # pygit2 before 1.14 always lists untracked files one by one
+        status = repo.status()
+    entries = [(code, path) for path, flags in status.items()
+               if not flags & pygit2.GIT_STATUS_IGNORED
+               for code in _status_codes(flags)
+               if untracked or code != '??']
+    # Tracked changes by path first, untracked files after them
+    return sorted(entries, key=lambda entry: (entry[0] == '??', entry[1]))
+
+
+# Short-format XY codes of unmerged paths
+_UNMERGED_CODES = ('DD', 'AU', 'UD', 'UA', 'DU', 'AA', 'UU')
+
+# Short-format XY code (index, worktree) -> how git_status explains it
+_STATUS_LABELS = {
+    '??': "🆕 Untracked",
+    'M ': "✏️  Modified (staged)",
+    ' M': "✏️  Modified (not staged)",
+    'MM': "✏️  Modified (staged and not staged)",
+    'A ': "➕ Added",
+    'AM': "➕ Added (modified since staging)",
+    'D ': "❌ Deleted",
+    ' D': "❌ Deleted (not staged)",
+    'R ': "🔀 Renamed",
+    'RM': "🔀 Renamed (modified since staging)",
+    'C ': "📋 Copied",
+    ' T': "🔧 Type changed (not staged)",
+    'T ': "🔧 Type changed (staged)",
+    # Unmerged paths
+    **dict.fromkeys(_UNMERGED_CODES, "⚔️  Conflict")
+}
+
+# Label for any other XY combination, such as a file copied and then modified
+_OTHER_STATUS_LABEL = "ℹ️  Other change"
+
+
+def _parse_porcelain_v2(output: str) -> list:
+    """(XY, path) per entry of git status --porcelain=v2 -z, XY in the --short spelling."""
+    entries = []
+    records = iter(output.split('\0'))
+    for record in records:
+        kind = record[:1]
+        if kind == '1':
+            # 1 XY sub mH mI mW hH hI path
+            fields = record.split(' ', 8)
+            entries.append((fields[1].replace('.', ' '), fields[8]))
+        elif kind == '2':
+            # 2 XY sub mH mI mW hH hI score path, then the original path as its own record
+            fields = record.split(' ', 9)
+            entries.append((fields[1].replace('.', ' '), f"{next(records, '')} -> {fields[9]}"))
+        elif kind == 'u':
+            # u XY sub m1 m2 m3 mW h1 h2 h3 path
+            fields = record.split(' ', 10)
+            entries.append((fields[1], fields[10]))
+        elif kind == '?':
+            entries.append(('??', record[2:]))
+        # '#' headers and '!' ignored entries are not part of the listing
+    return entries
+
+
+def _porcelain_v2_headers(output: str) -> dict:
+    """'# key value' headers git status --porcelain=v2 --branch -z prints before the entries."""
+    headers = {}
+    for record in output.split('\0'):
+        if not record.startswith('# '):
+            break
+        key, _, value = record[2:].partition(' ')
+        headers[key] = value
+    return headers
+
+
+def _git_missing(key: str = "message") -> dict:
+    """Error answer of every tool when git is not installed."""
+    return {"status": "error", key: "❌ Git is not installed or not on PATH\n💡 Install it from https://git-scm.com/downloads"}
+
+
+# Closing question of validate_git_repository's parent repository report
+_PARENT_REPO_CHOICES = (
+    "\n❓ What would you like to do?\n"
+    "   1️⃣  Keep using the parent folder's Git repository\n"
+    "   2️⃣  Initialize a NEW Git repository in the current folder\n"
+    "      (This will create a separate repo for this project only)\n"
+    "\n💡 Recommendation: Initialize a new repository in the current folder\n"
+    "   to keep this project separate from others."
+)
+
+# Rest of git_reinitialize's success message
+_REINITIALIZED_NEXT_STEPS = (
+    "   🔄 This folder now has its own Git repository\n"
+    "   🎯 No remote configured (you'll need to add one before pushing)\n\n"
+    "Next steps:\n"
+    "   1. Create a new repository on GitHub\n"
+    "   2. Add remote: git remote add origin YOUR_REPO_URL\n"
+    "   3. Stage and commit your files\n"
+    "   4. Push to GitHub"
+)
+
 
 @tool
 def git_add(files: str = ".") -> dict:
@@ -13,7 +388,13 @@ def git_add(files: str = ".") -> dict:
     Returns:
         Dictionary with status and message about the staging operation.
     """
-    result = subprocess.run(['git', 'add', files], capture_output=True, text=True)
+    if _GIT is None:
+        return _git_missing()
+    
+    result = _run_quiet([_GIT, 'add', files])
+    _invalidate_repo_cache()
+    if result.returncode != 0:
+        return {"status": "error", "message": f"❌ Failed to stage files: {result.stderr.strip()}"}
     return {"status": "success", "message": f"✅ Files staged: {files}"}
 
 
@@ -27,7 +408,13 @@ def git_branch_rename(new_name: str) -> dict:
     Returns:
         Dictionary with status and message about the branch rename operation.
     """
-    result = subprocess.run(['git', 'branch', '-M', new_name], capture_output=True, text=True)
+    if _GIT is None:
+        return _git_missing()
+    
+    result = _run_quiet([_GIT, 'branch', '-M', new_name])
+    _invalidate_repo_cache()
+    if result.returncode != 0:
+        return {"status": "error", "message": f"❌ Branch rename failed: {result.stderr.strip()}"}
     return {"status": "success", "message": f"✅ Branch renamed to: {new_name}"}
 
 
@@ -41,8 +428,15 @@ def git_remote_add(url: str) -> dict:
     Returns:
         Dictionary with status and message about the remote add operation.
     """
-    subprocess.run(['git', 'remote', 'remove', 'origin'], capture_output=True, text=True)
-    result = subprocess.run(['git', 'remote', 'add', 'origin', url], capture_output=True, text=True)
+    if _GIT is None:
+        return _git_missing()
+    
+    # Point an existing origin at the new URL rather than removing and re-adding it
+    has_origin = any(key == 'remote.origin.url' for key, _ in _cached_config(_repo_state()))
+    result = _run([_GIT, 'remote', 'set-url' if has_origin else 'add', 'origin', url])
+    _invalidate_repo_cache()
+    if result.returncode != 0:
+        return {"status": "error", "message": f"❌ Failed to add remote: {result.stderr.strip()}"}
     return {"status": "success", "message": f"✅ Remote added: {url}"}
 
 
@@ -56,111 +450,130 @@ def git_push(branch: str = "main") -> dict:
     Returns:
         Dictionary with status and message about the push operation.
     """
-    result = subprocess.run(['git', 'push', '-u', 'origin', branch], capture_output=True, text=True)
+    if _GIT is None:
+        return _git_missing()
+    
+    result = _run([_GIT, 'push', '-u', 'origin', branch])
     if result.returncode == 0:
         return {"status": "success", "message": f"✅ Code pushed to origin/{branch}"}
     
     error_msg = result.stderr.strip()
-    solution = ""
-    
-    # Analyze different push errors
-    if "permission denied" in error_msg.lower() or "403" in error_msg:
-        solution = """\n
-💡 SOLUTION - Permission Denied:
-   Problem: You don't have access to push to this repository
-   
-   Possible Causes:
-   1. Wrong GitHub account credentials
-   2. Not the repository owner
-   3. Need to authenticate
-   
-   Fix:
-   • Check whose account is configured:
-     git config user.name
-     git config user.email
-   
-   • Update to your GitHub username:
-     git config user.name "YourGitHubUsername"
-     git config user.email "your@email.com"
-   
-   • Clear cached credentials (Windows):
-     In Control Panel > Credential Manager > Windows Credentials
-     Remove any GitHub credentials and try again
-   
-   • Or use Personal Access Token:
-     git remote set-url origin https://YOUR_TOKEN@github.com/username/repo.git"""
     
-    elif "repository not found" in error_msg.lower() or "404" in error_msg:
-        solution = """\n
-💡 SOLUTION - Repository Not Found:
-   • Repository doesn't exist on GitHub
-   • Create it first: https://github.com/new
-   • Then add remote: git remote set-url origin YOUR_REPO_URL"""
-    
-    elif "failed to push" in error_msg.lower() and "rejected" in error_msg.lower():
-        solution = """\n
-💡 SOLUTION - Push Rejected:
-   • Remote has changes you don't have locally
-   • Pull first: git pull origin main
-   • Then push: git push origin main"""
-    
-    elif "no remote" in error_msg.lower() or "does not appear" in error_msg.lower():
-        solution = """\n
-💡 SOLUTION - No Remote Repository:
-   • Add remote URL: git remote add origin YOUR_GITHUB_URL
-   • Get URL from your GitHub repository"""
+    # Analyze different push errors: one scan of stderr names the matching solution
+    match = _PUSH_ERROR_RE.search(error_msg)
+    solution = _PUSH_SOLUTIONS[match.lastgroup] if match else ""
     
     return {"status": "error", "message": f"❌ Push failed: {error_msg}{solution}"}
 
 
-@tool
-def git_status() -> dict:
-    """Check the current git repository status.
-    
-    Returns:
-        Dictionary with status and output showing current repository state.
-    """
-    result = subprocess.run(['git', 'status', '--short'], capture_output=True, text=True)
-    
-    # If error (not a git repo)
-    if result.returncode != 0:
-        return {
-            "status": "error", 
-            "output": "❌ Not a git repository\n💡 Solution: Run 'git init' to initialize"
-        }
+def _cwd_relative(entries: list, root) -> list:
+    """(XY, path) entries with root-relative paths made relative to the working directory, as --short prints them."""
+    cwd = os.path.realpath(os.getcwd())
+    root = os.path.realpath(root) if root is not None else cwd
+    if root == cwd:
+        return entries
+    
+    def relative(path):
+        rel = os.path.relpath(os.path.join(root, path), cwd).replace(os.sep, '/')
+        # Untracked directories keep their trailing slash
+        return rel + '/' if path.endswith('/') else rel
+    
+    return [(xy, ' -> '.join(map(relative, path.split(' -> '))) if 'R' in xy or 'C' in xy else relative(path))
+            for xy, path in entries]
+
+
+def _status_report(untracked: bool = True) -> dict:
+    """git_status's answer, computed in-process for small indexes or from one git status call."""
+    repo = _open_repo()
+    entries = None
+    if repo is not None and not repo.is_bare and len(repo.index) <= PYGIT2_STATUS_MAX_ENTRIES:
+        try:
+            entries = _status_entries_pygit2(repo, untracked)
+            no_commits = repo.head_is_unborn
+            root = repo.workdir
+        except pygit2.GitError:
+            entries = None
+        # libgit2 status has no rename detection, a staged rename would show as D and A
+        # where git lists it as R old -> new
+        if entries and {xy[0] for xy, _ in entries} >= {'A', 'D'}:
+            entries = None
+    if entries is None:
+        result = _run([_GIT, '--no-optional-locks', 'status', '--porcelain=v2', '--branch', '-z',
+                       '--untracked-files=' + ('normal' if untracked else 'no')])
+        
+        # If error (not a git repo)
+        if result.returncode != 0:
+            return {
+                "status": "error", 
+                "output": "❌ Not a git repository\n💡 Solution: Run 'git init' to initialize"
+            }
+        
+        entries = _parse_porcelain_v2(result.stdout)
+        # --branch reports "(initial)" as the commit of a branch without commits
+        no_commits = _porcelain_v2_headers(result.stdout).get('branch.oid') == '(initial)'
+        root = _find_git_root(os.getcwd())
     
-    status_output = result.stdout.strip()
+    # Porcelain v2 and libgit2 give paths from the repository root, tools take them from here
+    entries = _cwd_relative(entries, root)
     
-    if not status_output:
-        # Check if there are commits
-        log_result = subprocess.run(['git', 'log', '-1'], capture_output=True, text=True)
-        if log_result.returncode != 0:
+    if not entries:
+        if no_commits:
             return {
                 "status": "success", 
                 "output": "✅ Working tree clean (No commits yet)\n💡 Create your first commit!"
             }
         return {"status": "success", "output": "✅ Working tree clean"}
     
-    # Parse and explain status
-    lines = status_output.split('\n')
-    explanation = "\n📊 Status Analysis:\n"
+    status_output = "\n".join(f"{xy} {path}" for xy, path in entries)
     
-    for line in lines[:5]:  # Show first 5 files
-        if line.startswith('??'):
-            explanation += f"   🆕 Untracked: {line[3:]}\n"
-        elif line.startswith('M '):
-            explanation += f"   ✏️  Modified (staged): {line[3:]}\n"
-        elif line.startswith(' M'):
-            explanation += f"   ✏️  Modified (not staged): {line[3:]}\n"
-        elif line.startswith('A '):
-            explanation += f"   ➕ Added: {line[3:]}\n"
-        elif line.startswith('D '):
-            explanation += f"   ❌ Deleted: {line[3:]}\n"
+    # Parse and explain status: one label lookup per shown file
+    explanation = ["\n📊 Status Analysis:\n"]
+    explanation.extend(f"   {_STATUS_LABELS.get(xy, _OTHER_STATUS_LABEL)}: {path}\n"
+                       for xy, path in entries[:5])  # Show first 5 files
     
-    if len(lines) > 5:
-        explanation += f"   ... and {len(lines) - 5} more files\n"
+    if len(entries) > 5:
+        explanation.append(f"   ... and {len(entries) - 5} more files\n")
     
-    return {"status": "success", "output": status_output + explanation}
+    return {"status": "success", "output": status_output + "".join(explanation)}
+
+
+@tool
+def git_status(include_untracked: Optional[bool] = None) -> dict:
+    """Check the current git repository status.
+    
+    Args:
+        include_untracked: Whether to list untracked files. By default they are
+            listed unless the repository is very large.
+    
+    Returns:
+        Dictionary with status and output showing current repository state.
+    """
+    if _GIT is None:
+        return _git_missing("output")
+    
+    state = _repo_state()
+    git_dir = state[1]
+    try:
+        index = os.stat(os.path.join(git_dir, 'index')) if git_dir else None
+    except OSError:
+        index = None
+    
+    # Scanning for untracked files dominates git status in huge worktrees
+    auto_skip = include_untracked is None and index is not None and index.st_size > _huge_repo_threshold()
+    untracked = include_untracked is not False and not auto_skip
+    
+    # Polling again right away, with nothing staged or committed since, skips git
+    key = state + (index.st_mtime_ns if index is not None else None, untracked, auto_skip)
+    cached = _status_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < STATUS_CACHE_SECONDS:
+        return dict(cached[1])
+    
+    report = _status_report(untracked)
+    if auto_skip and report["status"] == "success":
+        report["output"] = f"{_UNTRACKED_SKIPPED_NOTE}\n{report['output']}"
+    _status_cache.clear()
+    _status_cache[key] = (time.monotonic(), report)
+    return dict(report)
 
 
 @tool
@@ -170,7 +583,25 @@ def git_init() -> dict:
     Returns:
         Dictionary with status and message about the initialization.
     """
-    result = subprocess.run(['git', 'init'], capture_output=True, text=True)
+    if _GIT is None:
+        return _git_missing()
+    
+    # Already a repository here: nothing for git init to do
+    if os.path.exists('.git'):
+        return {"status": "success", "message": "✅ Repository already initialized"}
+    
+    if pygit2 is not None:
+        try:
+            pygit2.init_repository(os.getcwd())
+            error = None
+        except pygit2.GitError as e:
+            error = str(e)
+    else:
+        result = _run_quiet([_GIT, 'init'])
+        error = result.stderr.strip() if result.returncode != 0 else None
+    _invalidate_repo_cache()
+    if error is not None:
+        return {"status": "error", "message": f"❌ Failed to initialize repository: {error}"}
     return {"status": "success", "message": "✅ Repository initialized"}
 
 
@@ -181,8 +612,10 @@ def get_branch_info() -> dict:
     Returns:
         Dictionary with status and the current branch name.
     """
-    result = subprocess.run(['git', 'branch', '--show-current'], capture_output=True, text=True)
-    return {"status": "success", "branch": result.stdout.strip() or "main"}
+    if _GIT is None:
+        return _git_missing()
+    
+    return {"status": "success", "branch": _cached_branch(_repo_state()) or "main"}
 
 
 @tool
@@ -192,65 +625,71 @@ def diagnose_git_config() -> dict:
     Returns:
         Dictionary with status, diagnostic message, configuration info, and whether issues were found.
     """
+    if _GIT is None:
+        return _git_missing()
+    
     issues = []
     warnings = []
     config_info = {}
     
+    # One read of the whole config answers the user and remote checks; on a cache
+    # miss the branch query runs on a worker meanwhile instead of after it
+    state = _repo_state()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        branch_future = executor.submit(_cached_branch, state)
+        config = _cached_config(state)
+        current_branch = branch_future.result()
+    values = dict(config)  # Like git config <key>, the last value wins
+    
     # Check user.name
-    name_result = subprocess.run(['git', 'config', 'user.name'], capture_output=True, text=True)
-    if name_result.returncode == 0 and name_result.stdout.strip():
-        config_info['user.name'] = name_result.stdout.strip()
+    if values.get('user.name', '').strip():
+        config_info['user.name'] = values['user.name'].strip()
     else:
         issues.append("❌ Git user.name not configured")
         issues.append("   Fix: git config --global user.name \"Your Name\"")
     
     # Check user.email
-    email_result = subprocess.run(['git', 'config', 'user.email'], capture_output=True, text=True)
-    if email_result.returncode == 0 and email_result.stdout.strip():
-        config_info['user.email'] = email_result.stdout.strip()
+    if values.get('user.email', '').strip():
+        config_info['user.email'] = values['user.email'].strip()
     else:
         issues.append("❌ Git user.email not configured")
         issues.append("   Fix: git config --global user.email \"your@email.com\"")
     
     # Check remote
-    remote_result = subprocess.run(['git', 'remote', 'get-url', 'origin'], capture_output=True, text=True)
-    if remote_result.returncode == 0:
-        config_info['remote.origin'] = remote_result.stdout.strip()
+    remote_url = _origin_url(config)
+    if remote_url is not None:
+        config_info['remote.origin'] = remote_url
     else:
         warnings.append("⚠️  No remote repository configured")
         warnings.append("   Add: git remote add origin YOUR_REPO_URL")
     
     # Check current branch
-    branch_result = subprocess.run(['git', 'branch', '--show-current'], capture_output=True, text=True)
-    if branch_result.returncode == 0:
-        config_info['current.branch'] = branch_result.stdout.strip() or "Not on any branch"
+    if current_branch is not None:
+        config_info['current.branch'] = current_branch or "Not on any branch"
     
     # Build response
-    message = "🔍 Git Configuration Diagnosis:\n\n"
+    parts = ["🔍 Git Configuration Diagnosis:\n\n"]
     
     if config_info:
-        message += "✅ Current Configuration:\n"
-        for key, value in config_info.items():
-            message += f"   • {key}: {value}\n"
-        message += "\n"
+        parts.append("✅ Current Configuration:\n")
+        parts.extend(f"   • {key}: {value}\n" for key, value in config_info.items())
+        parts.append("\n")
     
     if issues:
-        message += "🚨 Critical Issues Found:\n"
-        for issue in issues:
-            message += f"{issue}\n"
-        message += "\n"
+        parts.append("🚨 Critical Issues Found:\n")
+        parts.extend(f"{issue}\n" for issue in issues)
+        parts.append("\n")
     
     if warnings:
-        message += "⚠️  Warnings:\n"
-        for warning in warnings:
-            message += f"{warning}\n"
+        parts.append("⚠️  Warnings:\n")
+        parts.extend(f"{warning}\n" for warning in warnings)
     
     if not issues and not warnings:
-        message += "✅ All configurations look good!\n"
+        parts.append("✅ All configurations look good!\n")
     
     return {
         "status": "success" if not issues else "warning",
-        "message": message,
+        "message": "".join(parts),
         "config": config_info,
         "has_issues": len(issues) > 0
     }
@@ -268,18 +707,18 @@ def validate_git_repository() -> dict:
     Returns:
         Dictionary with validation status, issues found, and recommendations.
     """
-    import os
+    if _GIT is None:
+        return _git_missing()
     
     current_dir = os.getcwd()
     issues = []
     warnings = []
     info = {}
     
-    # Check if Git is initialized
-    git_check = subprocess.run(['git', 'rev-parse', '--is-inside-work-tree'], 
-                              capture_output=True, text=True)
+    # Check if Git is initialized: find the nearest .git without starting git
+    git_root_path = _find_git_root(current_dir)
     
-    if git_check.returncode != 0:
+    if git_root_path is None:
         return {
             "status": "not_initialized",
             "message": "❌ Git is not initialized in this folder or any parent folder.\n💡 Initialize with: git init",
@@ -287,85 +726,70 @@ def validate_git_repository() -> dict:
             "action": "initialize"
         }
     
-    # Get Git root directory
-    git_root = subprocess.run(['git', 'rev-parse', '--show-toplevel'], 
-                             capture_output=True, text=True)
-    
-    if git_root.returncode == 0:
-        git_root_path = git_root.stdout.strip().replace('/', os.sep)
-        info['git_root'] = git_root_path
-        info['current_dir'] = current_dir
+    info['git_root'] = git_root_path
+    info['current_dir'] = current_dir
+    
+    # One cached config read answers both remote checks below
+    remote_url = _origin_url(_cached_config(_repo_state()))
+    
+    # Check if Git root is different from current directory; the root is current_dir
+    # or one of its dirname() parents, so no normalization is needed to compare them
+    if git_root_path != current_dir:
+        issues.append(f"⚠️  Git repository is initialized in a PARENT folder")
+        issues.append(f"   📂 Git Root: {git_root_path}")
+        issues.append(f"   📂 Current Folder: {current_dir}")
+        issues.append("")
+        issues.append("🤔 This means:")
+        issues.append("   • Git is tracking files from the parent folder, not just this project")
+        issues.append("   • Your commits may include unrelated files")
+        issues.append("   • Remote URL might be for a different project")
         
-        # Check if Git root is different from current directory
-        if os.path.normpath(git_root_path) != os.path.normpath(current_dir):
-            issues.append(f"⚠️  Git repository is initialized in a PARENT folder")
-            issues.append(f"   📂 Git Root: {git_root_path}")
-            issues.append(f"   📂 Current Folder: {current_dir}")
+        # Check remote URL
+        if remote_url is not None:
+            info['remote_url'] = remote_url
             issues.append("")
-            issues.append("🤔 This means:")
-            issues.append("   • Git is tracking files from the parent folder, not just this project")
-            issues.append("   • Your commits may include unrelated files")
-            issues.append("   • Remote URL might be for a different project")
-            
-            # Check remote URL
-            remote_result = subprocess.run(['git', 'remote', 'get-url', 'origin'], 
-                                          capture_output=True, text=True)
-            if remote_result.returncode == 0:
-                remote_url = remote_result.stdout.strip()
-                info['remote_url'] = remote_url
-                issues.append("")
-                issues.append(f"   🔗 Current Remote: {remote_url}")
-                
-                # Extract repo name from URL
-                if 'github.com' in remote_url:
-                    repo_name = remote_url.split('/')[-1].replace('.git', '')
-                    issues.append(f"   📦 Remote Repository: {repo_name}")
-            
-            message = "\n".join(issues)
-            message += "\n\n❓ What would you like to do?\n"
-            message += "   1️⃣  Keep using the parent folder's Git repository\n"
-            message += "   2️⃣  Initialize a NEW Git repository in the current folder\n"
-            message += "      (This will create a separate repo for this project only)\n"
-            message += "\n💡 Recommendation: Initialize a new repository in the current folder\n"
-            message += "   to keep this project separate from others."
+            issues.append(f"   🔗 Current Remote: {remote_url}")
             
-            return {
-                "status": "parent_repo_detected",
-                "message": message,
-                "needs_action": True,
-                "action": "reinitialize",
-                "info": info
-            }
+            # Extract repo name from URL
+            if 'github.com' in remote_url:
+                repo_name = remote_url.split('/')[-1].replace('.git', '')
+                issues.append(f"   📦 Remote Repository: {repo_name}")
+        
+        issues.append(_PARENT_REPO_CHOICES)
+        
+        return {
+            "status": "parent_repo_detected",
+            "message": "\n".join(issues),
+            "needs_action": True,
+            "action": "reinitialize",
+            "info": info
+        }
     
     # Check remote configuration
-    remote_result = subprocess.run(['git', 'remote', 'get-url', 'origin'], 
-                                  capture_output=True, text=True)
-    if remote_result.returncode != 0:
+    if remote_url is None:
         warnings.append("⚠️  No remote repository configured")
         warnings.append("💡 You'll need to add a remote before pushing")
     else:
-        info['remote_url'] = remote_result.stdout.strip()
+        info['remote_url'] = remote_url
     
     # All good
     if not issues and not warnings:
-        message = "✅ Git repository is properly configured!\n"
+        parts = ["✅ Git repository is properly configured!\n"]
         if 'remote_url' in info:
-            message += f"   🔗 Remote: {info['remote_url']}\n"
-        message += f"   📂 Repository Root: {info.get('git_root', current_dir)}"
+            parts.append(f"   🔗 Remote: {info['remote_url']}\n")
+        parts.append(f"   📂 Repository Root: {info.get('git_root', current_dir)}")
         return {
             "status": "valid",
-            "message": message,
+            "message": "".join(parts),
             "needs_action": False,
             "info": info
         }
     
     # Only warnings
     if warnings and not issues:
-        message = "✅ Git repository structure is correct\n\n"
-        message += "\n".join(warnings)
         return {
             "status": "valid_with_warnings",
-            "message": message,
+            "message": "✅ Git repository structure is correct\n\n" + "\n".join(warnings),
             "needs_action": False,
             "info": info
         }
@@ -389,27 +813,23 @@ def git_reinitialize() -> dict:
     Returns:
         Dictionary with status and message about reinitialization.
     """
-    import os
+    if _GIT is None:
+        return _git_missing()
     
     current_dir = os.getcwd()
     
     # Initialize new Git repo in current folder
-    result = subprocess.run(['git', 'init'], capture_output=True, text=True, cwd=current_dir)
+    result = _run([_GIT, 'init'], cwd=current_dir)
+    _invalidate_repo_cache()
     
     if result.returncode == 0:
-        message = "✅ Git repository reinitialized successfully!\n\n"
-        message += f"   📂 New Repository Location: {current_dir}\n"
-        message += "   🔄 This folder now has its own Git repository\n"
-        message += "   🎯 No remote configured (you'll need to add one before pushing)\n\n"
-        message += "Next steps:\n"
-        message += "   1. Create a new repository on GitHub\n"
-        message += "   2. Add remote: git remote add origin YOUR_REPO_URL\n"
-        message += "   3. Stage and commit your files\n"
-        message += "   4. Push to GitHub"
-        
         return {
             "status": "success",
-            "message": message
+            "message": "".join([
+                "✅ Git repository reinitialized successfully!\n\n",
+                f"   📂 New Repository Location: {current_dir}\n",
+                _REINITIALIZED_NEXT_STEPS
+            ])
         }
     else:
         return {
@@ -418,6 +838,71 @@ def git_reinitialize() -> dict:
         }
 
 
+@tool
+def get_all_repo_info() -> dict:
+    """Get branch, upstream, remote URL, change counts and user config in one call.
+    
+    Use this instead of calling git_status, get_branch_info, get_remote_url and
+    diagnose_git_config one after another.
+    
+    Returns:
+        Dictionary with status, a summary message and each repository detail.
+    """
+    if _GIT is None:
+        return _git_missing()
+    
+    # Branch, upstream and ahead/behind come in the headers of the status output
+    result = _run([_GIT, '--no-optional-locks', 'status', '--porcelain=v2', '--branch', '-z'])
+    if result.returncode != 0:
+        return {
+            "status": "error",
+            "message": "❌ Not a git repository\n💡 Solution: Run 'git init' to initialize"
+        }
+    
+    headers = _porcelain_v2_headers(result.stdout)
+    entries = _parse_porcelain_v2(result.stdout)
+    config = _cached_config(_repo_state())
+    values = dict(config)
+    
+    branch = headers.get('branch.head')
+    branch = None if branch in (None, '(detached)') else branch
+    upstream = headers.get('branch.upstream')
+    ahead, _, behind = headers.get('branch.ab', '+0 -0').partition(' ')
+    ahead, behind = int(ahead), -int(behind)
+    remote_url = _origin_url(config)
+    
+    conflicted = sum(1 for xy, _ in entries if xy in _UNMERGED_CODES)
+    untracked = sum(1 for xy, _ in entries if xy == '??')
+    staged = sum(1 for xy, _ in entries if xy[0] not in ' ?' and xy not in _UNMERGED_CODES)
+    unstaged = sum(1 for xy, _ in entries if xy[1] not in ' ?' and xy not in _UNMERGED_CODES)
+    
+    tracking = f" → {upstream} (↑{ahead} ↓{behind})" if upstream else " (no upstream)"
+    user = f"{values.get('user.name', '').strip() or 'not set'} <{values.get('user.email', '').strip() or 'not set'}>"
+    message = "\n".join([
+        "📋 Repository Overview:",
+        f"   🌿 Branch: {branch or 'Not on any branch'}{tracking}",
+        f"   🔗 Remote: {remote_url or 'Not configured'}",
+        f"   📊 Changes: {staged} staged, {unstaged} not staged, {untracked} untracked, {conflicted} conflicted",
+        f"   👤 User: {user}"
+    ])
+    
+    return {
+        "status": "success",
+        "message": message,
+        "branch": branch,
+        "upstream": upstream,
+        "ahead": ahead,
+        "behind": behind,
+        "remote_url": remote_url,
+        "staged": staged,
+        "unstaged": unstaged,
+        "untracked": untracked,
+        "conflicted": conflicted,
+        "has_commits": headers.get('branch.oid') != '(initial)',
+        "config": {key: values[key].strip() for key in ('user.name', 'user.email') if values.get(key, '').strip()}
+    }
+
+
 @tool
 def get_remote_url() -> dict:
     """Get the remote origin URL of the repository.
@@ -425,9 +910,12 @@ def get_remote_url() -> dict:
     Returns:
         Dictionary with status and the remote origin URL, or error message if not found.
     """
-    result = subprocess.run(['git', 'remote', 'get-url', 'origin'], capture_output=True, text=True)
-    if result.returncode == 0:
-        return {"status": "success", "url": result.stdout.strip()}
+    if _GIT is None:
+        return _git_missing()
+    
+    url = _origin_url(_cached_config(_repo_state()))
+    if url is not None:
+        return {"status": "success", "url": url}
     return {
         "status": "error", 
         "url": None, 
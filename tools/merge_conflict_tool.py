@@ -1,17 +1,55 @@
 """Advanced Merge Conflict Resolution Tool - Refactored for Better UX"""
 import subprocess
 import os
+import sys
+import ast
+import difflib
+import json
+import mmap
 import re
+from string import Template
 from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
 from enum import Enum
-from dotenv import load_dotenv
 from langchain_core.tools import tool
-from langchain_huggingface import HuggingFacePipeline
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
-import torch
+from .git_command_tools import _UNMERGED_CODES, _parse_porcelain_v2, _porcelain_v2_headers
+from .runtime import default_model_id, generate_after_prefix, get_llm, llm_backend, load_env
 
-load_dotenv()
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+load_env()
+
+
+# Markdown fences and leftover conflict marker lines stripped from LLM merge output
+_FENCE_OPEN_RE = re.compile(r'^```[\w]*\n', re.MULTILINE)
+_FENCE_CLOSE_RE = re.compile(r'\n```$')
+_MARKER_LINE_RE = re.compile(r'^(?:<{7}.*?|={7}|>{7}.*?)\n', re.MULTILINE)
+
+# Any line starting a conflict, base, separator or end marker, and line ends, in raw file bytes
+_MARKER_RE = re.compile(rb'^(?:<{7}|\|{7}|={7}|>{7}).*', re.MULTILINE)
+_NEWLINE_RE = re.compile(rb'\n')
+
+# Data formats checked with their parser once the whole file is resolved
+_DATA_EXTENSIONS = ('.json', '.toml', '.yaml', '.yml')
+
+# Generation budgets: a 2-3 sentence analysis, and the smallest merge (see _merge_budget)
+_ANALYSIS_MAX_NEW_TOKENS = 120
+_MERGE_MIN_NEW_TOKENS = 64
+
+# Text after which the model has moved past its answer, generation stops there
+_ANALYSIS_STOP = ("\n\nFILE:", "```")
+_MERGE_STOP = ("\n\nFILE:",)
+
+# Sides at least this similar are taken as the same change, the incoming one is kept
+_NEAR_IDENTICAL_RATIO = 0.98
+
+# Analysis of a conflict whose sides only differ in surrounding whitespace
+_EQUIVALENT_ANALYSIS = "Both versions are identical apart from surrounding whitespace, so either one can be kept."
 
 
 class ResolutionStrategy(Enum):
@@ -22,7 +60,11 @@ class ResolutionStrategy(Enum):
     BOTH = "both"
 
 
-@dataclass
+# Strategy name accepted by resolve_conflicts -> strategy
+_STRATEGIES = {strategy.value: strategy for strategy in ResolutionStrategy}
+
+
+@dataclass(slots=True)
 class ConflictRegion:
     """Represents a single conflict region in a file"""
     file_path: str
@@ -33,74 +75,61 @@ class ConflictRegion:
     current_content: List[str]
     incoming_content: List[str]
     base_content: List[str]
+    file_ext: str = ''  # Lowercased extension of file_path, computed once per file
+    start_byte: int = 0  # Offsets of the conflict in the file, from its first marker to the end of its last
+    end_byte: int = 0
+    # Joined sections, built once since every prompt and check reads them
+    current_text: str = field(init=False, repr=False, compare=False)
+    incoming_text: str = field(init=False, repr=False, compare=False)
+    base_text: str = field(init=False, repr=False, compare=False)
     
-    @property
-    def current_text(self) -> str:
-        return '\n'.join(self.current_content)
-    
-    @property
-    def incoming_text(self) -> str:
-        return '\n'.join(self.incoming_content)
-    
-    @property
-    def base_text(self) -> str:
-        return '\n'.join(self.base_content)
+    def __post_init__(self):
+        self.current_text = '\n'.join(self.current_content)
+        self.incoming_text = '\n'.join(self.incoming_content)
+        self.base_text = '\n'.join(self.base_content)
 
 
 class GitOperations:
     """Handles all Git-related operations"""
     
-    @staticmethod
-    def get_conflicted_files() -> List[str]:
+    def __init__(self):
+        self._status = None  # (headers, entries) of one git status call, for this tool call
+    
+    def _read_status(self) -> Tuple[dict, list]:
+        """Branch headers and entries of git status, read once per instance"""
+        if self._status is None:
+            result = subprocess.run(
+                ['git', '--no-optional-locks', 'status', '--porcelain=v2', '--branch', '-z', '--untracked-files=no'],
+                capture_output=True,
+                text=True,
+                encoding='utf-8',
+                errors='ignore'
+            )
+            output = result.stdout if result.returncode == 0 else ''
+            self._status = (_porcelain_v2_headers(output), _parse_porcelain_v2(output))
+        return self._status
+    
+    def get_conflicted_files(self) -> List[str]:
         """Get list of files with merge conflicts"""
-        result = subprocess.run(
-            ['git', 'diff', '--name-only', '--diff-filter=U'],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        if result.returncode == 0 and result.stdout.strip():
-            return result.stdout.strip().split('\n')
-        return []
+        return [path for xy, path in self._read_status()[1] if xy in _UNMERGED_CODES]
     
-    @staticmethod
-    def has_conflicts() -> bool:
+    def has_conflicts(self) -> bool:
         """Check if repository has any merge conflicts"""
-        status_result = subprocess.run(
-            ['git', 'status', '--porcelain'],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        conflict_markers = ['UU', 'AA', 'DD', 'AU', 'UA', 'DU', 'UD']
-        return any(
-            line.startswith(tuple(conflict_markers)) 
-            for line in status_result.stdout.strip().split('\n') 
-            if line
-        )
+        return bool(self.get_conflicted_files())
     
     @staticmethod
-    def stage_file(file_path: str) -> bool:
-        """Stage a resolved file"""
+    def stage_files(file_paths: List[str]) -> bool:
+        """Stage resolved files with one git add"""
         result = subprocess.run(
-            ['git', 'add', file_path],
+            ['git', 'add', '--', *file_paths],
             capture_output=True
         )
         return result.returncode == 0
     
-    @staticmethod
-    def get_branch_names() -> Tuple[str, str]:
+    def get_branch_names(self) -> Tuple[str, str]:
         """Get current and incoming branch names"""
-        # Get current branch
-        current = subprocess.run(
-            ['git', 'rev-parse', '--abbrev-ref', 'HEAD'],
-            capture_output=True,
-            text=True
-        ).stdout.strip()
+        # Current branch, "(detached)" when HEAD is not on a branch
+        current = self._read_status()[0].get('branch.head', '')
         
         # Try to get merge head
         incoming = "MERGE_HEAD"
@@ -120,117 +149,151 @@ class ConflictParser:
     def parse_file(file_path: str) -> List[ConflictRegion]:
         """Parse all conflict regions in a file"""
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return []  # An empty file cannot be mapped
+                # Mapped, not read: only the conflict sections are ever copied and decoded
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                    if content.find(b'<<<<<<<') == -1:
+                        return []
+                    return ConflictParser._parse_content(content, file_path)
         except Exception as e:
             raise ValueError(f"Failed to read file {file_path}: {e}")
-        
-        return ConflictParser._parse_content(content, file_path)
     
     @staticmethod
-    def _parse_content(content: str, file_path: str) -> List[ConflictRegion]:
-        """Parse conflict markers from content"""
+    def _parse_content(content, file_path: str) -> List[ConflictRegion]:
+        """Parse conflict markers from UTF-8 content (bytes or a mapping), visiting only the marker lines"""
+        file_path = sys.intern(file_path)
+        file_ext = os.path.splitext(file_path)[1].lower()
         conflicts = []
-        lines = content.split('\n')
-        i = 0
-        
-        while i < len(lines):
-            if lines[i].startswith('<<<<<<<'):
-                conflict = ConflictParser._parse_single_conflict(lines, i, file_path)
-                if conflict:
-                    conflicts.append(conflict)
-                    i = conflict.end_line
-            i += 1
+        region = None  # Open conflict: its fields so far and the section being read
+        line_no = 0
+        pos = 0
+        
+        for match in _MARKER_RE.finditer(content):
+            line_no += len(_NEWLINE_RE.findall(content, pos, match.start()))
+            pos = match.start()
+            marker = match.group().decode('utf-8', errors='ignore')
+            
+            if region is None:
+                if marker[0] == '<':
+                    region = {
+                        'start_line': line_no,
+                        'start_byte': match.start(),
+                        'current_branch': marker.replace('<<<<<<< ', '').strip(),
+                        'section': 'current_content',
+                        'section_start': match.end() + 1
+                    }
+                continue
+            
+            section = region['section']
+            if section == 'current_content' and marker[0] in '|=' or section == 'base_content' and marker[0] == '=':
+                next_section = 'base_content' if marker[0] == '|' else 'incoming_content'
+            elif section == 'incoming_content' and marker[0] == '>':
+                next_section = None
+            else:
+                continue  # Any other marker line is part of the section's text
+            
+            region[section] = _section_lines(content[region['section_start']:match.start()])
+            if next_section is not None:
+                region['section'] = next_section
+                region['section_start'] = match.end() + 1
+                continue
+            
+            conflicts.append(ConflictParser._region(file_path, file_ext, region, line_no, match.end(),
+                                                    marker.replace('>>>>>>> ', '').strip()))
+            region = None
+        
+        if region is not None:
+            # Unterminated conflict: its last section runs to the end of the file
+            start = region['section_start']
+            tail = content[start:].decode('utf-8', errors='ignore')
+            region[region['section']] = tail.split('\n') if start <= len(content) else []
+            end_line = line_no + len(_NEWLINE_RE.findall(content, pos)) + 1
+            conflicts.append(ConflictParser._region(file_path, file_ext, region, end_line, len(content), "MERGE_HEAD"))
         
         return conflicts
     
     @staticmethod
-    def _parse_single_conflict(lines: List[str], start: int, file_path: str) -> Optional[ConflictRegion]:
-        """Parse a single conflict region"""
-        current_branch = lines[start].replace('<<<<<<< ', '').strip()
-        current_content = []
-        incoming_content = []
-        base_content = []
-        
-        i = start + 1
-        
-        # Parse current branch content
-        while i < len(lines) and not lines[i].startswith('=======') and not lines[i].startswith('|||||||'):
-            current_content.append(lines[i])
-            i += 1
-        
-        # Check for diff3 style (with base)
-        if i < len(lines) and lines[i].startswith('|||||||'):
-            i += 1
-            while i < len(lines) and not lines[i].startswith('======='):
-                base_content.append(lines[i])
-                i += 1
-        
-        # Skip separator
-        if i < len(lines) and lines[i].startswith('======='):
-            i += 1
-        
-        # Parse incoming content
-        while i < len(lines) and not lines[i].startswith('>>>>>>>'):
-            incoming_content.append(lines[i])
-            i += 1
-        
-        # Get incoming branch name
-        incoming_branch = "MERGE_HEAD"
-        if i < len(lines) and lines[i].startswith('>>>>>>>'):
-            incoming_branch = lines[i].replace('>>>>>>> ', '').strip()
-        
+    def _region(file_path: str, file_ext: str, region: dict, end_line: int, end_byte: int, incoming_branch: str) -> ConflictRegion:
+        """ConflictRegion from the fields collected while scanning its markers"""
         return ConflictRegion(
             file_path=file_path,
-            start_line=start,
-            end_line=i,
-            current_branch=current_branch,
-            incoming_branch=incoming_branch,
-            current_content=current_content,
-            incoming_content=incoming_content,
-            base_content=base_content
+            file_ext=file_ext,
+            start_line=region['start_line'],
+            end_line=end_line,
+            # Interned, regions of a merge share the same few names
+            current_branch=sys.intern(region['current_branch']),
+            incoming_branch=sys.intern(incoming_branch),
+            current_content=region.get('current_content', []),
+            incoming_content=region.get('incoming_content', []),
+            base_content=region.get('base_content', []),
+            start_byte=region['start_byte'],
+            end_byte=end_byte
         )
 
 
-class AIAnalyzer:
-    """Handles AI-powered conflict analysis"""
+def _section_lines(data: bytes) -> List[str]:
+    """Lines of a section that ends just before a marker line"""
+    return data.decode('utf-8', errors='ignore').split('\n')[:-1]
+
+
+def _conflict_key(conflict: ConflictRegion) -> tuple:
+    """Both sides and the file type, so repeated conflict blocks share one analysis and merge"""
+    return conflict.current_text, conflict.incoming_text, conflict.file_ext
+
+
+def _trivial_merge(conflict: ConflictRegion) -> Optional[str]:
+    """Resolution that needs no LLM: equivalent or near-identical sides, or one empty side"""
+    current, incoming = conflict.current_text, conflict.incoming_text
+    if current.strip() == incoming.strip() or not current.strip():
+        return incoming
+    if not incoming.strip():
+        return current
     
-    def __init__(self):
-        model_id = os.getenv("HF_MODEL_ID", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
-        tokenizer = AutoTokenizer.from_pretrained(model_id)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_id,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None,
-            low_cpu_mem_usage=True
-        )
-        pipe = pipeline(
-            "text-generation",
-            model=model,
-            tokenizer=tokenizer,
-            max_new_tokens=500,
-            temperature=0.1,
-            top_k=50,
-            do_sample=True
-        )
-        self.llm = HuggingFacePipeline(pipeline=pipe)
+    # Cheap upper bounds first, the full ratio only for closely matching sides
+    matcher = difflib.SequenceMatcher(None, current, incoming, autojunk=False)
+    if (matcher.real_quick_ratio() > _NEAR_IDENTICAL_RATIO and matcher.quick_ratio() > _NEAR_IDENTICAL_RATIO
+            and matcher.ratio() > _NEAR_IDENTICAL_RATIO):
+        return incoming
+    return None
+
+
+def _merge_budget(conflict: ConflictRegion) -> int:
+    """New tokens for a merge: 4 per word of both sides, rounded up to a power of two.
     
-    def analyze_conflict(self, conflict: ConflictRegion) -> str:
-        """
-        Analyze a conflict and explain the differences.
-        CRITICAL: Only returns explanation, NEVER generates code.
-        """
-        file_ext = os.path.splitext(conflict.file_path)[1]
-        
-        prompt = f"""You are analyzing a merge conflict. Your job is to EXPLAIN the differences, NOT to write code.
+    Not capped, a merge keeping both sides must never be cut short and then written back.
+    """
+    words = len(conflict.current_text.split()) + len(conflict.incoming_text.split())
+    budget = _MERGE_MIN_NEW_TOKENS
+    # Few distinct budgets keep the number of cached pipelines small
+    while budget < 4 * words:
+        budget *= 2
+    return budget
+
+
+def _cut_at_stop(text: str, stop: tuple) -> str:
+    """Text before the first stop string, which some backends leave in their output"""
+    for marker in stop:
+        text = text.split(marker, 1)[0]
+    return text
 
-FILE: {conflict.file_path} ({file_ext})
 
-CURRENT BRANCH ({conflict.current_branch}):
-{conflict.current_text}
+# Prompt templates, parsed once at import; the conflict context leads so its KV cache is shared
+_CONTEXT_PROMPT = Template("""You are working on a merge conflict between two branches.
 
-INCOMING BRANCH ({conflict.incoming_branch}):
-{conflict.incoming_text}
+FILE: $file_path ($file_ext)
+
+CURRENT BRANCH ($current_branch):
+$current_text
+
+INCOMING BRANCH ($incoming_branch):
+$incoming_text
+
+""")
+
+# Task appended to the conflict context to get an explanation only
+_ANALYSIS_TASK = """Your job is to EXPLAIN the differences, NOT to write code.
 
 Provide a 2-3 sentence analysis covering:
 1. What does the CURRENT version do?
@@ -240,35 +303,159 @@ Provide a 2-3 sentence analysis covering:
 DO NOT generate any code. DO NOT suggest a resolution. ONLY explain what changed.
 Keep it concise and clear."""
 
+# Task appended to the conflict context to get the merged code, in parts around the analysis
+# so that local weights tokenize the fixed ones only once
+_MERGE_TASK_HEAD = """You are merging the two versions into one valid implementation.
+
+CONTEXT: """
+_MERGE_TASK_RULES = """
+
+TASK: Create ONE valid merged version that intelligently combines both.
+
+RULES:
+1. Output ONLY the merged code, NO explanations or markdown.
+2. Ensure syntax is 100% valid.
+3. If both versions do the same thing differently, choose the better one.
+4. If they provide different functionality, preserve both if it makes sense.
+5. If merging both creates invalid code (e.g., duplicate returns), choose the better version.
+6. Remove any conflict markers (<<<<<<<, =======, >>>>>>>).
+7. Maintain proper indentation and formatting.
+8. Do NOT introduce new functions, classes, or variables that are not in either version.
+9. If uncertain, prefer the incoming version exactly as written.
+10. Do NOT include backticks or markdown formatting.
+11. Preserve indentation correctly for Python/YAML code.
+12. Use original Function name don't create new name like merged_code, or resolved_code and etc.
+
+Merged code:"""
+
+# Standalone prompt asking to repair a merge that does not parse
+_FIX_PROMPT = Template("""The following merged code has a syntax error. Fix it.
+
+FILE TYPE: $file_ext
+ERROR: $error
+
+BROKEN CODE:
+```
+$broken_code
+```
+
+ORIGINAL VERSIONS FOR REFERENCE:
+CURRENT:
+```
+$current_text
+```
+
+INCOMING:
+```
+$incoming_text
+```
+
+Fix the syntax error and output ONLY the corrected code, NO explanations.
+
+Fixed code:""")
+
+
+def _conflict_context(conflict: ConflictRegion) -> str:
+    """Prompt prefix shared by a conflict's analysis and merge, so its KV cache can be reused"""
+    return _CONTEXT_PROMPT.substitute(
+        file_path=conflict.file_path,
+        file_ext=conflict.file_ext,
+        current_branch=conflict.current_branch,
+        current_text=conflict.current_text,
+        incoming_branch=conflict.incoming_branch,
+        incoming_text=conflict.incoming_text
+    )
+
+
+def _generate_in_context(llm, conflict: ConflictRegion, task: tuple, max_new_tokens: int, stop: tuple):
+    """Response to the conflict's context followed by a task, given as the parts of its text"""
+    context = _conflict_context(conflict)
+    if llm_backend() == "transformers":
         try:
-            response = self.llm.invoke(prompt)
-            return response.content.strip() if response.content else "Unable to analyze."
+            # Local weights: the context is prefilled once for both the analysis and the merge
+            return generate_after_prefix(default_model_id(), context, task,
+                                         max_new_tokens=max_new_tokens, temperature=0.0, do_sample=False,
+                                         stop=stop)
         except Exception as e:
-            return f"Analysis failed: {str(e)}"
+            print(f"   ⚠️  Prefix cache unavailable ({e}), using the pipeline")
+    return llm.invoke(context + ''.join(task))
+
+
+class AIAnalyzer:
+    """Handles AI-powered conflict analysis"""
+    
+    def __init__(self):
+        # Shared runtime: the weights are loaded once and reused by every caller;
+        # greedy decoding, the same conflict always gets the same explanation
+        self.llm = get_llm(default_model_id(), max_new_tokens=_ANALYSIS_MAX_NEW_TOKENS,
+                           temperature=0.0, do_sample=False, stop=_ANALYSIS_STOP)
+        self._analyses = {}  # _conflict_key -> analysis, for this run
+    
+    def analyze_conflict(self, conflict: ConflictRegion) -> str:
+        """
+        Analyze a conflict and explain the differences.
+        CRITICAL: Only returns explanation, NEVER generates code.
+        """
+        return self.analyze_conflicts_batch([conflict])[0]
+    
+    def analyze_conflicts_batch(self, conflicts: List[ConflictRegion], share_prefix: bool = False) -> List[str]:
+        """Analyze several conflicts with one batched LLM call, in order
+        
+        With share_prefix and local weights, conflicts are analyzed one by one
+        instead through the prefix cache; call it with the one conflict about
+        to be merged so its context is still cached when the merge runs.
+        """
+        # Only distinct conflicts whose sides really differ reach the LLM
+        pending = {}
+        for conflict in conflicts:
+            key = _conflict_key(conflict)
+            if key in self._analyses or key in pending:
+                continue
+            if conflict.current_text.strip() == conflict.incoming_text.strip():
+                self._analyses[key] = _EQUIVALENT_ANALYSIS
+            else:
+                pending[key] = conflict
+        
+        if not pending:
+            results = []
+        elif share_prefix and llm_backend() == "transformers":
+            results = [self._analysis_text(self._analyze_in_context(conflict)) for conflict in pending.values()]
+        else:
+            responses = self.llm.batch([self._analysis_prompt(conflict) for conflict in pending.values()],
+                                       return_exceptions=True)
+            results = [self._analysis_text(response) for response in responses]
+        self._analyses.update(zip(pending, results))
+        
+        return [self._analyses[_conflict_key(conflict)] for conflict in conflicts]
+    
+    def _analyze_in_context(self, conflict: ConflictRegion):
+        """Response to one analysis prompt, or the exception it raised"""
+        try:
+            return _generate_in_context(self.llm, conflict, (_ANALYSIS_TASK,), _ANALYSIS_MAX_NEW_TOKENS,
+                                        _ANALYSIS_STOP)
+        except Exception as e:
+            return e
+    
+    @staticmethod
+    def _analysis_prompt(conflict: ConflictRegion) -> str:
+        """Prompt asking for an explanation of one conflict"""
+        return _conflict_context(conflict) + _ANALYSIS_TASK
+    
+    @staticmethod
+    def _analysis_text(response) -> str:
+        """Analysis text of one batched response, or why there is none"""
+        if isinstance(response, Exception):
+            return f"Analysis failed: {str(response)}"
+        # Pipeline LLMs return plain text, chat models a message
+        content = _cut_at_stop(getattr(response, 'content', response) or "", _ANALYSIS_STOP)
+        return content.strip() or "Unable to analyze."
 
 
 class IntelligentMerger:
     """Uses LLM to intelligently merge both versions"""
     
     def __init__(self):
-        model_id = os.getenv("HF_MODEL_ID", "TinyLlama/TinyLlama-1.1B-Chat-v1.0")
-        tokenizer = AutoTokenizer.from_pretrained(model_id)
-        model = AutoModelForCausalLM.from_pretrained(
-            model_id,
-            torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-            device_map="auto" if torch.cuda.is_available() else None,
-            low_cpu_mem_usage=True
-        )
-        pipe = pipeline(
-            "text-generation",
-            model=model,
-            tokenizer=tokenizer,
-            max_new_tokens=1000,
-            temperature=0.1,
-            top_k=50,
-            do_sample=True
-        )
-        self.llm = HuggingFacePipeline(pipeline=pipe)
+        self._merges = {}  # _conflict_key -> (merged_code, is_valid), for this run
     
     def merge_both(self, conflict: ConflictRegion, analysis: str, max_retries: int = 2) -> Tuple[str, bool]:
         """
@@ -283,40 +470,26 @@ class IntelligentMerger:
         Returns:
             Tuple of (merged_code, is_valid)
         """
-        file_ext = os.path.splitext(conflict.file_path)[1]
-        
-        prompt = f"""You are merging two versions of code into one valid implementation.
-
-            FILE: {conflict.file_path} ({file_ext})
-            CONTEXT: {analysis}
-
-            CURRENT VERSION:
-            {conflict.current_text}
-
-            INCOMING VERSION:
-            {conflict.incoming_text}
-
-            TASK: Create ONE valid merged version that intelligently combines both.
-
-            RULES:
-            1. Output ONLY the merged code, NO explanations or markdown.
-            2. Ensure syntax is 100% valid.
-            3. If both versions do the same thing differently, choose the better one.
-            4. If they provide different functionality, preserve both if it makes sense.
-            5. If merging both creates invalid code (e.g., duplicate returns), choose the better version.
-            6. Remove any conflict markers (<<<<<<<, =======, >>>>>>>).
-            7. Maintain proper indentation and formatting.
-            8. Do NOT introduce new functions, classes, or variables that are not in either version.
-            9. If uncertain, prefer the incoming version exactly as written.
-            10. Do NOT include backticks or markdown formatting.
-            11. Preserve indentation correctly for Python/YAML code.
-            12. Use original Function name don't create new name like merged_code, or resolved_code and etc.
-
-            Merged code:"""
+        trivial = _trivial_merge(conflict)
+        if trivial is not None:
+            print("   ✓ Versions are equivalent or one side is empty, no AI merge needed")
+            return trivial, True
+        
+        key = _conflict_key(conflict)
+        if key not in self._merges:
+            self._merges[key] = self._merge_with_llm(conflict, analysis, max_retries)
+        return self._merges[key]
+    
+    def _merge_with_llm(self, conflict: ConflictRegion, analysis: str, max_retries: int) -> Tuple[str, bool]:
+        """Merge both versions with the LLM, then fix syntax errors by reflection"""
+        task = (_MERGE_TASK_HEAD, analysis, _MERGE_TASK_RULES)
 
         try:
-            response = self.llm.invoke(prompt)
-            merged = response.content.strip() if response.content else None
+            response = _generate_in_context(self._llm(conflict), conflict, task, _merge_budget(conflict),
+                                            _MERGE_STOP)
+            # Pipeline LLMs return plain text, chat models a message
+            content = getattr(response, 'content', response)
+            merged = content.strip() if content else None
             
             if not merged:
                 return conflict.incoming_text, False
@@ -325,7 +498,7 @@ class IntelligentMerger:
             merged = self._clean_output(merged)
             
             # Validate syntax
-            is_valid, error = SyntaxValidator.validate(conflict.file_path, merged)
+            is_valid, error = SyntaxValidator.validate_ext(conflict.file_ext, merged)
             
             # If invalid, try to fix it with reflection
             retry_count = 0
@@ -334,8 +507,8 @@ class IntelligentMerger:
                 print(f"   ⚠️  Syntax error detected, attempting fix (attempt {retry_count}/{max_retries})...")
                 print(f"   Error: {error}")
                 
-                merged = self._fix_syntax_error(conflict, merged, error, file_ext)
-                is_valid, error = SyntaxValidator.validate(conflict.file_path, merged)
+                merged = self._fix_syntax_error(conflict, merged, error)
+                is_valid, error = SyntaxValidator.validate_ext(conflict.file_ext, merged)
             
             if is_valid:
                 return merged.strip(), True
@@ -347,45 +520,34 @@ class IntelligentMerger:
             print(f"⚠️  LLM merge failed: {e}")
             return conflict.incoming_text, False
     
+    @staticmethod
+    def _llm(conflict: ConflictRegion):
+        """Shared runtime LLM with the conflict's merge budget, greedy so a conflict always gets the same merge"""
+        return get_llm(default_model_id(), max_new_tokens=_merge_budget(conflict),
+                       temperature=0.0, do_sample=False, stop=_MERGE_STOP)
+    
     def _clean_output(self, code: str) -> str:
         """Clean LLM output of markdown and conflict markers"""
-        code = re.sub(r'^```[\w]*\n', '', code, flags=re.MULTILINE)
-        code = re.sub(r'\n```$', '', code)
-        code = re.sub(r'^<{7}.*?\n', '', code, flags=re.MULTILINE)
-        code = re.sub(r'^={7}\n', '', code, flags=re.MULTILINE)
-        code = re.sub(r'^>{7}.*?\n', '', code, flags=re.MULTILINE)
+        code = _cut_at_stop(code, _MERGE_STOP)
+        code = _FENCE_OPEN_RE.sub('', code)
+        code = _FENCE_CLOSE_RE.sub('', code)
+        code = _MARKER_LINE_RE.sub('', code)
         return code.strip()
     
-    def _fix_syntax_error(self, conflict: ConflictRegion, broken_code: str, error: str, file_ext: str) -> str:
+    def _fix_syntax_error(self, conflict: ConflictRegion, broken_code: str, error: str) -> str:
         """Use LLM to fix syntax error in merged code"""
-        fix_prompt = f"""The following merged code has a syntax error. Fix it.
-
-FILE TYPE: {file_ext}
-ERROR: {error}
-
-BROKEN CODE:
-```
-{broken_code}
-```
-
-ORIGINAL VERSIONS FOR REFERENCE:
-CURRENT:
-```
-{conflict.current_text}
-```
-
-INCOMING:
-```
-{conflict.incoming_text}
-```
-
-Fix the syntax error and output ONLY the corrected code, NO explanations.
-
-Fixed code:"""
+        fix_prompt = _FIX_PROMPT.substitute(
+            file_ext=conflict.file_ext,
+            error=error,
+            broken_code=broken_code,
+            current_text=conflict.current_text,
+            incoming_text=conflict.incoming_text
+        )
         
         try:
-            response = self.llm.invoke(fix_prompt)
-            fixed = response.content.strip() if response.content else broken_code
+            response = self._llm(conflict).invoke(fix_prompt)
+            content = getattr(response, 'content', response)
+            fixed = content.strip() if content else broken_code
             return self._clean_output(fixed)
         except:
             return broken_code
@@ -398,7 +560,8 @@ class SyntaxValidator:
     def validate_python(code: str) -> Tuple[bool, Optional[str]]:
         """Validate Python syntax"""
         try:
-            compile(code, '<string>', 'exec')
+            # Parsing alone finds syntax errors, without building bytecode
+            ast.parse(code)
             return True, None
         except SyntaxError as e:
             return False, f"Line {e.lineno}: {e.msg}"
@@ -406,10 +569,32 @@ class SyntaxValidator:
             return False, str(e)
     
     @staticmethod
-    def validate(file_path: str, code: str) -> Tuple[bool, Optional[str]]:
+    def validate_data(ext: str, code: str) -> Tuple[bool, Optional[str]]:
+        """Validate a whole JSON, TOML or YAML document"""
+        try:
+            if ext == '.json':
+                json.loads(code)
+            elif ext == '.toml' and tomllib:
+                tomllib.loads(code)
+            elif ext in ('.yaml', '.yml'):
+                # Imported here, only resolving a YAML file needs PyYAML
+                try:
+                    import yaml
+                except ImportError:
+                    return True, None
+                yaml.safe_load(code)
+            return True, None
+        except Exception as e:
+            return False, str(e)
+    
+    @staticmethod
+    def validate(file_path: str, code: str, whole_file: bool = False) -> Tuple[bool, Optional[str]]:
         """Validate syntax based on file type"""
-        ext = os.path.splitext(file_path)[1].lower()
-        
+        return SyntaxValidator.validate_ext(os.path.splitext(file_path)[1].lower(), code, whole_file)
+    
+    @staticmethod
+    def validate_ext(ext: str, code: str, whole_file: bool = False) -> Tuple[bool, Optional[str]]:
+        """Validate syntax for a lowercased file extension"""
         if ext == '.py':
             return SyntaxValidator.validate_python(code)
         
@@ -417,12 +602,24 @@ class SyntaxValidator:
         if not code.strip():
             return False, "Resolved content is empty"
         
+        # Data files only parse as a whole, a resolved region on its own rarely does
+        if whole_file and ext in _DATA_EXTENSIONS:
+            return SyntaxValidator.validate_data(ext, code)
+        
         return True, None
 
 
 class ConflictResolver:
     """Handles conflict resolution strategies"""
     
+    # Strategy -> resolution of one conflict, (resolved_code, is_valid)
+    _DISPATCH = {
+        ResolutionStrategy.CURRENT: lambda self, conflict, analysis: (conflict.current_text, True),
+        ResolutionStrategy.INCOMING: lambda self, conflict, analysis: (conflict.incoming_text, True),
+        # Intelligent LLM-based merging with self-correction
+        ResolutionStrategy.BOTH: lambda self, conflict, analysis: self.intelligent_merger.merge_both(conflict, analysis)
+    }
+    
     def __init__(self):
         self.intelligent_merger = IntelligentMerger()
         self.syntax_validator = SyntaxValidator()
@@ -433,18 +630,10 @@ class ConflictResolver:
         Returns:
             Tuple of (resolved_code, is_valid)
         """
-        if strategy == ResolutionStrategy.CURRENT:
-            return conflict.current_text, True
-        
-        elif strategy == ResolutionStrategy.INCOMING:
-            return conflict.incoming_text, True
-        
-        elif strategy == ResolutionStrategy.BOTH:
-            # Use intelligent LLM-based merging with self-correction
-            return self.intelligent_merger.merge_both(conflict, analysis)
-        
-        else:
+        resolution = self._DISPATCH.get(strategy)
+        if resolution is None:
             raise ValueError(f"Unknown strategy: {strategy}")
+        return resolution(self, conflict, analysis)
     
     def apply_resolution(self, file_path: str, conflicts: List[ConflictRegion], 
                         resolutions: List[str]) -> Tuple[bool, Optional[str]]:
@@ -457,99 +646,115 @@ class ConflictResolver:
             Tuple of (success, error_message)
         """
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-            
-            lines = content.split('\n')
-            resolved_lines = []
-            last_line = 0
+            content = Path(file_path).read_bytes()
             
+            # Resolutions spliced in at the parsed offsets, the rest of the file is kept byte for byte
+            parts = []
+            cursor = 0
             for conflict, resolution in zip(conflicts, resolutions):
-                # Add lines before conflict
-                resolved_lines.extend(lines[last_line:conflict.start_line])
-                # Add resolved content
-                resolved_lines.extend(resolution.split('\n'))
-                # Move past conflict
-                last_line = conflict.end_line + 1
-            
-            # Add remaining lines
-            resolved_lines.extend(lines[last_line:])
-            
-            # Create the final content
-            resolved_content = '\n'.join(resolved_lines)
+                parts.append(content[cursor:conflict.start_byte])
+                parts.append(resolution.encode('utf-8'))
+                cursor = conflict.end_byte
+            parts.append(content[cursor:])
+            resolved_bytes = b''.join(parts)
+            resolved_content = resolved_bytes.decode('utf-8', errors='ignore')
             
             # Final validation before writing
-            is_valid, error = self.syntax_validator.validate(file_path, resolved_content)
+            is_valid, error = self.syntax_validator.validate(file_path, resolved_content, whole_file=True)
             if not is_valid:
                 return False, f"Final validation failed: {error}"
             
-            # Write back
-            with open(file_path, 'w', encoding='utf-8', newline='') as f:
-                f.write(resolved_content)
+            # Write back, only once the whole text is known to be valid
+            Path(file_path).write_bytes(resolved_bytes)
             
             return True, None
         except Exception as e:
             return False, f"Failed to apply resolution: {e}"
 
 
+# Rules framing the conflict reports
+_RULE = "=" * 80
+_THIN_RULE = "─" * 80
+
+# Closing part of get_merge_conflicts' report
+_RESOLUTION_OPTIONS = (
+    f"\n{_RULE}\n💡 RESOLUTION OPTIONS\n{_RULE}\n\n"
+    "Choose a strategy for ALL conflicts:\n\n"
+    "1️⃣  resolve_conflicts('current')\n"
+    "    → Keep all CURRENT branch changes\n\n"
+    "2️⃣  resolve_conflicts('incoming')\n"
+    "    → Accept all INCOMING branch changes\n\n"
+    "3️⃣  resolve_conflicts('both') 🤖 AI-POWERED\n"
+    "    → Intelligently merge both versions using AI\n"
+    "    → Validates syntax before applying\n"
+    "    → Best for combining different features\n\n"
+    "4️⃣  Manual resolution\n"
+    "    → Edit files directly, then: git add <file>\n\n"
+    f"{_RULE}"
+)
+
+# Closing part of the resolution summary when nothing failed
+_RESOLVED_NEXT_STEPS = (
+    "\n\n✅ All conflicts resolved successfully!\n\n"
+    "💡 Next steps:\n"
+    "   1. Review changes: git diff --cached\n"
+    "   2. Commit: git commit -m 'Resolved merge conflicts'"
+)
+
+
 class ConflictFormatter:
     """Formats conflict information for display"""
     
     @staticmethod
     def format_conflict_display(conflict: ConflictRegion, conflict_num: int, 
-                               total: int, analysis: str) -> str:
-        """Format a single conflict for user review"""
-        output = []
-        output.append("=" * 80)
-        output.append(f"📄 FILE: {conflict.file_path}")
-        output.append(f"🔢 CONFLICT {conflict_num} of {total}")
-        output.append("=" * 80)
-        output.append("")
+                               total: int, analysis: str, output: List[str]) -> None:
+        """Append a single conflict for user review to output, a report joined with newlines"""
+        output.append(f"{_RULE}\n📄 FILE: {conflict.file_path}\n🔢 CONFLICT {conflict_num} of {total}\n{_RULE}\n")
         
         # Current version
-        output.append(f"📌 CURRENT ({conflict.current_branch}):")
-        output.append("─" * 80)
-        output.append(conflict.current_text if conflict.current_text.strip() else "(empty)")
-        output.append("")
+        current = conflict.current_text if conflict.current_text.strip() else "(empty)"
+        output.append(f"📌 CURRENT ({conflict.current_branch}):\n{_THIN_RULE}\n{current}\n")
         
         # Incoming version
-        output.append(f"📥 INCOMING ({conflict.incoming_branch}):")
-        output.append("─" * 80)
-        output.append(conflict.incoming_text if conflict.incoming_text.strip() else "(empty)")
-        output.append("")
+        incoming = conflict.incoming_text if conflict.incoming_text.strip() else "(empty)"
+        output.append(f"📥 INCOMING ({conflict.incoming_branch}):\n{_THIN_RULE}\n{incoming}\n")
         
         # AI Analysis
-        output.append("🤖 AI ANALYSIS:")
-        output.append("─" * 80)
-        output.append(analysis)
-        output.append("")
-        
-        return "\n".join(output)
+        output.append(f"🤖 AI ANALYSIS:\n{_THIN_RULE}\n{analysis}\n")
     
     @staticmethod
     def format_summary(total_files: int, total_conflicts: int, 
                       resolved: int, failed: int) -> str:
         """Format resolution summary"""
-        output = []
-        output.append("")
-        output.append("=" * 80)
-        output.append("📊 RESOLUTION SUMMARY")
-        output.append("=" * 80)
-        output.append(f"Total Files: {total_files}")
-        output.append(f"Total Conflicts: {total_conflicts}")
-        output.append(f"✅ Resolved: {resolved}")
-        output.append(f"❌ Failed: {failed}")
-        output.append("=" * 80)
-        
-        if failed == 0:
-            output.append("")
-            output.append("✅ All conflicts resolved successfully!")
-            output.append("")
-            output.append("💡 Next steps:")
-            output.append("   1. Review changes: git diff --cached")
-            output.append("   2. Commit: git commit -m 'Resolved merge conflicts'")
-        
-        return "\n".join(output)
+        summary = (
+            f"\n{_RULE}\n📊 RESOLUTION SUMMARY\n{_RULE}\n"
+            f"Total Files: {total_files}\n"
+            f"Total Conflicts: {total_conflicts}\n"
+            f"✅ Resolved: {resolved}\n"
+            f"❌ Failed: {failed}\n"
+            f"{_RULE}"
+        )
+        return summary + _RESOLVED_NEXT_STEPS if failed == 0 else summary
+
+
+# Most files parsed at the same time, reading files mostly waits on the disk
+PARSE_MAX_WORKERS = 8
+
+
+def _parse_or_error(file_path: str) -> Tuple[str, object]:
+    """(file, conflict regions), or (file, exception) when it could not be parsed"""
+    try:
+        return file_path, ConflictParser.parse_file(file_path)
+    except Exception as e:
+        return file_path, e
+
+
+def _parse_conflicted_files(file_paths: List[str]) -> List[Tuple[str, object]]:
+    """_parse_or_error of every file, in order, reading several files at once"""
+    if len(file_paths) <= 1:
+        return [_parse_or_error(file_path) for file_path in file_paths]
+    with ThreadPoolExecutor(max_workers=min(PARSE_MAX_WORKERS, len(file_paths))) as executor:
+        return list(executor.map(_parse_or_error, file_paths))
 
 
 @tool
@@ -568,13 +773,15 @@ def get_merge_conflicts() -> dict:
         Detailed conflict information with AI analysis
     """
     try:
-        if not GitOperations.has_conflicts():
+        # One git status call answers both checks
+        git_ops = GitOperations()
+        if not git_ops.has_conflicts():
             return {
                 "status": "success",
                 "message": "✅ No merge conflicts detected"
             }
         
-        conflicted_files = GitOperations.get_conflicted_files()
+        conflicted_files = git_ops.get_conflicted_files()
         if not conflicted_files:
             return {
                 "status": "success",
@@ -582,61 +789,30 @@ def get_merge_conflicts() -> dict:
             }
         
         analyzer = AIAnalyzer()
-        all_conflicts = []
         total_conflicts = 0
         
-        output = []
-        output.append("")
-        output.append("=" * 80)
-        output.append("🔍 MERGE CONFLICTS DETECTED")
-        output.append("=" * 80)
-        output.append(f"Files with conflicts: {len(conflicted_files)}")
-        output.append("")
+        # Report blocks, joined with newlines once at the end
+        output = [f"\n{_RULE}\n🔍 MERGE CONFLICTS DETECTED\n{_RULE}\nFiles with conflicts: {len(conflicted_files)}\n"]
         
-        for file_path in conflicted_files:
-            try:
-                conflicts = ConflictParser.parse_file(file_path)
+        parsed = _parse_conflicted_files(conflicted_files)
+        
+        # Every conflict of every file is analyzed in one batched LLM call
+        analyses = iter(analyzer.analyze_conflicts_batch(
+            [conflict for _, conflicts in parsed if not isinstance(conflicts, Exception) for conflict in conflicts]
+        ))
+        
+        for file_path, conflicts in parsed:
+            if isinstance(conflicts, Exception):
+                output.append(f"❌ Error analyzing {file_path}: {conflicts}")
+                continue
+            
+            for idx, conflict in enumerate(conflicts, 1):
+                total_conflicts += 1
+                analysis = next(analyses)
                 
-                for idx, conflict in enumerate(conflicts, 1):
-                    total_conflicts += 1
-                    analysis = analyzer.analyze_conflict(conflict)
-                    
-                    display = ConflictFormatter.format_conflict_display(
-                        conflict, idx, len(conflicts), analysis
-                    )
-                    output.append(display)
-                    
-                    all_conflicts.append({
-                        'file': file_path,
-                        'number': idx,
-                        'analysis': analysis
-                    })
-                    
-            except Exception as e:
-                output.append(f"❌ Error analyzing {file_path}: {e}")
-        
-        output.append("")
-        output.append("=" * 80)
-        output.append("💡 RESOLUTION OPTIONS")
-        output.append("=" * 80)
-        output.append("")
-        output.append("Choose a strategy for ALL conflicts:")
-        output.append("")
-        output.append("1️⃣  resolve_conflicts('current')")
-        output.append("    → Keep all CURRENT branch changes")
-        output.append("")
-        output.append("2️⃣  resolve_conflicts('incoming')")
-        output.append("    → Accept all INCOMING branch changes")
-        output.append("")
-        output.append("3️⃣  resolve_conflicts('both') 🤖 AI-POWERED")
-        output.append("    → Intelligently merge both versions using AI")
-        output.append("    → Validates syntax before applying")
-        output.append("    → Best for combining different features")
-        output.append("")
-        output.append("4️⃣  Manual resolution")
-        output.append("    → Edit files directly, then: git add <file>")
-        output.append("")
-        output.append("=" * 80)
+                ConflictFormatter.format_conflict_display(conflict, idx, len(conflicts), analysis, output)
+        
+        output.append(_RESOLUTION_OPTIONS)
         
         return {
             "status": "success",
@@ -668,9 +844,8 @@ def resolve_conflicts(strategy: str) -> dict:
     """
     try:
         # Validate strategy
-        try:
-            strat = ResolutionStrategy(strategy.lower())
-        except ValueError:
+        strat = _STRATEGIES.get(strategy.lower())
+        if strat is None:
             return {
                 "status": "error",
                 "message": f"❌ Invalid strategy: {strategy}\n"
@@ -684,7 +859,7 @@ def resolve_conflicts(strategy: str) -> dict:
                           "then choose: current, incoming, or both"
             }
         
-        conflicted_files = GitOperations.get_conflicted_files()
+        conflicted_files = GitOperations().get_conflicted_files()
         if not conflicted_files:
             return {
                 "status": "success",
@@ -697,6 +872,7 @@ def resolve_conflicts(strategy: str) -> dict:
         total_conflicts = 0
         resolved_count = 0
         failed_files = []
+        written = []  # (file, conflicts) written back, staged together at the end
         
         print(f"\n🔧 Resolving conflicts with strategy: {strategy.upper()}")
         if strat == ResolutionStrategy.BOTH:
@@ -705,30 +881,43 @@ def resolve_conflicts(strategy: str) -> dict:
         else:
             print()
         
-        for file_path in conflicted_files:
+        parsed = _parse_conflicted_files(conflicted_files)
+        
+        # Local weights analyze each conflict right before its merge, which then reuses
+        # the context's KV cache however many conflicts there are
+        interleave = strat == ResolutionStrategy.BOTH and llm_backend() == "transformers"
+        
+        # Analyses for 'both' strategy, every file's conflicts in one batched LLM call;
+        # trivial conflicts are merged without the LLM and need none
+        if strat == ResolutionStrategy.BOTH and analyzer and not interleave:
+            regions = [conflict for _, conflicts in parsed if not isinstance(conflicts, Exception)
+                       for conflict in conflicts if _trivial_merge(conflict) is None]
+            if regions:
+                print(f"🔍 Analyzing {len(regions)} conflict(s)...")
+                # Memoized by the analyzer, read back per conflict below
+                analyzer.analyze_conflicts_batch(regions)
+        
+        for file_path, conflicts in parsed:
+            if isinstance(conflicts, Exception):
+                failed_files.append((file_path, str(conflicts)))
+                print(f"❌ {file_path}: {str(conflicts)}")
+                continue
+            
             try:
-                conflicts = ConflictParser.parse_file(file_path)
                 total_conflicts += len(conflicts)
                 
-                # Get analyses for 'both' strategy
-                analyses = []
-                if strat == ResolutionStrategy.BOTH and analyzer:
-                    print(f"🔍 Analyzing {file_path}...")
-                    for conflict in conflicts:
-                        analysis = analyzer.analyze_conflict(conflict)
-                        analyses.append(analysis)
-                else:
-                    analyses = [""] * len(conflicts)
-                
                 # Apply strategy to all conflicts
                 print(f"🔧 Resolving {len(conflicts)} conflict(s) in {file_path}...")
                 
                 resolutions = []
                 all_valid = True
                 
-                for idx, (conflict, analysis) in enumerate(zip(conflicts, analyses), 1):
+                for idx, conflict in enumerate(conflicts, 1):
+                    analysis = ""
                     if strat == ResolutionStrategy.BOTH:
                         print(f"   Conflict {idx}/{len(conflicts)}: Merging...")
+                        if _trivial_merge(conflict) is None:
+                            analysis = analyzer.analyze_conflicts_batch([conflict], share_prefix=interleave)[0]
                     
                     resolved_code, is_valid = resolver.resolve(conflict, strat, analysis)
                     resolutions.append(resolved_code)
@@ -741,14 +930,10 @@ def resolve_conflicts(strategy: str) -> dict:
                 success, error = resolver.apply_resolution(file_path, conflicts, resolutions)
                 
                 if success:
-                    if GitOperations.stage_file(file_path):
-                        resolved_count += len(conflicts)
-                        print(f"✅ {file_path}: Resolved {len(conflicts)} conflict(s)")
-                        if strat == ResolutionStrategy.BOTH and all_valid:
-                            print(f"   ✓ All merges validated successfully")
-                    else:
-                        failed_files.append((file_path, "Failed to stage"))
-                        print(f"❌ {file_path}: Failed to stage")
+                    written.append((file_path, len(conflicts)))
+                    print(f"✅ {file_path}: Resolved {len(conflicts)} conflict(s)")
+                    if strat == ResolutionStrategy.BOTH and all_valid:
+                        print(f"   ✓ All merges validated successfully")
                 else:
                     failed_files.append((file_path, error))
                     print(f"❌ {file_path}: {error}")
@@ -757,6 +942,15 @@ def resolve_conflicts(strategy: str) -> dict:
                 failed_files.append((file_path, str(e)))
                 print(f"❌ {file_path}: {str(e)}")
         
+        # Every resolved file is staged with one git add
+        if written:
+            if GitOperations.stage_files([file_path for file_path, _ in written]):
+                resolved_count += sum(count for _, count in written)
+                print(f"📦 Staged {len(written)} resolved file(s)")
+            else:
+                failed_files.extend((file_path, "Failed to stage") for file_path, _ in written)
+                print("❌ Failed to stage the resolved files")
+        
         # Build detailed summary
         summary_parts = []
         summary_parts.append(ConflictFormatter.format_summary(
@@ -771,7 +965,7 @@ def resolve_conflicts(strategy: str) -> dict:
             summary_parts.append("\n\n❌ Failed Files:")
             for file_path, error in failed_files:
                 summary_parts.append(f"\n   • {file_path}")
-                summary_parts.append(f"     Reason: {error}")
+                summary_parts.append(f"\n     Reason: {error}")
         
         return {
             "status": "success" if not failed_files else "partial",
@@ -0,0 +1,217 @@
+"""Shared Model Runtime - Load each local model once per process"""
+import os
+from functools import lru_cache
+
+DEFAULT_MODEL_ID = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+
+# Prompt prefixes whose KV cache is kept for later continuations
+PREFIX_CACHE_SIZE = 16
+
+
+@lru_cache(maxsize=None)
+def load_env() -> bool:
+    """Load .env into the environment, once per process"""
+    from dotenv import load_dotenv
+    return load_dotenv()
+
+
+def default_model_id() -> str:
+    """Model configured through HF_MODEL_ID, or the default one"""
+    return os.getenv("HF_MODEL_ID", DEFAULT_MODEL_ID)
+
+
+def llm_backend() -> str:
+    """LLM_BACKEND: "transformers" (default), "vllm" (in-process), "llama_cpp" (GGUF file) or "server" (vllm serve, TGI)"""
+    return os.getenv("LLM_BACKEND", "transformers").lower()
+
+
+def llm_server_url() -> str:
+    """LLM_SERVER_URL: base URL of the OpenAI-compatible server, a local vllm serve by default"""
+    return os.getenv("LLM_SERVER_URL", "http://localhost:8000/v1")
+
+
+def quantization():
+    """HF_QUANTIZATION: int8 or int4 (bitsandbytes NF4) or, with vLLM, a method such as awq"""
+    return os.getenv("HF_QUANTIZATION", "").lower() or None
+
+
+def _torch_dtype(torch):
+    """bfloat16 where the GPU supports it, float16 on other GPUs, float32 on CPU"""
+    if not torch.cuda.is_available():
+        return torch.float32
+    return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+
+
+@lru_cache(maxsize=None)
+def load_model(model_id: str) -> tuple:
+    """Load the tokenizer and weights of a model, reused by every caller"""
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    kwargs = {}
+    if quantization() == "int8":
+        from transformers import BitsAndBytesConfig
+        kwargs["quantization_config"] = BitsAndBytesConfig(load_in_8bit=True)
+    elif quantization() == "int4":
+        from transformers import BitsAndBytesConfig
+        # 4-bit NF4 weights, matrix products still run in the device's half precision
+        kwargs["quantization_config"] = BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_compute_dtype=_torch_dtype(torch)
+        )
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id, use_fast=True)
+    # Batched generation pads prompts on the left, next to where decoding continues
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+    model = AutoModelForCausalLM.from_pretrained(
+        model_id,
+        torch_dtype=_torch_dtype(torch),
+        device_map="auto" if torch.cuda.is_available() else None,
+        low_cpu_mem_usage=True,
+        **kwargs
+    )
+    model.eval()
+    if torch.cuda.is_available() and "quantization_config" not in kwargs:
+        # Fused kernels for the many short generations; bitsandbytes weights stay eager.
+        # The default mode keeps no CUDA graphs, whose reused output buffers would
+        # overwrite the cached prefix keys and values. Only forward is compiled,
+        # generate and pipeline still see the model's own class
+        model.forward = torch.compile(model.forward, fullgraph=False)
+    return tokenizer, model
+
+
+def _sampling_kwargs(temperature: float, top_k: int, do_sample: bool) -> dict:
+    """Sampling settings for generate, or plain greedy decoding"""
+    if not do_sample:
+        return {"do_sample": False, "num_beams": 1}
+    return {"do_sample": True, "temperature": temperature, "top_k": top_k}
+
+
+@lru_cache(maxsize=None)
+def _stopping_kwargs(model_id: str, stop: tuple) -> dict:
+    """stopping_criteria ending generation once the text ends with one of the stop strings"""
+    if not stop:
+        return {}
+    from transformers import StoppingCriteriaList, StopStringCriteria
+
+    tokenizer, _ = load_model(model_id)
+    return {"stopping_criteria": StoppingCriteriaList([StopStringCriteria(tokenizer, list(stop))])}
+
+
+@lru_cache(maxsize=16)
+def get_pipeline(model_id: str, max_new_tokens: int, temperature: float,
+                 top_k: int = 50, do_sample: bool = True, stop: tuple = ()):
+    """Text-generation pipeline over the shared weights, one per generation setting"""
+    from transformers import pipeline
+
+    tokenizer, model = load_model(model_id)
+    return pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=tokenizer,
+        max_new_tokens=max_new_tokens,
+        pad_token_id=tokenizer.pad_token_id,
+        **_sampling_kwargs(temperature, top_k, do_sample),
+        **_stopping_kwargs(model_id, stop)
+    )
+
+
+@lru_cache(maxsize=16)
+def get_llm(model_id: str, max_new_tokens: int, temperature: float,
+            top_k: int = 50, do_sample: bool = True, stop: tuple = ()):
+    """LangChain LLM for the configured backend, built once per generation setting
+
+    Generation ends early at any of the stop strings; the transformers backend keeps it in the text.
+    """
+    if llm_backend() == "vllm":
+        from langchain_community.llms import VLLM
+        return VLLM(
+            model=model_id,
+            max_new_tokens=max_new_tokens,
+            temperature=temperature if do_sample else 0.0,
+            top_k=top_k,
+            dtype="bfloat16",
+            stop=list(stop) or None,
+            vllm_kwargs={"quantization": quantization()} if quantization() else {}
+        )
+
+    if llm_backend() == "server":
+        # The model stays loaded in the server across tool calls, and the server
+        # batches concurrent requests such as the threads of llm.batch
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            base_url=llm_server_url(),
+            api_key=os.getenv("LLM_API_KEY", "EMPTY"),
+            model=model_id,
+            max_tokens=max_new_tokens,
+            temperature=temperature if do_sample else 0.0,
+            stop=list(stop) or None,
+            extra_body={"top_k": top_k} if do_sample else None
+        )
+
+    if llm_backend() == "llama_cpp":
+        # Quantized GGUF weights (GGUF_PATH) run by llama.cpp's SIMD kernels on CPU;
+        # every generation setting mmaps the same file, so its pages are shared
+        from langchain_community.llms import LlamaCpp
+        return LlamaCpp(
+            model_path=os.environ["GGUF_PATH"],
+            n_ctx=2048,
+            n_batch=512,
+            n_threads=os.cpu_count(),
+            max_tokens=max_new_tokens,
+            temperature=temperature if do_sample else 0.0,
+            top_k=top_k,
+            stop=list(stop)
+        )
+
+    from langchain_huggingface import HuggingFacePipeline
+    return HuggingFacePipeline(
+        pipeline=get_pipeline(model_id, max_new_tokens, temperature, top_k, do_sample, stop)
+    )
+
+
+@lru_cache(maxsize=PREFIX_CACHE_SIZE)
+def _prefix_state(model_id: str, prefix: str) -> tuple:
+    """Token ids and KV cache of a prompt prefix, prefilled once"""
+    import torch
+
+    tokenizer, model = load_model(model_id)
+    prefix_ids = tokenizer(prefix, return_tensors="pt").input_ids.to(model.device)
+    with torch.inference_mode():
+        past = model(prefix_ids, use_cache=True).past_key_values
+    return prefix_ids, past
+
+
+@lru_cache(maxsize=256)
+def _part_ids(model_id: str, text: str):
+    """Token ids of one part of a prompt suffix, so fixed parts are tokenized once"""
+    tokenizer, model = load_model(model_id)
+    return tokenizer(text, return_tensors="pt", add_special_tokens=False).input_ids.to(model.device)
+
+
+def generate_after_prefix(model_id: str, prefix: str, suffix_parts: tuple, max_new_tokens: int,
+                          temperature: float, top_k: int = 50, do_sample: bool = True,
+                          stop: tuple = ()) -> str:
+    """Text generated for prefix + the suffix parts, reusing the prefix's cached keys and values"""
+    import copy
+    import torch
+
+    tokenizer, model = load_model(model_id)
+    prefix_ids, past = _prefix_state(model_id, prefix)
+    input_ids = torch.cat([prefix_ids, *(_part_ids(model_id, part) for part in suffix_parts)], dim=-1)
+    with torch.inference_mode():
+        output = model.generate(
+            input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            # generate extends the cache it is given, the cached prefix must stay as it is
+            past_key_values=copy.deepcopy(past),
+            use_cache=True,
+            max_new_tokens=max_new_tokens,
+            pad_token_id=tokenizer.pad_token_id,
+            **_sampling_kwargs(temperature, top_k, do_sample),
+            **_stopping_kwargs(model_id, stop)
+        )
+    return tokenizer.decode(output[0, input_ids.shape[-1]:], skip_special_tokens=True)